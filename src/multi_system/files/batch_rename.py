@@ -1,8 +1,21 @@
-"""批量重命名"""
+"""批量重命名
+
+先规划再执行：用以目标路径为键的索引在 O(n) 内找出重复目标、已存在的目标
+与链式依赖（a→b, b→c），按依赖逆序排列，循环（a→b, b→a）借助临时名打断。
+执行过程写入 data/files/rename_journal/ 下的日志，中途失败后可回滚或继续。
+"""
+import json
+import os
 import re
-from dataclasses import dataclass
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
 
+from multi_system.core.data_manager import DataManager
+
+from .walker import iter_tree
+
 
 @dataclass
 class RenameOp:
@@ -10,29 +23,320 @@ class RenameOp:
     new_path: Path
 
 
+@dataclass
+class RenameConflict:
+    op: RenameOp
+    reason: str
+
+
+@dataclass
+class RenamePlan:
+    steps: list[RenameOp]  # 按执行顺序排列，可能包含打断循环的临时名步骤
+    conflicts: list[RenameConflict]
+    op_count: int  # 可执行的原始操作数
+    temp_steps: list[int] = field(default_factory=list)  # 移到临时名的步骤序号
+
+    def ops_done(self, steps_done: int) -> int:
+        """顺序执行了前 steps_done 步时完成的原始操作数"""
+        return steps_done - sum(1 for i in self.temp_steps if i < steps_done)
+
+
+@dataclass
+class RenameResult:
+    done: int  # 已完成的步骤数
+    total: int
+    journal: Path | None = None  # 失败时保留的日志，可传给 rollback_rename / resume_rename
+    error: OSError | None = None
+    conflicts: list[RenameConflict] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 def preview_rename(
-    directory: Path, pattern: str, replacement: str, regex: bool = False
+    directory: Path,
+    pattern: str,
+    replacement: str,
+    regex: bool = False,
+    recursive: bool = False,
 ) -> list[RenameOp]:
+    compiled = re.compile(pattern) if regex else None
+
+    def rename(name: str) -> str:
+        if compiled is not None:
+            return compiled.sub(replacement, name)
+        return name.replace(pattern, replacement)
+
     ops = []
+    if recursive:
+        for entry in iter_tree(directory):
+            if not entry.is_file:
+                continue
+            new_name = rename(entry.name)
+            if new_name != entry.name:
+                ops.append(RenameOp(Path(entry.path), Path(entry.parent, new_name)))
+        ops.sort(key=lambda op: os.fspath(op.old_path))
+        return ops
+
     for f in sorted(directory.iterdir()):
         if not f.is_file():
             continue
-        name = f.name
-        if regex:
-            new_name = re.sub(pattern, replacement, name)
-        else:
-            new_name = name.replace(pattern, replacement)
-        if new_name != name:
+        new_name = rename(f.name)
+        if new_name != f.name:
             ops.append(RenameOp(f, f.parent / new_name))
     return ops
 
 
-def execute_rename(ops: list[RenameOp]) -> int:
-    success = 0
-    for op in ops:
+class _DirListing:
+    """按目录缓存文件名集合：每个目标目录只 listdir 一次，代替逐个 stat"""
+
+    def __init__(self):
+        self._names: dict[str, set[str]] = {}
+
+    def names(self, directory: str) -> set[str]:
+        names = self._names.get(directory)
+        if names is None:
+            try:
+                names = set(os.listdir(directory))
+            except OSError:
+                names = set()
+            self._names[directory] = names
+        return names
+
+    def exists(self, path: str) -> bool:
+        directory, name = os.path.split(path)
+        return name in self.names(directory)
+
+
+def _temp_path(path: str, listing: _DirListing) -> str:
+    directory, name = os.path.split(path)
+    names = listing.names(directory)
+    while True:
+        temp = f".{name}.{uuid.uuid4().hex[:8]}.renaming"
+        if temp not in names:
+            names.add(temp)
+            return os.path.join(directory, temp)
+
+
+def plan_rename(ops: list[RenameOp]) -> RenamePlan:
+    """检查冲突并排出安全的执行顺序
+
+    目标重复、目标已存在且不会被移走的操作计入 conflicts 并跳过；
+    依赖被跳过操作的链式操作也一并跳过。
+    """
+    src = [os.fspath(op.old_path) for op in ops]
+    dst = [os.fspath(op.new_path) for op in ops]
+    by_src: dict[str, int] = {}
+    by_dst: dict[str, int] = {}
+    reasons: dict[int, str] = {}
+    for i, (s, d) in enumerate(zip(src, dst, strict=True)):
+        if s in by_src:
+            reasons[i] = "源文件重复"
+            continue
+        by_src[s] = i
+        j = by_dst.get(d)
+        if j is not None:
+            reasons[i] = reasons[j] = "目标重名"
+        else:
+            by_dst[d] = i
+
+    listing = _DirListing()
+    for i, d in enumerate(dst):
+        if i not in reasons and d not in by_src and listing.exists(d):
+            reasons[i] = "目标已存在"
+
+    # 被跳过的源文件留在原处，以它为目标的操作也无法执行
+    pending = list(reasons)
+    while pending:
+        j = by_dst.get(src[pending.pop()])
+        if j is not None and j not in reasons:
+            reasons[j] = "目标被跳过的文件占用"
+            pending.append(j)
+
+    # 每个路径至多一个操作以它为源、一个以它为目标，依赖关系只有链与环两种形状
+    steps: list[RenameOp] = []
+    temp_steps: list[int] = []
+    visited = set(reasons)
+    for i in range(len(ops)):
+        if i in visited or dst[i] in by_src:
+            continue
+        # 链尾：目标空闲，沿"谁以我的源为目标"向前执行
+        k: int | None = i
+        while k is not None and k not in visited:
+            visited.add(k)
+            steps.append(ops[k])
+            k = by_dst.get(src[k])
+    for i in range(len(ops)):
+        if i in visited:
+            continue
+        # 剩下的都在环上：先把一个源移到临时名，腾出位置后再移回目标
+        temp = _temp_path(src[i], listing)
+        temp_steps.append(len(steps))
+        steps.append(RenameOp(ops[i].old_path, Path(temp)))
+        visited.add(i)
+        k = by_dst.get(src[i])
+        while k is not None and k not in visited:
+            visited.add(k)
+            steps.append(ops[k])
+            k = by_dst.get(src[k])
+        steps.append(RenameOp(Path(temp), ops[i].new_path))
+
+    conflicts = [RenameConflict(ops[i], reason) for i, reason in sorted(reasons.items())]
+    return RenamePlan(steps, conflicts, len(ops) - len(reasons), temp_steps)
+
+
+# 每执行这么多步写一次检查点；检查点之间的进度在恢复时按目标是否存在推断
+_CHECKPOINT_EVERY = 1024
+
+
+class RenameJournal:
+    """
+    执行日志：首行为全部步骤，创建时 fsync 一次；之后每隔 _CHECKPOINT_EVERY 步
+    追加一行已完成的步骤数作为检查点并 fsync，不为每一步单独同步。
+
+    步骤按顺序执行。除闭合循环的一步外，每步的目标在执行前不存在、执行后一直存在，
+    崩溃后从最后一个检查点起依次检查目标是否存在即可找出已完成的前缀。
+    闭合循环的一步会移走之前某一步的目标（临时名），执行前先写检查点。
+    """
+
+    def __init__(self, path: Path, steps: list[tuple[str, str]], done: int = 0):
+        self.path = path
+        self.steps = steps
+        self.done = done  # 已完成的步骤数（前缀）
+        self._file = None
+
+    @staticmethod
+    def journal_dir(data_manager: DataManager | None = None) -> Path:
+        path = (data_manager or DataManager()).get_data_dir("files") / "rename_journal"
+        path.mkdir(exist_ok=True)
+        return path
+
+    @classmethod
+    def create(
+        cls, steps: list[RenameOp], data_manager: DataManager | None = None
+    ) -> "RenameJournal":
+        pairs = [(os.fspath(s.old_path), os.fspath(s.new_path)) for s in steps]
+        name = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}.jsonl"
+        path = cls.journal_dir(data_manager) / name
+        with open(path, "w", encoding="utf-8", errors="surrogateescape") as f:
+            json.dump({"created": datetime.now().isoformat(), "steps": pairs}, f)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return cls(path, pairs)
+
+    @classmethod
+    def load(cls, path: Path) -> "RenameJournal":
+        with open(path, encoding="utf-8", errors="surrogateescape") as f:
+            header = json.loads(f.readline())
+            done = 0
+            for line in f:
+                # 崩溃时最后一行可能不完整
+                if line.endswith("\n") and line.strip().isdigit():
+                    done = max(done, int(line))
+        return cls(path, [tuple(p) for p in header["steps"]], done)
+
+    @classmethod
+    def list_pending(cls, data_manager: DataManager | None = None) -> list[Path]:
+        """未完成（失败或中断）的日志，按时间排序"""
+        return sorted(cls.journal_dir(data_manager).glob("*.jsonl"))
+
+    def checkpoint(self, done: int) -> None:
+        """记录前 done 步已完成并 fsync"""
+        if self._file is None:
+            self._file = self.path.open("a", encoding="utf-8")
+        self._file.write(f"{done}\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done = done
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self) -> None:
+        """全部完成或已回滚：删除日志"""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def recover(self) -> None:
+        """从最后一个检查点起，目标已存在的步骤都已执行"""
+        done = self.done
+        while done < len(self.steps) and os.path.lexists(self.steps[done][1]):
+            done += 1
+        self.done = done
+
+
+def _run(journal: RenameJournal, conflicts: list[RenameConflict]) -> RenameResult:
+    total = len(journal.steps)
+    # 已执行步骤的目标；某步以其中之一为源即为闭合循环的一步
+    created = {d for _, d in journal.steps[:journal.done]}
+    try:
+        for i in range(journal.done, total):
+            s, d = journal.steps[i]
+            if s in created or i - journal.done >= _CHECKPOINT_EVERY:
+                journal.checkpoint(i)
+            try:
+                os.rename(s, d)
+            except OSError as e:
+                journal.checkpoint(i)
+                journal.close()
+                return RenameResult(i, total, journal.path, e, conflicts)
+            created.add(d)
+    except BaseException:
+        journal.close()
+        raise
+    journal.finish()
+    return RenameResult(total, total, None, None, conflicts)
+
+
+def execute_plan(plan: RenamePlan, data_manager: DataManager | None = None) -> RenameResult:
+    """按计划执行，失败时停止并保留日志"""
+    if not plan.steps:
+        return RenameResult(0, 0, conflicts=plan.conflicts)
+    journal = RenameJournal.create(plan.steps, data_manager)
+    return _run(journal, plan.conflicts)
+
+
+def resume_rename(journal_path: Path) -> RenameResult:
+    """从失败或中断处继续执行"""
+    journal = RenameJournal.load(journal_path)
+    journal.recover()
+    return _run(journal, [])
+
+
+def rollback_rename(journal_path: Path) -> int:
+    """按相反顺序撤销已完成的步骤，返回撤销的步骤数；全部撤销后删除日志"""
+    journal = RenameJournal.load(journal_path)
+    journal.recover()
+    undone = 0
+    failed = False
+    for i in reversed(range(journal.done)):
+        s, d = journal.steps[i]
+        if os.path.lexists(s) or not os.path.lexists(d):
+            continue
         try:
-            op.old_path.rename(op.new_path)
-            success += 1
+            os.rename(d, s)
+            undone += 1
         except OSError:
-            continue
-    return success
+            failed = True
+    if not failed:
+        journal.finish()
+    return undone
+
+
+def execute_rename(ops: list[RenameOp], data_manager: DataManager | None = None) -> int:
+    """
+    规划并执行，返回成功重命名的文件数（不含临时名步骤）
+
+    任一步失败时撤销已完成的步骤并返回 0。撤销也失败时日志保留在
+    RenameJournal.list_pending() 中，可交给 resume_rename / rollback_rename 处理。
+    """
+    plan = plan_rename(ops)
+    result = execute_plan(plan, data_manager)
+    if result.journal is not None:
+        rollback_rename(result.journal)
+        return 0
+    return plan.ops_done(result.done)
@@ -1,8 +1,13 @@
 """大文件扫描"""
-import os
+import heapq
+import time
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 
+from .exclusions import Exclusions
+from .walker import ScanEntry, ScanVisitor, scan_tree, walk_tree
+
 
 @dataclass
 class BigFile:
@@ -10,17 +15,79 @@ class BigFile:
     size: int
 
 
-def find_big_files(path: Path, min_size_mb: int = 100, limit: int = 100) -> list[BigFile]:
-    min_size = min_size_mb * 1024 * 1024
-    files = []
-    for root, _, filenames in os.walk(path, onerror=lambda e: None):
-        for f in filenames:
-            try:
-                full = os.path.join(root, f)
-                size = os.path.getsize(full)
-                if size >= min_size:
-                    files.append(BigFile(full, size))
-            except (OSError, PermissionError):
-                continue
-    files.sort(key=lambda x: x.size, reverse=True)
-    return files[:limit]
+class BigFileVisitor(ScanVisitor):
+    """遍历访问者：收集不小于 min_size 字节的普通文件
+
+    指定 limit 时只用一个容量为 limit 的最小堆保留最大的文件，内存占用为
+    O(limit)；堆满后小于堆顶的文件直接跳过。硬链接到同一 inode 的文件只记录
+    首个遇到的路径。
+    """
+
+    def __init__(self, min_size: int, limit: int | None = None):
+        self.min_size = min_size
+        self.limit = limit
+        self._heap: list[tuple[int, str]] = []
+        self._seen_inodes: set[tuple[int, int]] = set()
+
+    def on_file(self, entry: ScanEntry) -> None:
+        size = entry.size
+        if size < self.min_size or entry.is_symlink or not entry.is_file:
+            return
+        full = self.limit is not None and len(self._heap) >= self.limit
+        if full and (self.limit == 0 or size <= self._heap[0][0]):
+            return
+        st = entry.stat
+        if st.st_nlink > 1:
+            key = (st.st_dev, st.st_ino)
+            if key in self._seen_inodes:
+                return
+            self._seen_inodes.add(key)
+        if full:
+            heapq.heapreplace(self._heap, (size, entry.path))
+        else:
+            heapq.heappush(self._heap, (size, entry.path))
+
+    def result(self, limit: int | None = None) -> list[BigFile]:
+        """按大小降序返回当前结果"""
+        if limit is None:
+            top = sorted(self._heap, reverse=True)
+        else:
+            top = heapq.nlargest(limit, self._heap)
+        return [BigFile(path, size) for size, path in top]
+
+
+def find_big_files(
+    path: Path,
+    min_size_mb: int = 100,
+    limit: int = 100,
+    workers: int | None = None,
+    exclude: Exclusions | None = None,
+) -> list[BigFile]:
+    """workers 大于 1 时并行读取目录，适合网络文件系统"""
+    visitor = BigFileVisitor(min_size_mb * 1024 * 1024, limit)
+    scan_tree(path, [visitor], workers=workers, exclude=exclude)
+    return visitor.result()
+
+
+def iter_big_files(
+    path: Path,
+    min_size_mb: int = 100,
+    limit: int = 100,
+    interval: float = 0.5,
+    workers: int | None = None,
+    exclude: Exclusions | None = None,
+) -> Iterator[list[BigFile]]:
+    """
+    边扫描边产出当前的前 limit 个大文件
+
+    每隔 interval 秒产出一次快照，扫描结束后产出最终结果，
+    界面可以据此在扫描过程中刷新表格。
+    """
+    visitor = BigFileVisitor(min_size_mb * 1024 * 1024, limit)
+    deadline = time.monotonic() + interval
+    for i, _ in enumerate(walk_tree(path, [visitor], workers=workers, exclude=exclude)):
+        # 每 256 个条目检查一次时间，避免频繁调用 monotonic
+        if i & 0xFF == 0 and time.monotonic() >= deadline:
+            yield visitor.result()
+            deadline = time.monotonic() + interval
+    yield visitor.result()
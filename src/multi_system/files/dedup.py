@@ -0,0 +1,228 @@
+"""重复文件合并
+
+把 DuplicateGroup 中除第一个文件以外的副本替换为指向它的硬链接，
+或在 btrfs/xfs 等支持写时复制的文件系统上用 FICLONE 替换为共享数据块的
+reflink 副本。路径保持不变：先在同目录下建立临时链接/副本，再原子地
+rename 覆盖原文件，任何一步失败原文件都保持原样。
+
+替换前逐字节比对内容，并在比对后与替换前检查副本与保留的文件都未被修改。
+硬链接会让副本共享保留文件的权限、属主与修改时间；reflink 副本各自保留原有元数据。
+"""
+import contextlib
+import errno
+import os
+import shutil
+import uuid
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .duplicate_files import DuplicateGroup
+from .hasher import CHUNK_SIZE
+
+try:
+    import fcntl
+except ImportError:
+    fcntl: Any = None
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# 这些错误表示文件系统不支持 reflink，"auto" 模式下回退到硬链接
+_NO_REFLINK = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV, errno.ENOSYS}
+
+MODES = ("hardlink", "reflink", "auto")
+
+
+@dataclass
+class DedupAction:
+    path: str
+    keep: str
+    size: int
+    status: str  # "planned" / "hardlinked" / "reflinked" / "skipped" / "failed"
+    reason: str = ""
+    reclaimed: int = 0  # 预计或实际释放的字节数
+
+
+@dataclass
+class DedupReport:
+    actions: list[DedupAction] = field(default_factory=list)
+
+    @property
+    def reclaimed(self) -> int:
+        return sum(a.reclaimed for a in self.actions)
+
+    @property
+    def replaced(self) -> int:
+        return sum(1 for a in self.actions if a.status in ("hardlinked", "reflinked", "planned"))
+
+    @property
+    def failed(self) -> list[DedupAction]:
+        return [a for a in self.actions if a.status == "failed"]
+
+
+def same_content(a: str, b: str) -> bool:
+    """逐块比较两个文件的内容"""
+    buf_a = bytearray(CHUNK_SIZE)
+    buf_b = bytearray(CHUNK_SIZE)
+    view_a, view_b = memoryview(buf_a), memoryview(buf_b)
+    with open(a, "rb", buffering=0) as fa, open(b, "rb", buffering=0) as fb:
+        while True:
+            n = fa.readinto(buf_a)
+            if fb.readinto(buf_b) != n:
+                return False
+            if not n:
+                return True
+            if view_a[:n] != view_b[:n]:
+                return False
+
+
+def _temp_path(path: str) -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.dedup")
+
+
+def _same_file(a: os.stat_result, b: os.stat_result) -> bool:
+    return a.st_ino == b.st_ino and a.st_size == b.st_size and a.st_mtime_ns == b.st_mtime_ns
+
+
+def _unchanged(path: str, st: os.stat_result) -> bool:
+    try:
+        return _same_file(os.stat(path, follow_symlinks=False), st)
+    except OSError:
+        return False
+
+
+def _check_before_replace(
+    keep: str, keep_st: os.stat_result, path: str, st: os.stat_result
+) -> None:
+    if not _unchanged(keep, keep_st):
+        raise OSError(errno.EAGAIN, "比对后保留的文件已被修改", keep)
+    if not _unchanged(path, st):
+        raise OSError(errno.EAGAIN, "比对后文件已被修改", path)
+
+
+def _hardlink(keep: str, keep_st: os.stat_result, path: str, st: os.stat_result) -> None:
+    tmp = _temp_path(path)
+    os.link(keep, tmp)
+    try:
+        # 临时链接必须指向比对过的那个 inode，且其内容未变
+        if not _unchanged(tmp, keep_st):
+            raise OSError(errno.EAGAIN, "比对后保留的文件已被修改", keep)
+        _check_before_replace(keep, keep_st, path, st)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _reflink(keep: str, keep_st: os.stat_result, path: str, st: os.stat_result) -> None:
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "当前平台不支持 reflink", path)
+    tmp = _temp_path(path)
+    try:
+        with open(keep, "rb") as src, open(tmp, "xb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            # 克隆的是克隆时刻的数据：此时源文件仍是比对过的内容即可
+            if not _same_file(os.fstat(src.fileno()), keep_st):
+                raise OSError(errno.EAGAIN, "比对后保留的文件已被修改", keep)
+        shutil.copystat(path, tmp, follow_symlinks=False)
+        with contextlib.suppress(OSError, AttributeError):
+            os.chown(tmp, st.st_uid, st.st_gid)
+        _check_before_replace(keep, keep_st, path, st)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def dedup_group(
+    group: DuplicateGroup, mode: str = "hardlink", dry_run: bool = False
+) -> list[DedupAction]:
+    """
+    合并一组重复文件，保留 group.paths[0]
+
+    Args:
+        group: find_duplicates / scan_duplicates 的结果
+        mode: "hardlink" / "reflink" / "auto"（优先 reflink，不支持时用硬链接）
+        dry_run: 只比对内容并估算可释放空间，不修改文件
+    """
+    if mode not in MODES:
+        raise ValueError(f"未知的合并方式: {mode}")
+    keep = group.paths[0]
+    try:
+        keep_st = os.stat(keep, follow_symlinks=False)
+    except OSError as e:
+        return [DedupAction(p, keep, group.size, "failed", str(e)) for p in group.paths[1:]]
+
+    actions = []
+    use_reflink = mode != "hardlink"
+    for path in group.paths[1:]:
+        action = DedupAction(path, keep, group.size, "skipped")
+        actions.append(action)
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError as e:
+            action.status, action.reason = "failed", str(e)
+            continue
+        if st.st_ino == keep_st.st_ino and st.st_dev == keep_st.st_dev:
+            action.reason = "已是同一文件"
+            continue
+        if st.st_dev != keep_st.st_dev:
+            action.reason = "不在同一文件系统"
+            continue
+        if st.st_size != keep_st.st_size or st.st_size != group.size:
+            action.reason = "大小已变化"
+            continue
+        try:
+            if not same_content(keep, path):
+                action.reason = "内容不一致"
+                continue
+        except OSError as e:
+            action.status, action.reason = "failed", str(e)
+            continue
+        if not _unchanged(path, st):
+            action.reason = "比对期间文件被修改"
+            continue
+        if not _unchanged(keep, keep_st):
+            action.reason = "比对期间保留的文件被修改"
+            continue
+
+        # 其他硬链接仍引用该 inode 时替换不会释放空间
+        reclaim = st.st_size if st.st_nlink == 1 else 0
+        if dry_run:
+            action.status, action.reclaimed = "planned", reclaim
+            continue
+        try:
+            if use_reflink:
+                try:
+                    _reflink(keep, keep_st, path, st)
+                    action.status = "reflinked"
+                except OSError as e:
+                    if mode == "reflink" or e.errno not in _NO_REFLINK:
+                        raise
+                    use_reflink = False  # 同一组都在同一文件系统上，不再尝试
+            if not use_reflink:
+                _hardlink(keep, keep_st, path, st)
+                action.status = "hardlinked"
+            action.reclaimed = reclaim
+        except OSError as e:
+            action.status, action.reason = "failed", str(e)
+    return actions
+
+
+def dedup_groups(
+    groups: Iterable[DuplicateGroup],
+    mode: str = "hardlink",
+    dry_run: bool = False,
+    progress: Callable[[int, int], None] | None = None,
+) -> DedupReport:
+    """依次合并多组重复文件，progress 回调 (已处理组数, 总组数)"""
+    groups = list(groups)
+    report = DedupReport()
+    for i, group in enumerate(groups, 1):
+        report.actions.extend(dedup_group(group, mode, dry_run))
+        if progress:
+            progress(i, len(groups))
+    return report
@@ -1,10 +1,24 @@
-"""重复文件查找"""
-import hashlib
+"""重复文件查找
+
+分阶段筛选，每一阶段只把仍可能重复的文件交给下一阶段：
+1. 按文件大小分组
+2. 按头尾数据块的部分指纹分组
+3. 分块流式计算完整 blake2b 哈希
+
+哈希阶段由 HashEngine 并行执行，可选用 HashCache 跳过未变化的文件。
+同一 inode 的多个硬链接只哈希一次，并作为 HardlinkGroup 单独报告。
+"""
 import os
 from collections import defaultdict
+from collections.abc import Callable
 from dataclasses import dataclass
 from pathlib import Path
 
+from .exclusions import Exclusions
+from .hash_cache import CacheEntry, HashCache
+from .hasher import HashEngine, covered_by_partial, full_hash, partial_hash
+from .walker import ScanEntry, ScanVisitor, scan_tree
+
 
 @dataclass
 class DuplicateGroup:
@@ -13,35 +27,164 @@ class DuplicateGroup:
     paths: list[str]
 
 
-def find_duplicates(path: Path, min_size: int = 1024) -> list[DuplicateGroup]:
-    size_map: dict[int, list[str]] = defaultdict(list)
-    for root, _, filenames in os.walk(path, onerror=lambda e: None):
-        for f in filenames:
+@dataclass
+class HardlinkGroup:
+    """指向同一 inode 的多个路径，删除其中之一不会释放空间"""
+
+    dev: int
+    inode: int
+    size: int
+    paths: list[str]
+
+
+@dataclass
+class DuplicateReport:
+    groups: list[DuplicateGroup]
+    hardlinks: list[HardlinkGroup]
+
+
+def find_duplicates(
+    path: Path,
+    min_size: int = 1024,
+    workers: int | None = None,
+    use_processes: bool = False,
+    progress: Callable[[int, int], None] | None = None,
+    engine: HashEngine | None = None,
+    cache: HashCache | None = None,
+    exclude: Exclusions | None = None,
+) -> list[DuplicateGroup]:
+    """查找重复文件，参数见 scan_duplicates"""
+    return scan_duplicates(
+        path, min_size, workers, use_processes, progress, engine, cache, exclude
+    ).groups
+
+
+class DuplicateCandidates(ScanVisitor):
+    """遍历访问者：按大小收集候选文件并记录硬链接"""
+
+    def __init__(self, min_size: int = 1024):
+        self.min_size = min_size
+        self.size_map: dict[int, list[str]] = defaultdict(list)
+        self.stats: dict[str, os.stat_result] = {}
+        self.links: dict[tuple[int, int], list[str]] = {}
+
+    def on_file(self, entry: ScanEntry) -> None:
+        if entry.is_symlink or not entry.is_file or entry.size < self.min_size:
+            return
+        st = entry.stat
+        if not st.st_ino:
+            # Windows 的 scandir 结果不含 inode，缓存与硬链接判断需要完整 stat
             try:
-                full = os.path.join(root, f)
-                size = os.path.getsize(full)
-                if size >= min_size:
-                    size_map[size].append(full)
-            except (OSError, PermissionError):
-                continue
-
-    hash_map: dict[str, list[str]] = defaultdict(list)
-    for _size, paths in size_map.items():
+                st = os.stat(entry.path, follow_symlinks=False)
+            except OSError:
+                return
+        if st.st_nlink > 1:
+            key = (st.st_dev, st.st_ino)
+            if key in self.links:
+                self.links[key].append(entry.path)
+                return
+            self.links[key] = [entry.path]
+        self.size_map[st.st_size].append(entry.path)
+        self.stats[entry.path] = st
+
+
+def scan_duplicates(
+    path: Path,
+    min_size: int = 1024,
+    workers: int | None = None,
+    use_processes: bool = False,
+    progress: Callable[[int, int], None] | None = None,
+    engine: HashEngine | None = None,
+    cache: HashCache | None = None,
+    exclude: Exclusions | None = None,
+) -> DuplicateReport:
+    """
+    查找重复文件与硬链接组
+
+    每组重复文件中每个 inode 只出现一次（取首个遇到的路径），
+    其余硬链接路径汇总在 DuplicateReport.hardlinks 中。
+
+    Args:
+        path: 扫描根目录
+        min_size: 参与比较的最小文件大小(字节)
+        workers: 哈希工作线程/进程数，默认按 CPU 数推算
+        use_processes: 使用进程池而非线程池
+        progress: 进度回调 (已完成数, 本阶段总数)
+        engine: 复用外部创建的引擎（例如用于从其他线程取消）
+        cache: 持久化哈希缓存，未变化的文件直接复用已有摘要
+        exclude: 遍历排除规则，默认跳过伪文件系统
+    """
+    candidates = DuplicateCandidates(min_size)
+    scan_tree(path, [candidates], exclude=exclude)
+    return resolve_duplicates(candidates, workers, use_processes, progress, engine, cache)
+
+
+def resolve_duplicates(
+    candidates: DuplicateCandidates,
+    workers: int | None = None,
+    use_processes: bool = False,
+    progress: Callable[[int, int], None] | None = None,
+    engine: HashEngine | None = None,
+    cache: HashCache | None = None,
+) -> DuplicateReport:
+    """对已收集的候选文件做分阶段哈希比对，可与其他访问者共享一次遍历"""
+    if engine is None:
+        engine = HashEngine(workers=workers, use_processes=use_processes, progress=progress)
+    size_map, stats, links = candidates.size_map, candidates.stats, candidates.links
+
+    cached: dict[str, CacheEntry] = {}
+    partial_map: dict[tuple[int, str], list[str]] = defaultdict(list)
+    partial_tasks = []
+    for size, paths in size_map.items():
         if len(paths) < 2:
             continue
         for p in paths:
-            try:
-                with open(p, "rb") as f:
-                    h = hashlib.md5(f.read()).hexdigest()
-                hash_map[h].append(p)
-            except (OSError, PermissionError):
-                continue
+            entry = cache.get(stats[p]) if cache is not None else None
+            if entry and entry.partial:
+                cached[p] = entry
+                partial_map[(size, entry.partial)].append(p)
+            else:
+                partial_tasks.append((p, size))
+    for (p, size), h in engine.map(partial_hash, partial_tasks):
+        if h is not None:
+            partial_map[(size, h)].append(p)
+            if cache is not None:
+                cache.put(p, stats[p], partial=h)
 
     groups = []
-    for h, paths in hash_map.items():
+    full_sizes: dict[str, int] = {}
+    for (size, h), paths in partial_map.items():
+        if len(paths) < 2:
+            continue
+        if covered_by_partial(size):
+            groups.append(DuplicateGroup(hash=h, size=size, paths=sorted(paths)))
+        else:
+            full_sizes.update(dict.fromkeys(paths, size))
+
+    full_map: dict[tuple[int, str], list[str]] = defaultdict(list)
+    full_tasks = []
+    for p, size in full_sizes.items():
+        entry = cached.get(p)
+        if entry and entry.full:
+            full_map[(size, entry.full)].append(p)
+        else:
+            full_tasks.append((p,))
+    for (p,), h in engine.map(full_hash, full_tasks):
+        if h is not None:
+            full_map[(full_sizes[p], h)].append(p)
+            if cache is not None:
+                cache.put(p, stats[p], full=h)
+    if cache is not None:
+        cache.commit()
+    for (size, h), paths in full_map.items():
         if len(paths) >= 2:
-            groups.append(
-                DuplicateGroup(hash=h, size=os.path.getsize(paths[0]), paths=paths)
-            )
+            groups.append(DuplicateGroup(hash=h, size=size, paths=sorted(paths)))
+
     groups.sort(key=lambda g: g.size, reverse=True)
-    return groups
+    hardlinks = [
+        HardlinkGroup(dev, ino, stats[paths[0]].st_size, paths)
+        for (dev, ino), paths in links.items()
+        if len(paths) >= 2
+    ]
+    hardlinks.sort(key=lambda g: g.size, reverse=True)
+    return DuplicateReport(groups, hardlinks)
@@ -0,0 +1,203 @@
+"""遍历排除规则
+
+所有基于 walker 的扫描共用：gitignore 风格的路径模式、不跨文件系统、
+按文件系统类型跳过 /proc、/sys 等伪文件系统与网络挂载、指定路径与文件大小
+过滤。目录在进入之前就被判断，被排除的条目既不产出也不进入。
+"""
+import contextlib
+import os
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import psutil
+
+if TYPE_CHECKING:
+    from .walker import ScanEntry
+
+# 内核或运行时提供的虚拟文件系统，内容不占磁盘，读取可能阻塞或报错
+PSEUDO_FSTYPES = frozenset({
+    "proc", "sysfs", "devtmpfs", "devpts", "devfs", "cgroup", "cgroup2",
+    "debugfs", "tracefs", "securityfs", "pstore", "bpf", "configfs",
+    "fusectl", "mqueue", "hugetlbfs", "binfmt_misc", "efivarfs",
+    "nsfs", "rpc_pipefs", "selinuxfs",
+})
+
+NETWORK_FSTYPES = frozenset({
+    "nfs", "nfs4", "cifs", "smbfs", "smb3", "9p", "afs", "ceph",
+    "glusterfs", "davfs", "fuse.sshfs", "fuse.rclone", "lustre",
+})
+
+# 常见的依赖与版本库目录，界面上作为排除模式的默认值
+COMMON_PATTERNS = (".git/", "node_modules/", "__pycache__/", ".venv/", ".tox/")
+
+
+def _translate(pattern: str) -> str:
+    """把 gitignore 模式主体翻译为正则，匹配以 / 分隔的相对路径"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                at_start = i == 0 or pattern[i - 1] == "/"
+                if at_start and pattern.startswith("**/", i):
+                    out.append("(?:.*/)?")
+                    i += 3
+                    continue
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 2)
+            if j < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+@dataclass
+class _Rule:
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+
+def compile_patterns(patterns: Iterable[str]) -> list[_Rule]:
+    """按 gitignore 规则编译：# 注释、! 取反、结尾 / 只匹配目录、含 / 时相对根目录"""
+    rules = []
+    for line in patterns:
+        p = line.strip()
+        if not p or p.startswith("#"):
+            continue
+        negate = p.startswith("!")
+        if negate:
+            p = p[1:]
+        dir_only = p.endswith("/")
+        p = p.rstrip("/")
+        if not p:
+            continue
+        anchored = "/" in p
+        p = p.lstrip("/")
+        prefix = "" if anchored else "(?:.*/)?"
+        rules.append(_Rule(re.compile(f"^{prefix}{_translate(p)}$"), negate, dir_only))
+    return rules
+
+
+@dataclass
+class Exclusions:
+    """
+    扫描排除规则
+
+    Args:
+        patterns: gitignore 风格的模式，相对扫描根目录匹配，后出现的规则优先
+        one_filesystem: 不进入与根目录不同 st_dev 的目录（类似 find -xdev）
+        skip_pseudo: 跳过伪文件系统挂载点（/proc、/sys、/dev 等）
+        skip_network: 跳过网络文件系统挂载点
+        paths: 额外排除的路径
+        min_size: 小于该大小的文件被排除
+        max_size: 大于该大小的文件被排除
+    """
+
+    patterns: list[str] = field(default_factory=list)
+    one_filesystem: bool = False
+    skip_pseudo: bool = True
+    skip_network: bool = False
+    paths: list[str | Path] = field(default_factory=list)
+    min_size: int = 0
+    max_size: int | None = None
+
+    def bind(self, root: str | Path) -> "ExclusionMatcher":
+        return ExclusionMatcher(self, root)
+
+
+class ExclusionMatcher:
+    """绑定到某次扫描根目录的排除规则"""
+
+    def __init__(self, exclusions: Exclusions, root: str | Path):
+        self.root = os.fspath(root)
+        self._absolute = os.path.isabs(self.root)
+        self._prefix_len = len(os.path.join(self.root, ""))
+        self._rules = compile_patterns(exclusions.patterns)
+        self._has_negate = any(r.negate for r in self._rules)
+        self.min_size = exclusions.min_size
+        self.max_size = exclusions.max_size
+
+        self._root_dev: int | None = None
+        if exclusions.one_filesystem:
+            with contextlib.suppress(OSError):
+                self._root_dev = os.stat(self.root).st_dev
+
+        skip_types: set[str] = set()
+        if exclusions.skip_pseudo:
+            skip_types |= PSEUDO_FSTYPES
+        if exclusions.skip_network:
+            skip_types |= NETWORK_FSTYPES
+        root_abs = os.path.abspath(self.root)
+        self._skip_paths = {os.path.abspath(os.fspath(p)) for p in exclusions.paths}
+        if skip_types:
+            try:
+                partitions = psutil.disk_partitions(all=True)
+            except (OSError, RuntimeError):
+                partitions = []
+            # 同一挂载点可能有多条记录（如 autofs 触发点与其上挂载的 nfs/ext4），
+            # 按挂载顺序以最后一条、即实际可见的文件系统为准
+            visible = {p.mountpoint: p.fstype for p in partitions}
+            # 根目录本身在被跳过的文件系统上时，视为调用方有意扫描
+            self._skip_paths.update(
+                mountpoint for mountpoint, fstype in visible.items()
+                if fstype in skip_types and mountpoint != root_abs
+            )
+
+    def _relpath(self, path: str) -> str:
+        rel = path[self._prefix_len:]
+        return rel.replace(os.sep, "/") if os.sep != "/" else rel
+
+    def _pattern_excluded(self, entry: "ScanEntry") -> bool:
+        rel = self._relpath(entry.path)
+        excluded = False
+        for rule in self._rules:
+            if rule.dir_only and not entry.is_dir:
+                continue
+            if rule.negate != excluded:
+                continue  # 不会改变当前结论
+            if rule.regex.match(rel):
+                excluded = not rule.negate
+                if excluded and not self._has_negate:
+                    return True
+        return excluded
+
+    def accepts(self, entry: "ScanEntry") -> bool:
+        """条目是否保留；目录返回 False 时也不会被进入"""
+        if entry.is_dir:
+            if self._skip_paths:
+                path = entry.path if self._absolute else os.path.abspath(entry.path)
+                if path in self._skip_paths:
+                    return False
+            st_dev = entry.stat.st_dev
+            # Windows 上 scandir 的 st_dev 为 0，无法判断时不排除
+            if self._root_dev is not None and st_dev and st_dev != self._root_dev:
+                return False
+        else:
+            size = entry.stat.st_size
+            if size < self.min_size or (self.max_size is not None and size > self.max_size):
+                return False
+            if self._skip_paths and entry.path in self._skip_paths:
+                return False
+        return not (self._rules and self._pattern_excluded(entry))
@@ -1,10 +1,16 @@
 import ctypes
+import json
 import os
 import platform
+import shlex
 import subprocess
 import sys
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
 
+from multi_system.core.data_manager import DataManager
+
 
 def get_os_type() -> str:
     """
@@ -68,46 +74,6 @@ def is_admin() -> bool:
     return False
 
 
-def run_as_admin(args=None):
-    """
-    以管理员权限重新运行当前脚本
-
-    Args:
-        args: 运行参数列表，默认为sys.argv
-
-    Returns:
-        None: 此函数会启动一个新的进程并退出当前进程
-    """
-    if args is None:
-        args = sys.argv
-
-    os_type = get_os_type()
-
-    if os_type == "windows":
-        script = args[0]
-        params = " ".join([f'"{arg}"' for arg in args[1:]])
-
-        # 使用Windows的ShellExecute以管理员权限运行
-        ctypes.windll.shell32.ShellExecuteW(
-            None, "runas", sys.executable, f'"{script}" {params}', None, 1
-        )
-    elif os_type == "macos":
-        # 使用osascript请求权限
-        script = args[0]
-        params = " ".join([f'"{arg}"' for arg in args[1:]])
-        os.system(
-            f"osascript -e 'do shell script \"python3 {script} {params}\" with administrator privileges'"
-        )
-    elif os_type == "linux":
-        # 使用sudo请求权限
-        script = args[0]
-        params = " ".join([f'"{arg}"' for arg in args[1:]])
-        os.system(f"sudo python3 {script} {params}")
-
-    # 退出当前的非管理员进程
-    sys.exit(0)
-
-
 def create_symlink_windows(
     source: str | Path,
     target: str | Path,
@@ -149,15 +115,8 @@ def create_symlink_windows(
 
     # 检查权限并自动提升
     if auto_elevate and not is_admin():
-        # 设置环境变量以传递参数
-        os.environ["SYMLINK_SOURCE"] = str(source)
-        os.environ["SYMLINK_TARGET"] = str(target)
-        os.environ["SYMLINK_IS_DIR"] = "1" if is_dir else "0"
-
         print("需要管理员权限创建软连接，正在请求提升权限...")
-        run_as_admin()
-        # 如果代码运行到这里，说明提权失败或用户取消
-        return False, "权限提升失败或用户取消操作"
+        return _elevate_one(source, target, is_dir)
 
     # 创建软连接
     try:
@@ -212,14 +171,8 @@ def create_symlink_unix(
         target.parent.mkdir(parents=True, exist_ok=True)
     except PermissionError:
         if auto_elevate:
-            # 设置环境变量以传递参数
-            os.environ["SYMLINK_SOURCE"] = str(source)
-            os.environ["SYMLINK_TARGET"] = str(target)
-
             print("需要管理员权限创建目录或软连接，正在请求提升权限...")
-            run_as_admin()
-            # 如果代码运行到这里，说明提权失败或用户取消
-            return False, "权限提升失败或用户取消操作"
+            return _elevate_one(source, target, source.is_dir())
         else:
             return False, f"没有创建目录的权限: {target.parent}"
 
@@ -229,14 +182,8 @@ def create_symlink_unix(
         return True, "软连接创建成功"
     except PermissionError:
         if auto_elevate:
-            # 设置环境变量以传递参数
-            os.environ["SYMLINK_SOURCE"] = str(source)
-            os.environ["SYMLINK_TARGET"] = str(target)
-
             print("需要管理员权限创建软连接，正在请求提升权限...")
-            run_as_admin()
-            # 如果代码运行到这里，说明提权失败或用户取消
-            return False, "权限提升失败或用户取消操作"
+            return _elevate_one(source, target, source.is_dir())
         else:
             return False, "没有创建软连接的权限"
     except Exception as e:
@@ -261,13 +208,6 @@ def create_symlink(
     Returns:
         Tuple[bool, str]: (成功标志, 消息)
     """
-    # 检查环境变量中是否有参数（从权限提升后传递过来的）
-    if "SYMLINK_SOURCE" in os.environ and "SYMLINK_TARGET" in os.environ:
-        source = os.environ.pop("SYMLINK_SOURCE")
-        target = os.environ.pop("SYMLINK_TARGET")
-        if "SYMLINK_IS_DIR" in os.environ:
-            is_dir = os.environ.pop("SYMLINK_IS_DIR") == "1"
-
     source = Path(source)
     target = Path(target)
 
@@ -285,7 +225,317 @@ def create_symlink(
         return False, f"不支持的操作系统: {platform.system()}"
 
 
+# Windows: ERROR_PRIVILEGE_NOT_HELD，未开启开发者模式时普通用户创建软连接会得到该错误
+_ERROR_PRIVILEGE_NOT_HELD = 1314
+
+
+@dataclass
+class LinkSpec:
+    source: Path
+    target: Path
+    is_dir: bool | None = None  # None 时按源路径自动判断
+
+
+@dataclass
+class LinkResult:
+    spec: LinkSpec
+    status: str  # "planned" / "created" / "exists" / "invalid" / "skipped" / "failed"
+    message: str = ""
+    elevated: bool = False  # 是否由提升权限的子进程创建
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("planned", "created", "exists")
+
+
+def _base_dir(value: str | None, default: Path) -> Path:
+    if not value:
+        return default
+    return default / Path(value).expanduser()
+
+
+def load_link_manifest(
+    path: str | Path, data_manager: DataManager | None = None
+) -> list[LinkSpec]:
+    """
+    读取链接清单（.toml / .yaml / .yml）
+
+    清单格式::
+
+        source_base = "~/dotfiles"   # 相对 source 的基准目录，默认为清单所在目录
+        target_base = "~"            # 相对 target 的基准目录，默认为清单所在目录
+
+        [[links]]
+        source = "vim/vimrc"
+        target = ".vimrc"
+        is_dir = false               # 可选，默认按源路径判断
+
+    相对路径的清单在当前目录下不存在时，从 data/links/ 中查找。
+    """
+    dm = data_manager or DataManager()
+    path = Path(path).expanduser()
+    if not path.is_absolute() and not path.exists():
+        path = dm.get_data_dir("links") / path
+    if not path.exists():
+        raise FileNotFoundError(f"清单不存在: {path}")
+
+    suffix = path.suffix.lower()
+    if suffix == ".toml":
+        data = dm.load_toml(path)
+    elif suffix in (".yaml", ".yml"):
+        data = dm.load_yaml(path)
+    else:
+        raise ValueError(f"不支持的清单格式: {path.suffix}")
+
+    base = path.resolve().parent
+    source_base = _base_dir(data.get("source_base"), base)
+    target_base = _base_dir(data.get("target_base"), base)
+    entries = data.get("links", [])
+    if not isinstance(entries, list):
+        raise ValueError("清单中的 links 必须是列表")
+
+    specs = []
+    for i, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict) or not entry.get("source") or not entry.get("target"):
+            raise ValueError(f"第 {i} 个链接缺少 source 或 target")
+        is_dir = entry.get("is_dir")
+        specs.append(LinkSpec(
+            source_base / Path(entry["source"]).expanduser(),
+            target_base / Path(entry["target"]).expanduser(),
+            None if is_dir is None else bool(is_dir),
+        ))
+    return specs
+
+
+def validate_links(specs: list[LinkSpec]) -> list[LinkResult]:
+    """
+    在创建任何链接之前检查整个清单
+
+    源路径必须存在，目标不能重复、不能被其他文件占用；已指向同一源的软连接
+    记为 "exists"。合法的条目状态为 "planned"，路径被规范为绝对路径。
+    """
+    results = []
+    seen: dict[str, int] = {}
+    for i, spec in enumerate(specs, 1):
+        source = Path(spec.source).expanduser().resolve()
+        # 不解析目标本身，否则已存在的软连接会被跟随
+        target = Path(spec.target).expanduser()
+        target = target.parent.resolve() / target.name
+        is_dir = source.is_dir() if spec.is_dir is None else spec.is_dir
+        result = LinkResult(LinkSpec(source, target, is_dir), "planned")
+        results.append(result)
+
+        key = os.path.normcase(str(target))
+        if key in seen:
+            result.status, result.message = "invalid", f"与第 {seen[key]} 个链接的目标重复"
+            continue
+        seen[key] = i
+        if not source.exists():
+            result.status, result.message = "invalid", f"源路径不存在: {source}"
+        elif target == source:
+            result.status, result.message = "invalid", "目标与源路径相同"
+        elif os.path.lexists(target):
+            if not target.is_symlink():
+                result.status = "invalid"
+                result.message = f"目标位置已存在非软连接文件/目录: {target}"
+            elif target.resolve() == source:
+                result.status, result.message = "exists", f"软连接已存在且指向正确目标: {source}"
+            else:
+                result.status = "invalid"
+                result.message = f"目标位置已存在指向其他位置的软连接: {target.resolve()}"
+        else:
+            parent = target.parent
+            while not os.path.lexists(parent) and parent != parent.parent:
+                parent = parent.parent
+            if not parent.is_dir():
+                result.status, result.message = "invalid", f"上级路径不是目录: {parent}"
+    return results
+
+
+def _make_link(source: str, target: str, is_dir: bool) -> tuple[str, str]:
+    """创建单个链接，权限不足时返回 "denied" """
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.symlink(source, target, target_is_directory=is_dir)
+    except OSError as e:
+        if isinstance(e, PermissionError) or getattr(e, "winerror", None) == _ERROR_PRIVILEGE_NOT_HELD:
+            return "denied", f"没有创建软连接的权限: {e}"
+        return "failed", f"创建软连接时出错: {e}"
+    return "created", "软连接创建成功"
+
+
+def _apply_links(request_path: str, response_path: str) -> None:
+    """特权子进程入口：按请求文件创建全部链接，结果按顺序写入响应文件"""
+    with open(request_path, encoding="utf-8") as f:
+        request = json.load(f)
+    answers = []
+    for source, target, is_dir in request:
+        status, message = _make_link(source, target, is_dir)
+        answers.append(["failed" if status == "denied" else status, message])
+    with open(response_path, "w", encoding="utf-8") as f:
+        json.dump(answers, f, ensure_ascii=False)
+
+
+def apply_links_from_args(args: list[str]) -> int:
+    """
+    处理 "--apply-links 请求文件 响应文件" 参数，返回退出码
+
+    模块以 -m 运行时与冻结打包的入口程序（main / main_gui）共用
+    """
+    if len(args) != 3 or args[0] != "--apply-links":
+        print("用法: --apply-links <请求文件> <响应文件>")
+        return 2
+    _apply_links(args[1], args[2])
+    return 0
+
+
+def _apply_links_command() -> tuple[list[str], str | None]:
+    """特权子进程的命令行与工作目录"""
+    if getattr(sys, "frozen", False):
+        # 冻结打包时 sys.executable 是入口程序本身，由入口程序识别 --apply-links
+        return [sys.executable, "--apply-links"], None
+    # 以包所在目录为工作目录运行 -m：未安装（源码运行）时也能导入，
+    # 且不依赖提升权限后可能被清除的 PYTHONPATH
+    package_root = Path(__file__).resolve().parents[2]
+    return [sys.executable, "-m", "multi_system.files.file_link", "--apply-links"], str(package_root)
+
+
+def _run_elevated(cmd: list[str], cwd: str | None = None) -> str | None:
+    """以管理员权限在 cwd 中运行命令并等待其结束，失败时返回原因"""
+    os_type = get_os_type()
+    try:
+        if os_type == "windows":
+            exe = cmd[0].replace("'", "''")
+            params = subprocess.list2cmdline(cmd[1:]).replace("'", "''")
+            ps = (
+                f"Start-Process -FilePath '{exe}' -ArgumentList '{params}' "
+                "-Verb RunAs -Wait -WindowStyle Hidden"
+            )
+            if cwd is not None:
+                workdir = cwd.replace("'", "''")
+                ps += f" -WorkingDirectory '{workdir}'"
+            proc = subprocess.run(
+                ["powershell", "-NoProfile", "-Command", ps], capture_output=True, text=True
+            )
+        elif os_type == "macos":
+            script = shlex.join(cmd)
+            if cwd is not None:
+                script = f"cd {shlex.quote(cwd)} && {script}"
+            script = script.replace("\\", "\\\\").replace('"', '\\"')
+            proc = subprocess.run(
+                ["osascript", "-e", f'do shell script "{script}" with administrator privileges'],
+                capture_output=True,
+                text=True,
+            )
+        elif os_type == "linux":
+            # 不捕获输出，sudo 需要在终端中询问密码
+            proc = subprocess.run(["sudo", *cmd], cwd=cwd)
+        else:
+            return f"不支持的操作系统: {platform.system()}"
+    except OSError as e:
+        return f"请求管理员权限失败: {e}"
+    if proc.returncode != 0:
+        return (proc.stderr or "").strip() or "权限提升失败或用户取消操作"
+    return None
+
+
+def _create_elevated(results: list[LinkResult]) -> None:
+    """提升一次权限，由一个子进程创建全部链接，并把结果写回 results"""
+    request = [[str(r.spec.source), str(r.spec.target), bool(r.spec.is_dir)] for r in results]
+    answers = None
+    # mkdtemp 创建的目录仅当前用户可访问，特权进程读取的请求不会被他人篡改
+    with tempfile.TemporaryDirectory(prefix="multi_system_links_") as tmp:
+        request_path = os.path.join(tmp, "request.json")
+        response_path = os.path.join(tmp, "response.json")
+        with open(request_path, "w", encoding="utf-8") as f:
+            json.dump(request, f, ensure_ascii=False)
+        cmd, cwd = _apply_links_command()
+        error = _run_elevated([*cmd, request_path, response_path], cwd)
+        try:
+            with open(response_path, encoding="utf-8") as f:
+                answers = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    if not isinstance(answers, list) or len(answers) != len(results):
+        for r in results:
+            r.status, r.message = "failed", error or "权限提升失败或用户取消操作"
+        return
+    for r, (status, message) in zip(results, answers, strict=True):
+        r.status, r.message, r.elevated = status, message, True
+
+
+def _elevate_one(source: Path, target: Path, is_dir: bool) -> tuple[bool, str]:
+    result = LinkResult(LinkSpec(source, target, is_dir), "planned")
+    _create_elevated([result])
+    return result.ok, result.message
+
+
+def create_links(
+    specs: list[LinkSpec],
+    auto_elevate: bool = True,
+    dry_run: bool = False,
+    strict: bool = False,
+) -> list[LinkResult]:
+    """
+    批量创建软连接
+
+    先校验整个清单，再在当前进程中逐个创建；因权限不足失败的链接汇总后
+    只提升一次权限，由一个特权子进程全部创建。
+
+    Args:
+        specs: 链接列表，可由 load_link_manifest 读取
+        auto_elevate: 权限不足时是否请求提升权限（整个批次最多一次）
+        dry_run: 只校验，不创建
+        strict: 存在不合法的条目时不创建任何链接
+
+    Returns:
+        List[LinkResult]: 与 specs 一一对应的结果
+    """
+    results = validate_links(specs)
+    planned = [r for r in results if r.status == "planned"]
+    if dry_run:
+        return results
+    if strict and any(r.status == "invalid" for r in results):
+        for r in planned:
+            r.status, r.message = "skipped", "清单中存在不合法的条目"
+        return results
+
+    denied = []
+    for r in planned:
+        status, message = _make_link(str(r.spec.source), str(r.spec.target), bool(r.spec.is_dir))
+        r.message = message
+        if status == "denied":
+            denied.append(r)
+        else:
+            r.status = status
+
+    if denied:
+        if auto_elevate and not is_admin():
+            print(f"{len(denied)} 个软连接需要管理员权限，正在请求提升权限...")
+            _create_elevated(denied)
+        else:
+            for r in denied:
+                r.status = "failed"
+    return results
+
+
+def link_manifest(
+    path: str | Path,
+    auto_elevate: bool = True,
+    dry_run: bool = False,
+    strict: bool = False,
+    data_manager: DataManager | None = None,
+) -> list[LinkResult]:
+    """读取清单并批量创建其中的软连接，参数同 create_links"""
+    return create_links(load_link_manifest(path, data_manager), auto_elevate, dry_run, strict)
+
+
 if __name__ == "__main__":
+    # 提升权限后的子进程：创建请求文件中的全部链接
+    if sys.argv[1:2] == ["--apply-links"]:
+        sys.exit(apply_links_from_args(sys.argv[1:]))
+
     # 测试代码
     source_path = Path("test_source")
     target_path = Path("test_link")
@@ -1,52 +1,591 @@
-"""文件变更监控"""
+"""文件变更监控
+
+Linux 上默认使用 inotify 事件后端，空闲时不产生任何磁盘读取；
+其他平台或 inotify 不可用（例如监视数量达到上限）时回退到按目录修改时间
+剪枝的轮询。
+"""
+import errno
 import os
+import time
+from array import array
 from collections.abc import Callable
 from dataclasses import dataclass
 from pathlib import Path
 
+from . import inotify
+from .walker import iter_tree
+
 
 @dataclass
 class FileEvent:
     path: str
-    event_type: str  # "created" / "modified" / "deleted"
+    event_type: str  # "created" / "modified" / "deleted" / "moved"
+    dest_path: str | None = None  # 仅 moved 事件：移动后的路径
+
+
+# 文件身份 (inode, 修改时间)：重命名不改变两者，
+# 加上修改时间可避免把刚释放又被复用的 inode 误判为移动
+FileId = tuple[int, int]
+
+
+class _EventBatch:
+    """合并同一次检查内同一路径的多个事件，结果与轮询方式一致"""
+
+    def __init__(self):
+        self._types: dict[str, str] = {}
+        self._ids: dict[str, FileId | None] = {}
+
+    def add(self, path: str, event_type: str, file_id: FileId | None = None) -> None:
+        prev = self._types.pop(path, None)
+        if prev is None:
+            self._types[path] = event_type
+        elif prev == "created":
+            if event_type != "deleted":
+                self._types[path] = "created"
+        elif prev == "deleted":
+            self._types[path] = "modified" if event_type == "created" else event_type
+        else:
+            self._types[path] = event_type
+        if path in self._types:
+            if file_id is not None or path not in self._ids:
+                self._ids[path] = file_id
+        else:
+            self._ids.pop(path, None)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._types
+
+    def get(self, path: str) -> tuple[str, FileId | None]:
+        return self._types[path], self._ids.get(path)
+
+    def items(self) -> list[tuple[str, str, FileId | None]]:
+        return [(p, t, self._ids.get(p)) for p, t in self._types.items()]
+
+    def discard(self, path: str) -> None:
+        self._types.pop(path, None)
+        self._ids.pop(path, None)
+
+    def events(self) -> list[FileEvent]:
+        return [FileEvent(p, t) for p, t in self._types.items()]
+
+
+class _EventCoalescer:
+    """跨多次检查合并事件
+
+    同一路径的事件持续合并，直到该路径 window 秒内没有新事件才交付；
+    持续变化的路径最多等待 max_wait 秒（默认 5 倍 window）也会交付。
+    交付时把同一文件身份的删除与新建配对为一个 moved 事件。
+    """
+
+    def __init__(self, window: float = 0.0, max_wait: float | None = None):
+        self.window = window
+        self.max_wait = 5 * window if max_wait is None else max_wait
+        self._pending = _EventBatch()
+        self._last_seen: dict[str, float] = {}
+        self._first_seen: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def push(self, batch: _EventBatch, now: float) -> None:
+        for path, event_type, file_id in batch.items():
+            self._pending.add(path, event_type, file_id)
+            if path in self._pending:
+                self._last_seen[path] = now
+                self._first_seen.setdefault(path, now)
+            else:
+                self._last_seen.pop(path, None)
+                self._first_seen.pop(path, None)
+
+    def pop_ready(self, now: float, flush: bool = False) -> list[FileEvent]:
+        ready = [
+            p for p, t in self._last_seen.items()
+            if flush
+            or now - t >= self.window
+            or now - self._first_seen[p] >= self.max_wait
+        ]
+        if not ready:
+            return []
+        created: dict[FileId, str] = {}
+        deleted: dict[FileId, str] = {}
+        for path, event_type, file_id in self._pending.items():
+            if file_id is None:
+                continue
+            if event_type == "created":
+                created.setdefault(file_id, path)
+            elif event_type == "deleted":
+                deleted.setdefault(file_id, path)
+
+        events = []
+        done: set[str] = set()
+        for path in ready:
+            if path in done:
+                continue
+            event_type, file_id = self._pending.get(path)
+            src = dest = None
+            if file_id is not None:
+                if event_type == "deleted":
+                    src, dest = path, created.get(file_id)
+                elif event_type == "created":
+                    src, dest = deleted.get(file_id), path
+            if src is not None and dest is not None and src not in done and dest not in done:
+                # 配对的另一半即使仍在窗口内也一并交付
+                events.append(FileEvent(src, "moved", dest))
+                done.update((src, dest))
+            else:
+                events.append(FileEvent(path, event_type))
+                done.add(path)
+        for path in done:
+            self._pending.discard(path)
+            self._last_seen.pop(path, None)
+            self._first_seen.pop(path, None)
+        return events
+
+
+# 没有文件的目录共享同一个空数组（快照中的数组只读）
+_NO_STATS = array("q")
+_STRIDE = 3  # 每个文件在 stats 中占 (修改时间, 大小, inode) 三项
+
+
+@dataclass(slots=True)
+class _DirState:
+    """单个目录的紧凑快照
+
+    文件名按字典序排列后以 "\0" 连接成一个字符串（文件名不可能包含 "\0"），
+    每个文件的修改时间、大小、inode 依次存放在同一个定长数组中，
+    每个目录只占少量对象；目录路径只在 _PollingBackend._dirs 的键中保存一次。
+    """
+
+    mtime_ns: int
+    packed_names: str
+    stats: array
+    subdirs: str  # 同样以 "\0" 连接
+
+    @property
+    def names(self) -> list[str]:
+        return self.packed_names.split("\0") if self.packed_names else []
+
+    @property
+    def subdir_names(self) -> list[str]:
+        return self.subdirs.split("\0") if self.subdirs else []
+
+    def mtime(self, i: int) -> int:
+        return self.stats[i * _STRIDE]
+
+    def file_id(self, i: int) -> FileId:
+        i *= _STRIDE
+        return self.stats[i + 2], self.stats[i]
+
+    def changed(self, i: int, other: "_DirState", j: int) -> bool:
+        i *= _STRIDE
+        j *= _STRIDE
+        return self.stats[i:i + _STRIDE] != other.stats[j:j + _STRIDE]
+
+
+def _diff_dir(path: str, old: _DirState, new: _DirState, batch: _EventBatch) -> None:
+    """按文件名有序归并比较两个目录快照"""
+    on, nn = old.names, new.names
+    i = j = 0
+    while i < len(on) and j < len(nn):
+        a, b = on[i], nn[j]
+        if a == b:
+            if old.changed(i, new, j):
+                batch.add(os.path.join(path, b), "modified", new.file_id(j))
+            i += 1
+            j += 1
+        elif a < b:
+            batch.add(os.path.join(path, a), "deleted", old.file_id(i))
+            i += 1
+        else:
+            batch.add(os.path.join(path, b), "created", new.file_id(j))
+            j += 1
+    for k in range(i, len(on)):
+        batch.add(os.path.join(path, on[k]), "deleted", old.file_id(k))
+    for k in range(j, len(nn)):
+        batch.add(os.path.join(path, nn[k]), "created", new.file_id(k))
+
+
+# 修改时间距扫描开始不足该值的目录视为"不稳定"，下次检查仍重新列出，
+# 避免粗粒度时间戳的文件系统上同一时间片内的后续变化被漏掉
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+class _PollingBackend:
+    """按目录修改时间剪枝的轮询后端
+
+    目录的 mtime 只在其中增删、重命名条目时变化，因此每次检查只需 stat 每个
+    目录，仅对 mtime 变化的目录重新列出并 stat 其中的文件。文件内容原地修改
+    不会改变目录 mtime，由每 verify_every 次检查一次的全量校验发现。
+    文件的修改时间、大小或 inode 任一变化都视为修改。
+    """
+
+    def __init__(
+        self,
+        watch_dir: Path,
+        snapshot: dict[str, int] | None = None,
+        verify_every: int = 30,
+    ):
+        self.root = os.fspath(watch_dir)
+        self.verify_every = verify_every
+        self._dirs: dict[str, _DirState] = {}
+        # 回退时继承的已知状态；为 None 时首次检查只建立基线，与 inotify 后端一致
+        self._initial = snapshot
+        self._started = False
+        self._tick = 0
+
+    def _list_dir(self, path: str, now_ns: int) -> _DirState | None:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            it = os.scandir(path)
+        except OSError:
+            return None
+        rows = []
+        subdirs = []
+        with it:
+            for de in it:
+                try:
+                    if de.is_dir(follow_symlinks=False):
+                        subdirs.append(de.name)
+                    else:
+                        st = de.stat(follow_symlinks=False)
+                        rows.append((de.name, st.st_mtime_ns, st.st_size, st.st_ino))
+                except OSError:
+                    continue
+        if mtime_ns >= now_ns - _RACY_WINDOW_NS:
+            mtime_ns = -1
+        if not rows:
+            return _DirState(mtime_ns, "", _NO_STATS, "\0".join(subdirs))
+        rows.sort()
+        stats = array("q", bytes(8 * _STRIDE * len(rows)))
+        for k, (_, mtime, size, ino) in enumerate(rows):
+            k *= _STRIDE
+            stats[k] = mtime
+            stats[k + 1] = size
+            # 只用于判断是否变化，超出有符号范围的 inode 按补码存放
+            stats[k + 2] = ino if ino < 1 << 63 else ino - (1 << 64)
+        return _DirState(
+            mtime_ns, "\0".join(r[0] for r in rows), stats, "\0".join(subdirs)
+        )
+
+    def _add_tree(self, top: str, batch: _EventBatch | None, now_ns: int) -> None:
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            state = self._list_dir(path, now_ns)
+            if state is None:
+                continue
+            self._dirs[path] = state
+            if batch is not None:
+                for i, name in enumerate(state.names):
+                    batch.add(os.path.join(path, name), "created", state.file_id(i))
+            stack.extend(os.path.join(path, sub) for sub in state.subdir_names)
+
+    def _drop_tree(self, top: str, batch: _EventBatch) -> None:
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            state = self._dirs.pop(path, None)
+            if state is None:
+                continue
+            for i, name in enumerate(state.names):
+                batch.add(os.path.join(path, name), "deleted", state.file_id(i))
+            stack.extend(os.path.join(path, sub) for sub in state.subdir_names)
+
+    def _refresh(self, path: str, old: _DirState, batch: _EventBatch, now_ns: int) -> None:
+        new = self._list_dir(path, now_ns)
+        if new is None:
+            return  # 目录已消失，由父目录的重新列出负责报告
+        _diff_dir(path, old, new, batch)
+        self._dirs[path] = new
+        if old.subdirs == new.subdirs:
+            return
+        old_subdirs, new_subdirs = old.subdir_names, new.subdir_names
+        old_set, new_set = set(old_subdirs), set(new_subdirs)
+        for sub in new_subdirs:
+            if sub not in old_set:
+                self._add_tree(os.path.join(path, sub), batch, now_ns)
+        for sub in old_subdirs:
+            if sub not in new_set:
+                self._drop_tree(os.path.join(path, sub), batch)
+
+    def poll(self) -> _EventBatch:
+        now_ns = time.time_ns()
+        batch = _EventBatch()
+        if not self._started:
+            self._started = True
+            self._add_tree(self.root, None, now_ns)
+            if self._initial is None:
+                return batch
+            current = self.snapshot()
+            for path, mtime in current.items():
+                if path not in self._initial:
+                    batch.add(path, "created")
+                elif self._initial[path] != mtime:
+                    batch.add(path, "modified")
+            for path in self._initial.keys() - current.keys():
+                batch.add(path, "deleted")
+            self._initial = None
+            return batch
+
+        self._tick += 1
+        full = self.verify_every > 0 and self._tick % self.verify_every == 0
+        for path in list(self._dirs):
+            old = self._dirs.get(path)
+            if old is None:
+                continue  # 本轮已随父目录删除
+            if not full:
+                try:
+                    if os.stat(path).st_mtime_ns == old.mtime_ns:
+                        continue
+                except OSError:
+                    continue
+            self._refresh(path, old, batch, now_ns)
+        return batch
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            os.path.join(d, name): state.mtime(i)
+            for d, state in self._dirs.items()
+            for i, name in enumerate(state.names)
+        }
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyBackend:
+    """基于 inotify 的事件后端
+
+    为每个目录添加监视，新目录出现时递归补充监视并补报其中已有的文件；
+    事件队列溢出时重新扫描整棵树并与已知状态对比，保证不漏报。
+    """
+
+    MASK = (
+        inotify.IN_MODIFY | inotify.IN_ATTRIB | inotify.IN_CLOSE_WRITE
+        | inotify.IN_CREATE | inotify.IN_DELETE | inotify.IN_MOVED_FROM
+        | inotify.IN_MOVED_TO | inotify.IN_ONLYDIR | inotify.IN_DONT_FOLLOW
+        | inotify.IN_EXCL_UNLINK
+    )
+
+    def __init__(self, watch_dir: Path):
+        self.root = os.fspath(watch_dir)
+        self._ino = inotify.Inotify()
+        self._wd_path: dict[int, str] = {}
+        self._path_wd: dict[str, int] = {}
+        # 目录 -> {文件名: (inode, 修改时间 ns)}
+        self._files: dict[str, dict[str, FileId]] = {}
+        self._started = False
+
+    def _watch(self, path: str) -> bool:
+        try:
+            wd = self._ino.add_watch(path, self.MASK)
+        except OSError as e:
+            if e.errno in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return False
+            raise  # ENOSPC 等：监视数量耗尽，交由上层回退到轮询
+        self._wd_path[wd] = path
+        self._path_wd[path] = wd
+        self._files.setdefault(path, {})
+        return True
+
+    def _add_tree(self, top: str, batch: _EventBatch | None) -> None:
+        """先加监视再列目录，避免遗漏监视建立前后出现的文件"""
+        if not self._watch(top):
+            return
+        for entry in iter_tree(top):
+            if entry.is_dir:
+                self._watch(entry.path)
+                continue
+            st = entry.stat
+            self._record(entry.parent, entry.name, (st.st_ino, st.st_mtime_ns), batch)
+
+    def _record(
+        self, dir_path: str, name: str, file_id: FileId, batch: _EventBatch | None
+    ) -> None:
+        files = self._files.setdefault(dir_path, {})
+        old = files.get(name)
+        files[name] = file_id
+        if batch is None:
+            return
+        if old is None:
+            batch.add(os.path.join(dir_path, name), "created", file_id)
+        elif old != file_id:
+            batch.add(os.path.join(dir_path, name), "modified", file_id)
+
+    def _drop_tree(self, top: str, batch: _EventBatch | None) -> None:
+        prefix = top + os.sep
+        for d in [d for d in self._files if d == top or d.startswith(prefix)]:
+            for name, file_id in self._files.pop(d).items():
+                if batch is not None:
+                    batch.add(os.path.join(d, name), "deleted", file_id)
+            wd = self._path_wd.pop(d, None)
+            if wd is not None:
+                self._wd_path.pop(wd, None)
+                self._ino.rm_watch(wd)
+
+    def _resync(self, batch: _EventBatch) -> None:
+        """队列溢出后的恢复：重新扫描并对比"""
+        old = self._files
+        self._files = {}
+        self._add_tree(self.root, None)
+        for d, names in self._files.items():
+            old_names = old.get(d, {})
+            for name, file_id in names.items():
+                if name not in old_names:
+                    batch.add(os.path.join(d, name), "created", file_id)
+                elif old_names[name] != file_id:
+                    batch.add(os.path.join(d, name), "modified", file_id)
+        for d, names in old.items():
+            new_names = self._files.get(d, {})
+            for name, file_id in names.items():
+                if name not in new_names:
+                    batch.add(os.path.join(d, name), "deleted", file_id)
+        for d in [d for d in self._path_wd if d not in self._files]:
+            self._wd_path.pop(self._path_wd.pop(d), None)
+
+    def poll(self) -> _EventBatch:
+        if not self._started:
+            self._started = True
+            self._add_tree(self.root, None)
+            return _EventBatch()
+
+        batch = _EventBatch()
+        overflow = False
+        for wd, mask, _cookie, name in self._ino.read_events():
+            if mask & inotify.IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            dir_path = self._wd_path.get(wd)
+            if dir_path is None or not name:
+                if mask & inotify.IN_IGNORED and dir_path is not None:
+                    self._path_wd.pop(self._wd_path.pop(wd), None)
+                continue
+            path = os.path.join(dir_path, name)
+            if mask & inotify.IN_ISDIR:
+                if mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                    self._add_tree(path, batch)
+                elif mask & (inotify.IN_DELETE | inotify.IN_MOVED_FROM):
+                    self._drop_tree(path, batch)
+                continue
+            if mask & (inotify.IN_DELETE | inotify.IN_MOVED_FROM):
+                file_id = self._files.get(dir_path, {}).pop(name, None)
+                if file_id is not None:
+                    batch.add(path, "deleted", file_id)
+                continue
+            try:
+                st = os.stat(path, follow_symlinks=False)
+            except OSError:
+                continue
+            self._record(dir_path, name, (st.st_ino, st.st_mtime_ns), batch)
+        if overflow:
+            self._resync(batch)
+        return batch
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            os.path.join(d, name): mtime
+            for d, names in self._files.items()
+            for name, (_ino, mtime) in names.items()
+        }
+
+    def close(self) -> None:
+        self._ino.close()
 
 
 class SimpleFileWatcher:
-    """简单的轮询式文件监控（跨平台兼容）"""
+    """跨平台文件监控：Linux 上使用 inotify，其他平台轮询
+
+    后端产生的原始事件先经过合并阶段：同一路径的连续事件在 debounce 秒内
+    合并为一个，同一文件的删除+新建配对为 moved，再整批交给回调。
+    """
 
     def __init__(
         self,
         watch_dir: Path,
-        callback: Callable[[FileEvent], None],
+        callback: Callable[[FileEvent], None] | None = None,
         interval: float = 2.0,
+        backend: str = "auto",
+        verify_every: int = 30,
+        debounce: float = 0.0,
+        batch_callback: Callable[[list[FileEvent]], None] | None = None,
+        max_wait: float | None = None,
     ):
+        """
+        Args:
+            watch_dir: 监控目录
+            callback: 逐个事件的回调
+            interval: 轮询间隔(秒)
+            backend: "auto" / "inotify" / "polling"
+            verify_every: 轮询模式下每隔多少次检查做一次全量校验，0 表示从不
+            debounce: 路径静默多少秒后才交付其事件，0 表示每次检查都交付
+            batch_callback: 整批事件的回调，设置后不再逐个调用 callback
+            max_wait: 持续变化的路径最多推迟多少秒交付，默认 5 倍 debounce
+        """
         self.watch_dir = watch_dir
         self.callback = callback
+        self.batch_callback = batch_callback
         self.interval = interval
-        self._snapshot: dict[str, float] = {}
+        self.verify_every = verify_every
         self._running = False
+        self._coalescer = _EventCoalescer(debounce, max_wait)
+        self._backend: _PollingBackend | _InotifyBackend
+        if backend == "inotify" or (backend == "auto" and inotify.is_available()):
+            try:
+                self._backend = _InotifyBackend(watch_dir)
+            except OSError:
+                if backend == "inotify":
+                    raise
+                self._backend = _PollingBackend(watch_dir, verify_every=verify_every)
+        else:
+            self._backend = _PollingBackend(watch_dir, verify_every=verify_every)
 
-    def _take_snapshot(self) -> dict[str, float]:
-        snap = {}
-        for root, _, files in os.walk(self.watch_dir, onerror=lambda e: None):
-            for f in files:
-                full = os.path.join(root, f)
-                try:
-                    snap[full] = os.path.getmtime(full)
-                except OSError:
-                    continue
-        return snap
+    @property
+    def backend_name(self) -> str:
+        return "inotify" if isinstance(self._backend, _InotifyBackend) else "polling"
 
-    def check_once(self) -> list[FileEvent]:
-        new_snap = self._take_snapshot()
-        events = []
-        for path, mtime in new_snap.items():
-            if path not in self._snapshot:
-                events.append(FileEvent(path, "created"))
-            elif self._snapshot[path] != mtime:
-                events.append(FileEvent(path, "modified"))
-        for path in self._snapshot:
-            if path not in new_snap:
-                events.append(FileEvent(path, "deleted"))
-        self._snapshot = new_snap
+    @property
+    def pending(self) -> int:
+        """仍在合并窗口内、尚未交付的路径数"""
+        return len(self._coalescer)
+
+    def _poll_backend(self) -> _EventBatch:
+        try:
+            return self._backend.poll()
+        except OSError:
+            if not isinstance(self._backend, _InotifyBackend):
+                raise
+            # inotify 监视数量耗尽等情况：保留已知状态，切换到轮询继续工作
+            snapshot = self._backend.snapshot()
+            self._backend.close()
+            self._backend = _PollingBackend(self.watch_dir, snapshot, self.verify_every)
+            return self._backend.poll()
+
+    def _deliver(self, events: list[FileEvent]) -> list[FileEvent]:
+        if events:
+            if self.batch_callback is not None:
+                self.batch_callback(events)
+            elif self.callback is not None:
+                for event in events:
+                    self.callback(event)
         return events
+
+    def check_once(self) -> list[FileEvent]:
+        """检查一次，返回（并交给回调）本次到期的事件"""
+        now = time.monotonic()
+        self._coalescer.push(self._poll_backend(), now)
+        return self._deliver(self._coalescer.pop_ready(now))
+
+    def flush(self) -> list[FileEvent]:
+        """立即交付所有仍在合并窗口内的事件"""
+        return self._deliver(self._coalescer.pop_ready(time.monotonic(), flush=True))
+
+    def close(self) -> None:
+        self._backend.close()
+
+    def __del__(self):
+        backend = getattr(self, "_backend", None)
+        if backend is not None:
+            backend.close()
@@ -0,0 +1,153 @@
+"""文件内容哈希持久化缓存
+
+以 (st_dev, st_ino) 定位条目，并用 size 与 mtime_ns 校验是否过期；
+过期条目在读取时自动淘汰。数据保存在 data/files/hash_cache.sqlite3。
+"""
+import os
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+
+from multi_system.core.data_manager import DataManager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    partial TEXT,
+    full TEXT,
+    chunks BLOB,
+    PRIMARY KEY (dev, ino)
+)
+"""
+
+
+@dataclass
+class CacheEntry:
+    path: str
+    partial: str | None
+    full: str | None
+
+
+class HashCache:
+    def __init__(self, db_path: Path | None = None, data_manager: DataManager | None = None):
+        if db_path is None:
+            db_path = (data_manager or DataManager()).get_data_dir("files") / "hash_cache.sqlite3"
+        self.db_path = db_path
+        self._conn = sqlite3.connect(str(db_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(hashes)")}
+        if "chunks" not in columns:
+            # 旧版本建立的缓存库
+            self._conn.execute("ALTER TABLE hashes ADD COLUMN chunks BLOB")
+        self._conn.commit()
+
+    def __enter__(self) -> "HashCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, st: os.stat_result) -> CacheEntry | None:
+        """查询缓存，文件大小或修改时间变化时删除旧条目并返回 None"""
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, path, partial, full FROM hashes WHERE dev=? AND ino=?",
+            (st.st_dev, st.st_ino),
+        ).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, path, partial, full = row
+        if size != st.st_size or mtime_ns != st.st_mtime_ns:
+            self._conn.execute(
+                "DELETE FROM hashes WHERE dev=? AND ino=?", (st.st_dev, st.st_ino)
+            )
+            return None
+        return CacheEntry(path, partial, full)
+
+    def put(
+        self,
+        path: str,
+        st: os.stat_result,
+        partial: str | None = None,
+        full: str | None = None,
+    ) -> None:
+        """写入摘要，未提供的摘要保留已有值（仅当文件未变化时）"""
+        self._conn.execute(
+            """
+            INSERT INTO hashes (dev, ino, size, mtime_ns, path, partial, full)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (dev, ino) DO UPDATE SET
+                path = excluded.path,
+                partial = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                    THEN COALESCE(excluded.partial, partial) ELSE excluded.partial END,
+                full = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                    THEN COALESCE(excluded.full, full) ELSE excluded.full END,
+                chunks = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                    THEN chunks ELSE NULL END,
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns
+            """,
+            (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, path, partial, full),
+        )
+
+    def get_chunks(self, st: os.stat_result) -> bytes | None:
+        """读取分块指纹（similar_files 的序列化格式），文件变化时返回 None"""
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, chunks FROM hashes WHERE dev=? AND ino=?",
+            (st.st_dev, st.st_ino),
+        ).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+            return None
+        return row[2]
+
+    def put_chunks(self, path: str, st: os.stat_result, chunks: bytes) -> None:
+        """写入分块指纹，文件变化时同时清除旧的摘要"""
+        self._conn.execute(
+            """
+            INSERT INTO hashes (dev, ino, size, mtime_ns, path, chunks)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (dev, ino) DO UPDATE SET
+                path = excluded.path,
+                partial = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                    THEN partial ELSE NULL END,
+                full = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns
+                    THEN full ELSE NULL END,
+                chunks = excluded.chunks,
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns
+            """,
+            (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, path, chunks),
+        )
+
+    def prune(self) -> int:
+        """删除路径已不存在或已指向其他文件的条目，返回删除数量"""
+        stale = []
+        for dev, ino, path in self._conn.execute("SELECT dev, ino, path FROM hashes"):
+            try:
+                st = os.stat(path, follow_symlinks=False)
+                if st.st_dev != dev or st.st_ino != ino:
+                    stale.append((dev, ino))
+            except OSError:
+                stale.append((dev, ino))
+        self._conn.executemany("DELETE FROM hashes WHERE dev=? AND ino=?", stale)
+        self._conn.commit()
+        return len(stale)
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM hashes")
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
@@ -0,0 +1,144 @@
+"""并行文件哈希引擎
+
+hashlib 在处理大块数据时会释放 GIL，因此默认使用线程池即可让多核与 NVMe
+磁盘同时忙碌；需要时也可切换为进程池。提交任务时限制在途数量以形成背压，
+并支持进度回调与取消。
+"""
+import hashlib
+import os
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any
+
+# 部分指纹读取的头/尾块大小
+PARTIAL_BLOCK_SIZE = 64 * 1024
+# 完整哈希时每次读取的块大小，决定单个任务的内存占用上限
+CHUNK_SIZE = 1024 * 1024
+
+
+def partial_hash(path: str, size: int) -> str:
+    """读取文件头尾各一块计算指纹，小文件会被完整覆盖"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(PARTIAL_BLOCK_SIZE))
+        if size > PARTIAL_BLOCK_SIZE:
+            f.seek(max(PARTIAL_BLOCK_SIZE, size - PARTIAL_BLOCK_SIZE))
+            h.update(f.read(PARTIAL_BLOCK_SIZE))
+    return h.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    """按固定大小分块流式计算完整哈希"""
+    h = hashlib.blake2b()
+    buf = bytearray(CHUNK_SIZE)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while n := f.readinto(buf):
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def covered_by_partial(size: int) -> bool:
+    """部分指纹已读完整个文件时无需再算完整哈希"""
+    return size <= 2 * PARTIAL_BLOCK_SIZE
+
+
+def default_workers() -> int:
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+class HashEngine:
+    """有界工作池，按完成顺序产出 (参数, 结果)，读取失败的结果为 None"""
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        use_processes: bool = False,
+        max_pending: int | None = None,
+        progress: Callable[[int, int], None] | None = None,
+    ):
+        self.workers = max(1, workers or default_workers())
+        self.use_processes = use_processes
+        self.max_pending = max_pending or self.workers * 2
+        self.progress = progress
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def _executor(self) -> Executor:
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="hasher"
+        )
+
+    def map(
+        self, func: Callable[..., str], tasks: Sequence[tuple[Any, ...]]
+    ) -> Iterator[tuple[tuple[Any, ...], str | None]]:
+        """对每个参数元组调用 func(*args)"""
+        total = len(tasks)
+        if total == 0:
+            return
+        if self.workers == 1:
+            yield from self._map_serial(func, tasks)
+            return
+
+        done_count = 0
+        it = iter(tasks)
+        pending: dict[Future, tuple[Any, ...]] = {}
+        executor = self._executor()
+        try:
+            while True:
+                # 背压：在途任务数不超过 max_pending
+                while not self.cancelled and len(pending) < self.max_pending:
+                    args = next(it, None)
+                    if args is None:
+                        break
+                    pending[executor.submit(func, *args)] = args
+                if not pending:
+                    break
+                finished, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    args = pending.pop(fut)
+                    try:
+                        result = fut.result()
+                    except (OSError, PermissionError):
+                        result = None
+                    done_count += 1
+                    if self.progress:
+                        self.progress(done_count, total)
+                    yield args, result
+                if self.cancelled:
+                    for fut in pending:
+                        fut.cancel()
+                    break
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _map_serial(
+        self, func: Callable[..., str], tasks: Sequence[tuple[Any, ...]]
+    ) -> Iterator[tuple[tuple[Any, ...], str | None]]:
+        total = len(tasks)
+        for i, args in enumerate(tasks, 1):
+            if self.cancelled:
+                return
+            try:
+                result = func(*args)
+            except (OSError, PermissionError):
+                result = None
+            if self.progress:
+                self.progress(i, total)
+            yield args, result
@@ -1,97 +1,174 @@
 import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+
+@dataclass
+class CleanupItem:
+    path: str
+    is_dir: bool
+    error: str | None = None  # 删除失败的原因；dry_run 时总为 None
+
+    @property
+    def removed(self) -> bool:
+        return self.error is None
+
+
+def _remove(path: str, is_dir: bool, dry_run: bool) -> CleanupItem:
+    if dry_run:
+        return CleanupItem(path, is_dir)
+    try:
+        if is_dir:
+            os.rmdir(path)
+        else:
+            os.remove(path)
+    except OSError as e:
+        return CleanupItem(path, is_dir, str(e))
+    return CleanupItem(path, is_dir)
+
+
+def iter_cleanup(
+    dir_path: str,
+    files: bool = True,
+    dirs: bool = True,
+    dry_run: bool = False,
+) -> Iterator[CleanupItem]:
+    """
+    一次自底向上遍历删除空文件与空目录，逐项产出结果
 
+    每个目录只读取一次并记录剩余子项数，子项被删除时计数减一，
+    目录处理完时计数为 0 即可直接删除，无需再次列出或重复遍历。
+    符号链接不跟随，也不删除。
 
-def remove_empty_files(dir_path: str) -> list[str]:
+    Args:
+        dir_path: 要处理的目录路径（自身不会被删除）
+        files: 是否删除大小为 0 的普通文件
+        dirs: 是否删除空目录（包括删除文件后产生的新空目录）
+        dry_run: 只报告将被删除的项目，不实际删除
+    """
+    root = os.fspath(dir_path)
+    # 栈帧: [路径, 待处理的子目录, 剩余子项数]
+    stack: list[list] = []
+
+    def enter(path: str) -> Iterator[CleanupItem]:
+        subdirs = []
+        remaining = 0
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    remaining += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                            continue
+                        if not files or not entry.is_file(follow_symlinks=False):
+                            continue
+                        if entry.stat(follow_symlinks=False).st_size != 0:
+                            continue
+                    except OSError:
+                        continue
+                    item = _remove(entry.path, False, dry_run)
+                    if item.removed:
+                        remaining -= 1
+                    yield item
+        except OSError:
+            remaining = -1  # 无法读取的目录视为非空
+        subdirs.reverse()
+        stack.append([path, subdirs, remaining])
+
+    yield from enter(root)
+    while stack:
+        frame = stack[-1]
+        if frame[1]:
+            yield from enter(frame[1].pop())
+            continue
+        stack.pop()
+        if not stack or not dirs or frame[2] != 0:
+            continue
+        item = _remove(frame[0], True, dry_run)
+        if item.removed:
+            stack[-1][2] -= 1
+        yield item
+
+
+def remove_empty_files(dir_path: str, dry_run: bool = False) -> list[str]:
     """
     删除指定目录下所有大小为0的空文件
 
     Args:
         dir_path: 要处理的目录路径
+        dry_run: 只列出，不删除
 
     Returns:
-        删除的空文件列表
+        删除的空文件列表，目录不存在时为空
     """
-    removed_files = []
-
-    # 遍历目录
-    for root, _, files in os.walk(dir_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            # 检查文件是否存在并且大小为0
-            if os.path.isfile(file_path) and os.path.getsize(file_path) == 0:
-                try:
-                    os.remove(file_path)
-                    removed_files.append(file_path)
-                except OSError as e:
-                    print(f"无法删除空文件 {file_path}: {e}")
+    deleted_files, _ = _collect(iter_cleanup(dir_path, dirs=False, dry_run=dry_run))
+    return deleted_files
 
-    return removed_files
 
-
-def remove_empty_dirs(dir_path: str) -> list[str]:
+def remove_empty_dirs(dir_path: str, dry_run: bool = False) -> list[str]:
     """
-    递归删除指定目录下所有空目录，包括删除文件后产生的新空目录
+    递归删除指定目录下所有空目录，包括删除子目录后产生的新空目录
 
     Args:
         dir_path: 要处理的目录路径
+        dry_run: 只列出，不删除
 
     Returns:
-        删除的空目录列表
+        删除的空目录列表，目录不存在时为空
     """
-    removed_dirs = []
-
-    # 持续扫描目录树，直到没有新的空目录被发现
-    while True:
-        found_empty = False
-
-        # 使用自底向上的方式遍历目录树
-        for root, _dirs, files in os.walk(dir_path, topdown=False):
-            # 跳过根目录
-            if root == dir_path:
-                continue
-
-            # 检查当前目录是否为空目录
-            if not files and not os.listdir(root):  # 确认目录真的是空的
-                try:
-                    os.rmdir(
-                        root
-                    )  # 使用os.rmdir代替shutil.rmtree，因为我们已确认目录为空
-                    removed_dirs.append(root)
-                    found_empty = True
-                except OSError as e:
-                    print(f"无法删除空目录 {root}: {e}")
-
-        # 如果这次扫描没有发现新的空目录，说明已完成清理
-        if not found_empty:
-            break
-
-    return removed_dirs
+    _, deleted_dirs = _collect(iter_cleanup(dir_path, files=False, dry_run=dry_run))
+    return deleted_dirs
+
+
+def _collect(items: Iterator[CleanupItem]) -> tuple[list[str], list[str]]:
+    deleted_files = []
+    deleted_dirs = []
+    for item in items:
+        if not item.removed:
+            kind = "空目录" if item.is_dir else "空文件"
+            print(f"无法删除{kind} {item.path}: {item.error}")
+        elif item.is_dir:
+            deleted_dirs.append(item.path)
+        else:
+            deleted_files.append(item.path)
+    return deleted_files, deleted_dirs
 
 
-def cleanup_directory(dir_path: str) -> tuple:
+def cleanup_directory(
+    dir_path: str, files: bool = True, dirs: bool = True, dry_run: bool = False
+) -> tuple:
     """
-    清理目录：先删除空文件，再删除空目录
+    清理目录：一次遍历删除空文件及由此产生的空目录
 
     Args:
         dir_path: 要清理的目录路径
+        files: 是否删除空文件
+        dirs: 是否删除空目录
+        dry_run: 只列出，不删除
 
     Returns:
         (deleted_files, deleted_dirs): 删除的文件和目录列表
     """
     if not os.path.exists(dir_path):
         raise FileNotFoundError(f"目录不存在: {dir_path}")
-
-    # 先删除空文件
-    deleted_files = remove_empty_files(dir_path)
-
-    # 然后删除空目录
-    deleted_dirs = remove_empty_dirs(dir_path)
-
-    return deleted_files, deleted_dirs
+    return _collect(iter_cleanup(dir_path, files, dirs, dry_run))
 
 
 if __name__ == "__main__":
-    dir_path = r""
-    deleted_files, deleted_dirs = cleanup_directory(dir_path)
-    print(f"已删除 {len(deleted_files)} 个空文件")
-    print(f"已删除 {len(deleted_dirs)} 个空目录")
+    import sys
+
+    dir_path = sys.argv[1] if len(sys.argv) > 1 else r""
+    dry_run = "--dry-run" in sys.argv
+    file_count = dir_count = 0
+    for item in iter_cleanup(dir_path, dry_run=dry_run):
+        if not item.removed:
+            print(f"失败 {item.path}: {item.error}")
+            continue
+        print(f"{'[预览] ' if dry_run else ''}{'目录' if item.is_dir else '文件'} {item.path}")
+        if item.is_dir:
+            dir_count += 1
+        else:
+            file_count += 1
+    print(f"已删除 {file_count} 个空文件")
+    print(f"已删除 {dir_count} 个空目录")
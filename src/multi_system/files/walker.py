@@ -0,0 +1,305 @@
+"""基于 os.scandir 的统一目录遍历引擎
+
+每个条目只做一次 stat（Windows 上 scandir 已自带，无需额外系统调用），
+结果以 ScanEntry 的形式流式产出。多个 ScanVisitor 可以共享同一次遍历，
+例如一次扫描同时收集大文件、重复文件候选与权限审计结果。
+
+符号链接默认不跟随：以链接自身的 lstat 结果产出，is_symlink 为 True，
+由各扫描器自行决定是否忽略。
+
+walk_tree / scan_tree 默认按 Exclusions() 跳过伪文件系统挂载点；
+被排除规则拒绝的条目既不产出也不进入。
+"""
+import os
+import queue
+import stat
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from .exclusions import Exclusions
+
+
+@dataclass
+class ScanEntry:
+    path: str
+    name: str
+    parent: str
+    is_dir: bool
+    is_symlink: bool
+    stat: os.stat_result
+
+    @property
+    def is_file(self) -> bool:
+        return stat.S_ISREG(self.stat.st_mode)
+
+    @property
+    def size(self) -> int:
+        return self.stat.st_size
+
+
+class ScanVisitor:
+    """遍历访问者基类，子类按需覆盖"""
+
+    #: 置为 True 后不再接收条目；所有访问者都完成时遍历提前结束
+    done: bool = False
+
+    def on_dir(self, entry: ScanEntry) -> bool | None:
+        """返回 False 时不进入该目录"""
+        return None
+
+    def on_file(self, entry: ScanEntry) -> None:
+        """非目录条目（普通文件、符号链接、设备文件等）"""
+
+
+def _make_entry(
+    de: os.DirEntry, parent: str, follow_symlinks: bool
+) -> ScanEntry | None:
+    try:
+        is_symlink = de.is_symlink()
+        st = de.stat(follow_symlinks=follow_symlinks)
+    except OSError:
+        return None
+    return ScanEntry(de.path, de.name, parent, stat.S_ISDIR(st.st_mode), is_symlink, st)
+
+
+def _should_descend(
+    entry: ScanEntry,
+    dir_filter: Callable[[ScanEntry], bool] | None,
+    visited: set[tuple[int, int]] | None,
+) -> bool:
+    if not entry.is_dir or (dir_filter is not None and not dir_filter(entry)):
+        return False
+    if visited is not None:
+        key = (entry.stat.st_dev, entry.stat.st_ino)
+        if key in visited:
+            return False
+        visited.add(key)
+    return True
+
+
+def _root_visited(root: str, follow_symlinks: bool) -> set[tuple[int, int]]:
+    visited: set[tuple[int, int]] = set()
+    if follow_symlinks:
+        try:
+            st = os.stat(root)
+            visited.add((st.st_dev, st.st_ino))
+        except OSError:
+            pass
+    return visited
+
+
+def iter_tree(
+    root: str | Path,
+    follow_symlinks: bool = False,
+    onerror: Callable[[OSError], None] | None = None,
+    dir_filter: Callable[[ScanEntry], bool] | None = None,
+    exclude: Exclusions | None = None,
+) -> Iterator[ScanEntry]:
+    """
+    深度优先遍历 root 下所有条目（不含 root 本身）
+
+    Args:
+        root: 遍历根目录
+        follow_symlinks: 是否跟随符号链接（进入链接目录时按 inode 防环）
+        onerror: 目录无法读取时的回调，默认忽略，与 os.walk 一致
+        dir_filter: 返回 False 的目录不会被进入，但仍会被产出
+        exclude: 排除规则，被排除的条目不产出，目录也不进入
+    """
+    root = os.fspath(root)
+    matcher = exclude.bind(root) if exclude is not None else None
+    stack = [root]
+    visited = _root_visited(root, follow_symlinks)
+
+    while stack:
+        top = stack.pop()
+        subdirs = []
+        try:
+            it = os.scandir(top)
+        except OSError as e:
+            if onerror is not None:
+                onerror(e)
+            continue
+        with it:
+            for de in it:
+                entry = _make_entry(de, top, follow_symlinks)
+                if entry is None or (matcher is not None and not matcher.accepts(entry)):
+                    continue
+                yield entry
+                if _should_descend(entry, dir_filter, visited if follow_symlinks else None):
+                    subdirs.append(entry.path)
+        stack.extend(reversed(subdirs))
+
+
+class _WalkPool:
+    """并行读取目录的工作线程池
+
+    每个线程拥有自己的双端队列，从队尾取任务；自己的队列为空时从其他线程的
+    队首窃取。目录列表以整批结果交回消费者，由消费者决定进入哪些子目录。
+    """
+
+    def __init__(self, workers: int, follow_symlinks: bool):
+        self.follow_symlinks = follow_symlinks
+        self.results: queue.Queue = queue.Queue(maxsize=workers * 4)
+        self._deques = [deque() for _ in range(workers)]
+        self._available = threading.Semaphore(0)
+        self._stop = threading.Event()
+        self._next = 0
+        self._threads = [
+            threading.Thread(target=self._run, args=(i,), daemon=True, name=f"walker-{i}")
+            for i in range(workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, path: str) -> None:
+        self._deques[self._next].append(path)
+        self._next = (self._next + 1) % len(self._deques)
+        self._available.release()
+
+    def _take(self, index: int) -> str | None:
+        try:
+            return self._deques[index].pop()
+        except IndexError:
+            pass
+        n = len(self._deques)
+        for offset in range(1, n):
+            try:
+                return self._deques[(index + offset) % n].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _run(self, index: int) -> None:
+        while True:
+            self._available.acquire()
+            if self._stop.is_set():
+                return
+            # 每次 acquire 对应一个已提交的任务，但可能被其他线程窃取，需要重试
+            top = None
+            while top is None and not self._stop.is_set():
+                top = self._take(index)
+            if top is None:
+                return
+            try:
+                with os.scandir(top) as it:
+                    entries = [
+                        e
+                        for de in it
+                        if (e := _make_entry(de, top, self.follow_symlinks)) is not None
+                    ]
+                result = (top, entries, None)
+            except Exception as e:
+                # 非 OSError 的异常也交回消费者重新抛出，否则消费者会一直等待这个结果
+                result = (top, [], e)
+            while not self._stop.is_set():
+                try:
+                    self.results.put(result, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        for _ in self._threads:
+            self._available.release()
+
+
+def iter_tree_parallel(
+    root: str | Path,
+    workers: int = 8,
+    follow_symlinks: bool = False,
+    onerror: Callable[[OSError], None] | None = None,
+    dir_filter: Callable[[ScanEntry], bool] | None = None,
+    exclude: Exclusions | None = None,
+) -> Iterator[ScanEntry]:
+    """
+    多线程遍历，参数与 iter_tree 相同
+
+    适合 NFS/SMB 或冷启动的机械硬盘等高延迟文件系统：多个目录的 readdir/stat
+    同时进行。条目产出顺序不固定，但目录总是先于其内容产出。
+    """
+    root = os.fspath(root)
+    matcher = exclude.bind(root) if exclude is not None else None
+    visited = _root_visited(root, follow_symlinks)
+    pool = _WalkPool(max(1, workers), follow_symlinks)
+    pool.submit(root)
+    pending = 1
+    try:
+        while pending:
+            _top, entries, error = pool.results.get()
+            pending -= 1
+            if error is not None:
+                if not isinstance(error, OSError):
+                    raise error
+                if onerror is not None:
+                    onerror(error)
+                continue
+            for entry in entries:
+                if matcher is not None and not matcher.accepts(entry):
+                    continue
+                yield entry
+                if _should_descend(entry, dir_filter, visited if follow_symlinks else None):
+                    pool.submit(entry.path)
+                    pending += 1
+    finally:
+        pool.shutdown()
+
+
+def walk_tree(
+    root: str | Path,
+    visitors: Iterable[ScanVisitor],
+    follow_symlinks: bool = False,
+    onerror: Callable[[OSError], None] | None = None,
+    workers: int | None = None,
+    exclude: Exclusions | None = None,
+) -> Iterator[ScanEntry]:
+    """一次遍历驱动多个访问者，每个条目分发后再产出，便于调用方汇报进度
+
+    workers 大于 1 时使用 iter_tree_parallel，访问者仍只在调用线程中执行。
+    exclude 为 None 时使用 Exclusions() 默认规则（跳过伪文件系统）。
+    """
+    visitors = list(visitors)
+    if exclude is None:
+        exclude = Exclusions()
+    pruned: ScanEntry | None = None
+
+    def dir_filter(entry: ScanEntry) -> bool:
+        return entry is not pruned
+
+    if workers is not None and workers > 1:
+        entries = iter_tree_parallel(
+            root, workers, follow_symlinks, onerror, dir_filter, exclude
+        )
+    else:
+        entries = iter_tree(root, follow_symlinks, onerror, dir_filter, exclude)
+    for entry in entries:
+        active = [v for v in visitors if not v.done]
+        if not active:
+            return
+        if entry.is_dir:
+            # 只有全部访问者都拒绝时才剪枝，避免一个访问者影响其他分析
+            results = [v.on_dir(entry) for v in active]
+            if all(r is False for r in results):
+                pruned = entry
+        else:
+            for v in active:
+                v.on_file(entry)
+        yield entry
+
+
+def scan_tree(
+    root: str | Path,
+    visitors: Iterable[ScanVisitor],
+    follow_symlinks: bool = False,
+    onerror: Callable[[OSError], None] | None = None,
+    workers: int | None = None,
+    exclude: Exclusions | None = None,
+) -> int:
+    """一次遍历驱动多个访问者，返回访问的条目数，参数见 walk_tree"""
+    count = 0
+    for _ in walk_tree(root, visitors, follow_symlinks, onerror, workers, exclude):
+        count += 1
+    return count
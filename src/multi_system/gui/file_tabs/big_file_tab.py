@@ -24,7 +24,7 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from multi_system.files.big_files import find_big_files
+from multi_system.files.big_files import iter_big_files
 
 
 def _fmt_size(b: int | float) -> str:
@@ -100,14 +100,23 @@ class BigFileTab(QWidget):
         self._scan_btn.setEnabled(False)
         self._status_label.setText("扫描中...")
 
+        files = []
         try:
-            files = find_big_files(path, min_size_mb=min_size)
+            # 扫描过程中周期性刷新当前结果，并处理界面事件保持响应
+            for files in iter_big_files(path, min_size_mb=min_size):
+                self._show_files(files)
+                self._status_label.setText(f"扫描中... 已找到 {len(files)} 个")
+                QApplication.processEvents()
         except Exception as e:
             QMessageBox.warning(self, "错误", f"扫描失败: {e}")
             self._scan_btn.setEnabled(True)
             self._status_label.setText("")
             return
 
+        self._status_label.setText(f"找到 {len(files)} 个大文件 (>= {min_size}MB)")
+        self._scan_btn.setEnabled(True)
+
+    def _show_files(self, files):
         self._table.setRowCount(0)
         for f in files:
             row = self._table.rowCount()
@@ -115,9 +124,6 @@ class BigFileTab(QWidget):
             self._table.setItem(row, 0, QTableWidgetItem(f.path))
             self._table.setItem(row, 1, QTableWidgetItem(_fmt_size(f.size)))
 
-        self._status_label.setText(f"找到 {len(files)} 个大文件 (>= {min_size}MB)")
-        self._scan_btn.setEnabled(True)
-
     def _show_context_menu(self, pos):
         row = self._table.rowAt(pos.y())
         if row < 0:
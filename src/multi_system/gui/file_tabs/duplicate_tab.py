@@ -11,6 +11,7 @@ from pathlib import Path
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QApplication,
+    QCheckBox,
     QHBoxLayout,
     QLabel,
     QLineEdit,
@@ -25,7 +26,10 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from multi_system.files.duplicate_files import find_duplicates
+from multi_system.files.dedup import dedup_group
+from multi_system.files.duplicate_files import DuplicateGroup, scan_duplicates
+from multi_system.files.exclusions import COMMON_PATTERNS, Exclusions
+from multi_system.files.hash_cache import HashCache
 
 
 def _fmt_size(b: int | float) -> str:
@@ -40,6 +44,8 @@ class DuplicateTab(QWidget):
     def __init__(self):
         super().__init__()
         self._loaded = False
+        self._cache: HashCache | None = None
+        self._groups: list[DuplicateGroup] = []
         self._init_ui()
 
     def _init_ui(self):
@@ -62,6 +68,16 @@ class DuplicateTab(QWidget):
         top.addWidget(self._scan_btn)
         layout.addLayout(top)
 
+        # --- Exclusions ---
+        ex_row = QHBoxLayout()
+        ex_row.addWidget(QLabel("排除:"))
+        self._exclude_edit = QLineEdit(" ".join(COMMON_PATTERNS))
+        self._exclude_edit.setPlaceholderText("gitignore 风格模式，空格分隔，如 *.tmp build/ !keep/")
+        ex_row.addWidget(self._exclude_edit)
+        self._one_fs_check = QCheckBox("不跨文件系统")
+        ex_row.addWidget(self._one_fs_check)
+        layout.addLayout(ex_row)
+
         # --- Toolbar ---
         toolbar = QToolBar()
         toolbar.setMovable(False)
@@ -103,13 +119,23 @@ class DuplicateTab(QWidget):
         self._status_label.setText("扫描中...")
 
         try:
-            groups = find_duplicates(path, min_size=min_size)
+            if self._cache is None:
+                self._cache = HashCache()
+            exclude = Exclusions(
+                patterns=self._exclude_edit.text().split(),
+                one_filesystem=self._one_fs_check.isChecked(),
+            )
+            report = scan_duplicates(
+                path, min_size=min_size, cache=self._cache, exclude=exclude
+            )
         except Exception as e:
             QMessageBox.warning(self, "错误", f"扫描失败: {e}")
             self._scan_btn.setEnabled(True)
             self._status_label.setText("")
             return
 
+        groups = report.groups
+        self._groups = groups
         self._table.setRowCount(0)
         for g in groups:
             row = self._table.rowCount()
@@ -120,9 +146,10 @@ class DuplicateTab(QWidget):
             self._table.setItem(row, 3, QTableWidgetItem("\n".join(g.paths)))
 
         total_waste = sum(g.size * (len(g.paths) - 1) for g in groups)
-        self._status_label.setText(
-            f"找到 {len(groups)} 组重复文件，浪费空间: {_fmt_size(total_waste)}"
-        )
+        status = f"找到 {len(groups)} 组重复文件，浪费空间: {_fmt_size(total_waste)}"
+        if report.hardlinks:
+            status += f"；另有 {len(report.hardlinks)} 组硬链接（共享存储，不占额外空间）"
+        self._status_label.setText(status)
         self._scan_btn.setEnabled(True)
 
     def _show_context_menu(self, pos):
@@ -134,6 +161,8 @@ class DuplicateTab(QWidget):
         menu.addAction("复制路径列表", self._copy_paths)
         menu.addAction("在文件管理器中显示", self._open_in_file_manager)
         menu.addSeparator()
+        menu.addAction("合并为硬链接(保留路径)", lambda: self._link_duplicates("hardlink"))
+        menu.addAction("合并为 reflink 副本(不支持时用硬链接)", lambda: self._link_duplicates("auto"))
         menu.addAction("删除重复文件(保留一份)", self._delete_duplicates)
         menu.exec(self._table.viewport().mapToGlobal(pos))
 
@@ -186,3 +215,31 @@ class DuplicateTab(QWidget):
                 with contextlib.suppress(OSError):
                     os.remove(p)
             self._scan()
+
+    def _link_duplicates(self, mode: str):
+        rows = self._table.selectionModel().selectedRows()
+        if not rows or rows[0].row() >= len(self._groups):
+            return
+        group = self._groups[rows[0].row()]
+        planned = dedup_group(group, mode, dry_run=True)
+        ready = [a for a in planned if a.status == "planned"]
+        if not ready:
+            reasons = "\n".join(f"{a.path}: {a.reason}" for a in planned)
+            QMessageBox.information(self, "提示", f"没有可合并的文件:\n\n{reasons}")
+            return
+        reclaim = sum(a.reclaimed for a in ready)
+        reply = QMessageBox.question(
+            self, "确认合并",
+            f"内容已逐字节确认一致，将把 {len(ready)} 个副本替换为指向\n{group.paths[0]}\n"
+            f"的{'硬链接' if mode == 'hardlink' else ' reflink 副本'}，预计释放 {_fmt_size(reclaim)}。",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        actions = dedup_group(group, mode)
+        failed = [a for a in actions if a.status == "failed"]
+        msg = f"已释放 {_fmt_size(sum(a.reclaimed for a in actions))}"
+        if failed:
+            msg += "\n\n失败:\n" + "\n".join(f"{a.path}: {a.reason}" for a in failed)
+        QMessageBox.information(self, "完成", msg)
+        self._scan()
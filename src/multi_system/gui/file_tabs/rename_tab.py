@@ -21,7 +21,15 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from multi_system.files.batch_rename import execute_rename, preview_rename
+from multi_system.files.batch_rename import (
+    RenameJournal,
+    RenameOp,
+    execute_plan,
+    plan_rename,
+    preview_rename,
+    resume_rename,
+    rollback_rename,
+)
 
 
 class RenameTab(QWidget):
@@ -57,6 +65,8 @@ class RenameTab(QWidget):
         opt_row = QHBoxLayout()
         self._regex_check = QCheckBox("使用正则表达式")
         opt_row.addWidget(self._regex_check)
+        self._recursive_check = QCheckBox("包含子目录")
+        opt_row.addWidget(self._recursive_check)
         opt_row.addStretch()
         layout.addLayout(opt_row)
 
@@ -78,8 +88,8 @@ class RenameTab(QWidget):
         layout.addWidget(toolbar)
 
         # --- Preview table ---
-        self._table = QTableWidget(0, 2)
-        self._table.setHorizontalHeaderLabels(["原文件名", "新文件名"])
+        self._table = QTableWidget(0, 3)
+        self._table.setHorizontalHeaderLabels(["原文件名", "新文件名", "冲突"])
         self._table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self._table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         self._table.setAlternatingRowColors(True)
@@ -96,59 +106,107 @@ class RenameTab(QWidget):
         super().showEvent(event)
         if not self._loaded:
             self._loaded = True
+            self._recover_pending()
             self._preview()
 
-    def _preview(self):
+    def _recover_pending(self):
+        """处理上次失败或中断后保留的日志"""
+        pending = RenameJournal.list_pending()
+        if not pending:
+            return
+        reply = QMessageBox.question(
+            self,
+            "未完成的重命名",
+            f"发现 {len(pending)} 个未完成的批量重命名。\n\n"
+            "选择是继续执行，选择否撤销已完成的部分，取消则保留到下次处理。",
+            QMessageBox.StandardButton.Yes
+            | QMessageBox.StandardButton.No
+            | QMessageBox.StandardButton.Cancel,
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            errors = [r.error for r in map(resume_rename, pending) if not r.ok]
+            if errors:
+                QMessageBox.warning(self, "继续失败", "\n".join(str(e) for e in errors))
+        elif reply == QMessageBox.StandardButton.No:
+            undone = sum(rollback_rename(p) for p in reversed(pending))
+            QMessageBox.information(self, "已撤销", f"已撤销 {undone} 步重命名")
+
+    def _collect_ops(self) -> list[RenameOp] | None:
         dir_str = self._dir_edit.text().strip()
         pattern = self._pattern_edit.text()
         replacement = self._replacement_edit.text()
         if not dir_str or not pattern:
-            self._table.setRowCount(0)
-            self._status_label.setText("")
-            return
+            return None
 
         directory = Path(dir_str)
         if not directory.is_dir():
             QMessageBox.warning(self, "错误", f"目录不存在: {dir_str}")
+            return None
+
+        return preview_rename(
+            directory,
+            pattern,
+            replacement,
+            regex=self._regex_check.isChecked(),
+            recursive=self._recursive_check.isChecked(),
+        )
+
+    def _preview(self):
+        ops = self._collect_ops()
+        if ops is None:
+            self._table.setRowCount(0)
+            self._status_label.setText("")
             return
 
-        use_regex = self._regex_check.isChecked()
-        ops = preview_rename(directory, pattern, replacement, regex=use_regex)
+        plan = plan_rename(ops)
+        reasons = {id(c.op): c.reason for c in plan.conflicts}
 
-        self._table.setRowCount(0)
-        for op in ops:
-            row = self._table.rowCount()
-            self._table.insertRow(row)
+        self._table.setUpdatesEnabled(False)
+        self._table.setRowCount(len(ops))
+        for row, op in enumerate(ops):
             self._table.setItem(row, 0, QTableWidgetItem(str(op.old_path)))
             self._table.setItem(row, 1, QTableWidgetItem(str(op.new_path)))
+            self._table.setItem(row, 2, QTableWidgetItem(reasons.get(id(op), "")))
+        self._table.setUpdatesEnabled(True)
 
-        self._execute_btn.setEnabled(len(ops) > 0)
-        self._status_label.setText(f"预览: {len(ops)} 个文件将被重命名")
+        self._execute_btn.setEnabled(plan.op_count > 0)
+        status = f"预览: {plan.op_count} 个文件将被重命名"
+        if plan.conflicts:
+            status += f"，{len(plan.conflicts)} 个冲突将被跳过"
+        self._status_label.setText(status)
 
     def _execute(self):
-        dir_str = self._dir_edit.text().strip()
-        pattern = self._pattern_edit.text()
-        replacement = self._replacement_edit.text()
-        if not dir_str or not pattern:
-            return
-
-        directory = Path(dir_str)
-        use_regex = self._regex_check.isChecked()
-        ops = preview_rename(directory, pattern, replacement, regex=use_regex)
+        ops = self._collect_ops()
         if not ops:
             return
+        plan = plan_rename(ops)
+        if not plan.op_count:
+            return
 
         reply = QMessageBox.warning(
             self,
             "确认执行",
-            f"确定要重命名 {len(ops)} 个文件吗？此操作不可撤销。",
+            f"确定要重命名 {plan.op_count} 个文件吗？",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
         )
         if reply != QMessageBox.StandardButton.Yes:
             return
 
-        success = execute_rename(ops)
-        QMessageBox.information(self, "完成", f"成功重命名 {success}/{len(ops)} 个文件")
+        result = execute_plan(plan)
+        if result.ok:
+            QMessageBox.information(self, "完成", f"成功重命名 {plan.op_count} 个文件")
+        else:
+            reply = QMessageBox.question(
+                self,
+                "重命名中断",
+                f"已完成 {plan.ops_done(result.done)}/{plan.op_count} 个文件后失败:\n"
+                f"{result.error}\n\n是否撤销已完成的重命名？\n"
+                f"（选择否将保留日志 {result.journal}，下次打开此页时可继续）",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            )
+            if reply == QMessageBox.StandardButton.Yes and result.journal is not None:
+                undone = rollback_rename(result.journal)
+                QMessageBox.information(self, "已撤销", f"已撤销 {undone} 步重命名")
         self._execute_btn.setEnabled(False)
         self._preview()
 
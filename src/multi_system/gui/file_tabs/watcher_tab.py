@@ -88,7 +88,10 @@ class WatcherTab(QWidget):
             QMessageBox.warning(self, "错误", f"目录不存在: {path_str}")
             return
 
-        self._watcher = SimpleFileWatcher(path, callback=self._on_event)
+        # 编辑器保存、构建等产生的突发事件合并后整批写入日志
+        self._watcher = SimpleFileWatcher(
+            path, debounce=1.0, batch_callback=self._on_events
+        )
         # Take initial snapshot
         self._watcher.check_once()
 
@@ -98,13 +101,16 @@ class WatcherTab(QWidget):
 
         self._start_btn.setEnabled(False)
         self._stop_btn.setEnabled(True)
-        self._status_label.setText(f"监控中: {path_str}")
+        self._status_label.setText(f"监控中: {path_str} ({self._watcher.backend_name})")
         self._append_log(f"=== 开始监控: {path_str} ===")
 
     def _stop(self):
         if self._timer:
             self._timer.stop()
             self._timer = None
+        if self._watcher:
+            self._watcher.flush()
+            self._watcher.close()
         self._watcher = None
 
         self._start_btn.setEnabled(True)
@@ -115,23 +121,29 @@ class WatcherTab(QWidget):
     def _check_events(self):
         if not self._watcher:
             return
-        events = self._watcher.check_once()
-        for evt in events:
-            self._on_event(evt)
+        self._watcher.check_once()
 
-    def _on_event(self, evt: FileEvent):
+    def _on_events(self, events: list[FileEvent]):
         type_map = {
             "created": "新建",
             "modified": "修改",
             "deleted": "删除",
+            "moved": "移动",
         }
-        label = type_map.get(evt.event_type, evt.event_type)
-        self._append_log(f"[{label}] {evt.path}")
-
-    def _append_log(self, text: str):
+        lines = []
+        for evt in events:
+            label = type_map.get(evt.event_type, evt.event_type)
+            if evt.dest_path is not None:
+                lines.append(f"[{label}] {evt.path} -> {evt.dest_path}")
+            else:
+                lines.append(f"[{label}] {evt.path}")
+        self._append_log(*lines)
+
+    def _append_log(self, *lines: str):
+        # 一批事件一次写入，避免逐行追加触发多次重排
         from datetime import datetime
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self._log.appendPlainText(f"{timestamp} {text}")
+        self._log.appendPlainText("\n".join(f"{timestamp} {line}" for line in lines))
 
     def _clear_log(self):
         self._log.clear()
@@ -11,6 +11,8 @@ from PySide6.QtWidgets import (
 )
 
 from multi_system.system.monitor.dashboard import SystemDashboard
+from multi_system.system.monitor.sampler import MetricsSampler
+from multi_system.system.monitor.timeseries import MetricsHistory
 
 
 def _fmt_bytes(b: int | float) -> str:
@@ -40,6 +42,7 @@ class DashboardTab(QWidget):
         self._cpu_bar.setRange(0, 100)
         layout.addWidget(self._cpu_bar)
         self._cpu_label = QLabel()
+        layout.addWidget(self._cpu_label)
 
         # Memory
         layout.addWidget(QLabel("<b>内存</b>"))
@@ -47,6 +50,7 @@ class DashboardTab(QWidget):
         self._mem_bar.setRange(0, 100)
         layout.addWidget(self._mem_bar)
         self._mem_label = QLabel()
+        layout.addWidget(self._mem_label)
 
         # Disks
         self._disk_layout = QVBoxLayout()
@@ -56,52 +60,101 @@ class DashboardTab(QWidget):
         self._net_label = QLabel()
         layout.addWidget(self._net_label)
 
+        # History
+        self._history_label = QLabel()
+        layout.addWidget(self._history_label)
+
         layout.addStretch()
 
+        # 采样在后台线程进行，定时器只读取最新快照，不会阻塞界面
+        self._sampler = MetricsSampler.shared()
+        self._history = MetricsHistory()
+        self._history.attach(self._sampler)
+        self._acquired = False
+        self._last_seq = 0
+        self._disk_widgets: dict[str, tuple[QLabel, QProgressBar]] = {}
+
         self._timer = QTimer(self)
         self._timer.timeout.connect(self._refresh)
-        self._timer.start(3000)
 
     def showEvent(self, event):
         super().showEvent(event)
         if not self._loaded:
             self._loaded = True
-            self._refresh()
+            info = SystemDashboard.get_system_info()
+            self._info_label.setText(
+                f"<b>{info.hostname}</b> | {info.os_name} {info.arch} | "
+                f"CPU: {info.cpu_count_physical}核{info.cpu_count_logical}线程 | "
+                f"启动: {info.boot_time.strftime('%m-%d %H:%M')}"
+            )
+        # 只在可见时采样
+        if not self._acquired:
+            self._acquired = True
+            self._sampler.acquire()
+        self._timer.start(1000)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._timer.stop()
+        if self._acquired:
+            self._acquired = False
+            self._sampler.release()
 
     def _refresh(self):
-        info = SystemDashboard.get_system_info()
-        self._info_label.setText(
-            f"<b>{info.hostname}</b> | {info.os_name} {info.arch} | "
-            f"CPU: {info.cpu_count_physical}核{info.cpu_count_logical}线程 | "
-            f"启动: {info.boot_time.strftime('%m-%d %H:%M')}"
-        )
+        snap = self._sampler.latest
+        if snap is None or snap.seq == self._last_seq:
+            return
+        self._last_seq = snap.seq
 
-        cpu = SystemDashboard.get_cpu_stats()
+        cpu = snap.cpu
         self._cpu_bar.setValue(int(cpu.percent))
-        self._cpu_label.setText(f"CPU: {cpu.percent:.1f}% | 频率: {cpu.freq_current:.0f}MHz")
+        self._cpu_label.setText(
+            f"CPU: {cpu.percent:.1f}% | 频率: {cpu.freq_current:.0f}MHz"
+        )
 
-        mem = SystemDashboard.get_memory_stats()
+        mem = snap.memory
         self._mem_bar.setValue(int(mem.percent))
         self._mem_label.setText(
-            f"内存: {_fmt_bytes(mem.used)} / {_fmt_bytes(mem.total)} ({mem.percent:.1f}%) | "
-            f"Swap: {_fmt_bytes(mem.swap_used)} / {_fmt_bytes(mem.swap_total)} ({mem.swap_percent:.1f}%)"
+            f"内存: {_fmt_bytes(mem.used)} / {_fmt_bytes(mem.total)} "
+            f"({mem.percent:.1f}%) | "
+            f"Swap: {_fmt_bytes(mem.swap_used)} / {_fmt_bytes(mem.swap_total)} "
+            f"({mem.swap_percent:.1f}%)"
         )
 
-        # Disks — rebuild
-        while self._disk_layout.count():
-            item = self._disk_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        for d in SystemDashboard.get_disk_stats():
-            bar = QProgressBar()
-            bar.setRange(0, 100)
+        # Disks — 挂载点变化时才重建控件
+        mountpoints = [d.mountpoint for d in snap.disks]
+        if mountpoints != list(self._disk_widgets):
+            while self._disk_layout.count():
+                item = self._disk_layout.takeAt(0)
+                if item.widget():
+                    item.widget().deleteLater()
+            self._disk_widgets = {}
+            for d in snap.disks:
+                label = QLabel()
+                bar = QProgressBar()
+                bar.setRange(0, 100)
+                self._disk_layout.addWidget(label)
+                self._disk_layout.addWidget(bar)
+                self._disk_widgets[d.mountpoint] = (label, bar)
+        for d in snap.disks:
+            label, bar = self._disk_widgets[d.mountpoint]
+            label.setText(f"{d.device} → {d.mountpoint} ({d.fstype})")
             bar.setValue(int(d.percent))
-            self._disk_layout.addWidget(QLabel(
-                f"{d.device} → {d.mountpoint} ({d.fstype})"
-            ))
-            self._disk_layout.addWidget(bar)
 
-        net = SystemDashboard.get_network_stats()
+        net, rates = snap.network, snap.rates
         self._net_label.setText(
-            f"网络: ↑{_fmt_bytes(net.bytes_sent)} ↓{_fmt_bytes(net.bytes_recv)}"
+            f"网络: ↑{_fmt_bytes(rates.net_sent)}/s ↓{_fmt_bytes(rates.net_recv)}/s | "
+            f"累计 ↑{_fmt_bytes(net.bytes_sent)} ↓{_fmt_bytes(net.bytes_recv)}"
         )
+
+        lines = []
+        for minutes in (5, 60):
+            cpu = self._history.stats("cpu", minutes * 60)
+            mem = self._history.stats("memory", minutes * 60)
+            if cpu is None or mem is None:
+                continue
+            lines.append(
+                f"近 {minutes} 分钟: CPU 平均 {cpu.avg:.1f}% / P95 {cpu.p95:.1f}% / "
+                f"峰值 {cpu.max:.1f}% | 内存峰值 {mem.max:.1f}%"
+            )
+        self._history_label.setText("<br>".join(lines))
@@ -22,6 +22,7 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from multi_system.system.monitor.dir_tree import DirTree
 from multi_system.system.monitor.disk_usage import DiskUsageAnalyzer
 
 
@@ -37,6 +38,8 @@ class DiskTab(QWidget):
     def __init__(self):
         super().__init__()
         self._loaded = False
+        self._tree: DirTree | None = None
+        self._node = 0
         self._init_ui()
 
     def _init_ui(self):
@@ -54,9 +57,11 @@ class DiskTab(QWidget):
         toolbar = QToolBar()
         toolbar.setMovable(False)
         toolbar.addAction("刷新", self._scan)
+        toolbar.addAction("上一级", self._go_up)
         layout.addWidget(toolbar)
 
-        layout.addWidget(QLabel("目录大小排序:"))
+        self._dir_label = QLabel("目录大小排序:")
+        layout.addWidget(self._dir_label)
         self._dir_table = QTableWidget(0, 3)
         self._dir_table.setHorizontalHeaderLabels(["目录", "大小", "文件数"])
         self._dir_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
@@ -64,6 +69,7 @@ class DiskTab(QWidget):
         self._dir_table.setAlternatingRowColors(True)
         self._dir_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self._dir_table.customContextMenuRequested.connect(self._show_dir_context_menu)
+        self._dir_table.cellDoubleClicked.connect(self._drill_down)
         self._dir_table.horizontalHeader().setStretchLastSection(True)
         layout.addWidget(self._dir_table)
 
@@ -88,16 +94,9 @@ class DiskTab(QWidget):
         from pathlib import Path
         path = Path(self._path_edit.text().strip())
 
-        dirs = DiskUsageAnalyzer.scan_directory(path)
-        self._dir_table.setRowCount(0)
-        for d in dirs:
-            row = self._dir_table.rowCount()
-            self._dir_table.insertRow(row)
-            self._dir_table.setItem(row, 0, QTableWidgetItem(d.path))
-            self._dir_table.setItem(row, 1, QTableWidgetItem(_fmt_size(d.size)))
-            self._dir_table.setItem(row, 2, QTableWidgetItem(str(d.file_count)))
+        self._tree, files = DiskUsageAnalyzer.scan(path)
+        self._show_node(0)
 
-        files = DiskUsageAnalyzer.find_big_files(path)
         self._file_table.setRowCount(0)
         for f in files:
             row = self._file_table.rowCount()
@@ -105,6 +104,32 @@ class DiskTab(QWidget):
             self._file_table.setItem(row, 0, QTableWidgetItem(f.path))
             self._file_table.setItem(row, 1, QTableWidgetItem(_fmt_size(f.size)))
 
+    def _show_node(self, node: int, top_n: int = 50):
+        """从内存中的目录树显示某个节点的子目录，无需重新扫描"""
+        if self._tree is None:
+            return
+        self._node = node
+        self._dir_label.setText(f"目录大小排序: {self._tree.path(node)}")
+        self._dir_table.setRowCount(0)
+        for child in self._tree.children(node)[:top_n]:
+            d = self._tree.info(child)
+            row = self._dir_table.rowCount()
+            self._dir_table.insertRow(row)
+            item = QTableWidgetItem(d.path)
+            item.setData(Qt.ItemDataRole.UserRole, child)
+            self._dir_table.setItem(row, 0, item)
+            self._dir_table.setItem(row, 1, QTableWidgetItem(_fmt_size(d.size)))
+            self._dir_table.setItem(row, 2, QTableWidgetItem(str(d.file_count)))
+
+    def _drill_down(self, row: int, _column: int):
+        item = self._dir_table.item(row, 0)
+        if item is not None:
+            self._show_node(item.data(Qt.ItemDataRole.UserRole))
+
+    def _go_up(self):
+        if self._tree is not None and self._node > 0:
+            self._show_node(self._tree.parent[self._node])
+
     @staticmethod
     def _open_path_in_file_manager(path: str):
         if sys.platform == "linux":
@@ -17,13 +17,18 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from multi_system.system.monitor.processes import ProcessManager
+from multi_system.system.monitor.processes import (
+    ProcessManager,
+    create_tracker,
+    match_processes,
+)
 
 
 class ProcessTab(QWidget):
     def __init__(self):
         super().__init__()
         self._loaded = False
+        self._tracker = create_tracker()
         self._init_ui()
 
     def _init_ui(self):
@@ -123,23 +128,26 @@ class ProcessTab(QWidget):
     def _force_refresh(self):
         self._refresh()
 
-    def _on_sort_changed(self, index: int):
+    def _sort_by(self) -> str:
         sort_map = {0: "cpu", 1: "mem", 2: "name", 3: "pid"}
-        sort_by = sort_map.get(index, "cpu")
-        procs = ProcessManager.list_processes(sort_by=sort_by)
-        self._show_procs(procs)
+        return sort_map.get(self._sort_combo.currentIndex(), "cpu")
+
+    def _on_sort_changed(self, index: int):
+        # 重新排序上次刷新的结果，不重新采样
+        self._show_current()
 
     def _refresh(self):
-        sort_map = {0: "cpu", 1: "mem", 2: "name", 3: "pid"}
-        sort_by = sort_map.get(self._sort_combo.currentIndex(), "cpu")
-        procs = ProcessManager.list_processes(sort_by=sort_by)
-        self._show_procs(procs)
+        self._tracker.refresh()
+        self._show_current()
 
     def _on_search(self, keyword: str):
-        if not keyword:
-            self._refresh()
-            return
-        procs = ProcessManager.search(keyword)
+        self._show_current()
+
+    def _show_current(self):
+        procs = self._tracker.processes(self._sort_by())
+        keyword = self._search.text()
+        if keyword:
+            procs = match_processes(procs, keyword)
         self._show_procs(procs)
 
     def _show_procs(self, procs):
@@ -6,6 +6,11 @@ from multi_system.gui.registry import get_all, get_by_cli
 def main():
     args = sys.argv[1:]
 
+    if args[:1] == ["--apply-links"]:
+        # 冻结打包后创建软连接时提升权限的子进程
+        from multi_system.files.file_link import apply_links_from_args
+        sys.exit(apply_links_from_args(args))
+
     if not args or args[0] in ("--help", "-h"):
         _print_help()
         return
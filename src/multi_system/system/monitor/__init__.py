@@ -5,6 +5,13 @@
 from .dashboard import SystemDashboard
 from .disk_usage import DiskUsageAnalyzer
 from .processes import ProcessManager
+from .sampler import MetricsSampler
 from .startup_apps import StartupAppManager
 
-__all__ = ["SystemDashboard", "ProcessManager", "DiskUsageAnalyzer", "StartupAppManager"]
+__all__ = [
+    "SystemDashboard",
+    "ProcessManager",
+    "DiskUsageAnalyzer",
+    "StartupAppManager",
+    "MetricsSampler",
+]
@@ -3,13 +3,14 @@
 """
 
 import platform
+import time
 from dataclasses import dataclass
 from datetime import datetime
 
 import psutil
 
 
-@dataclass
+@dataclass(frozen=True)
 class SystemInfo:
     hostname: str
     os_name: str
@@ -20,15 +21,15 @@ class SystemInfo:
     cpu_count_physical: int
 
 
-@dataclass
+@dataclass(frozen=True)
 class CpuStats:
     percent: float
-    per_cpu: list[float]
+    per_cpu: tuple[float, ...]
     freq_current: float
     freq_max: float
 
 
-@dataclass
+@dataclass(frozen=True)
 class MemoryStats:
     total: int
     used: int
@@ -39,7 +40,7 @@ class MemoryStats:
     swap_percent: float
 
 
-@dataclass
+@dataclass(frozen=True)
 class DiskStats:
     device: str
     mountpoint: str
@@ -50,7 +51,7 @@ class DiskStats:
     percent: float
 
 
-@dataclass
+@dataclass(frozen=True)
 class NetworkStats:
     bytes_sent: int
     bytes_recv: int
@@ -58,6 +59,31 @@ class NetworkStats:
     packets_recv: int
 
 
+def cpu_busy_total(times) -> tuple[float, float]:
+    """一组 cpu_times 的 (忙碌时间, 总时间)，与 psutil.cpu_percent 的算法一致"""
+    total = sum(times)
+    # Linux 上 guest 时间已计入 user/nice，不能重复计算
+    total -= getattr(times, "guest", 0.0) + getattr(times, "guest_nice", 0.0)
+    idle = times.idle + getattr(times, "iowait", 0.0)
+    return total - idle, total
+
+
+def cpu_percent_between(before: list, after: list) -> tuple[float, list[float]]:
+    """由两次 cpu_times(percpu=True) 计算 (总占用, 各核占用)"""
+    per_cpu = []
+    busy_sum = total_sum = 0.0
+    # CPU 热插拔时两次采样的核数可能不同，只比较共有的部分
+    for b, a in zip(before, after, strict=False):
+        busy0, total0 = cpu_busy_total(b)
+        busy1, total1 = cpu_busy_total(a)
+        busy, total = max(busy1 - busy0, 0.0), max(total1 - total0, 0.0)
+        busy_sum += busy
+        total_sum += total
+        per_cpu.append(round(min(100.0 * busy / total, 100.0), 1) if total else 0.0)
+    percent = round(min(100.0 * busy_sum / total_sum, 100.0), 1) if total_sum else 0.0
+    return percent, per_cpu
+
+
 class SystemDashboard:
     @staticmethod
     def get_system_info() -> SystemInfo:
@@ -72,11 +98,15 @@ class SystemDashboard:
         )
 
     @staticmethod
-    def get_cpu_stats() -> CpuStats:
+    def get_cpu_stats(interval: float = 0.5) -> CpuStats:
+        """阻塞 interval 秒测量 CPU 占用；需要非阻塞读取时使用 MetricsSampler"""
+        before = psutil.cpu_times(percpu=True)
+        time.sleep(interval)
+        percent, per_cpu = cpu_percent_between(before, psutil.cpu_times(percpu=True))
         freq = psutil.cpu_freq()
         return CpuStats(
-            percent=psutil.cpu_percent(interval=0.5),
-            per_cpu=psutil.cpu_percent(interval=0.5, percpu=True),
+            percent=percent,
+            per_cpu=tuple(per_cpu),
             freq_current=freq.current if freq else 0.0,
             freq_max=freq.max if freq else 0.0,
         )
@@ -0,0 +1,165 @@
+"""
+目录大小树
+
+一次遍历建立整棵目录树，节点数据保存在并行的 array 中：
+节点编号按发现顺序分配，子目录编号总是大于父目录，因此逆序扫一遍即可
+自底向上汇总大小。之后的下钻、排序与任意深度的 Top-N 查询都只读内存。
+"""
+
+import heapq
+import os
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+from multi_system.files.walker import ScanEntry, ScanVisitor
+
+
+@dataclass
+class DirInfo:
+    path: str
+    size: int
+    file_count: int
+
+
+class DirTree:
+    def __init__(
+        self,
+        names: list[str],
+        parent: array,
+        own_size: array,
+        own_files: array,
+    ):
+        n = len(names)
+        self.names = names
+        self.parent = parent
+        self.own_size = own_size
+        self.own_files = own_files
+        self.size = array("q", own_size)
+        self.file_count = array("q", own_files)
+        self.depth = array("H", bytes(2 * n))
+        for i in range(1, n):
+            self.depth[i] = self.depth[parent[i]] + 1
+        # 自底向上汇总：子节点编号总大于父节点
+        size, count = self.size, self.file_count
+        for i in range(n - 1, 0, -1):
+            p = parent[i]
+            size[p] += size[i]
+            count[p] += count[i]
+        self._build_children()
+
+    def _build_children(self) -> None:
+        """按父节点计数排序构建 CSR 形式的子节点表，每段按大小降序"""
+        n = len(self.names)
+        start = array("q", bytes(8 * (n + 1)))
+        for i in range(1, n):
+            start[self.parent[i] + 1] += 1
+        for i in range(n):
+            start[i + 1] += start[i]
+        ids = array("q", bytes(8 * max(n - 1, 0)))
+        fill = array("q", start[:n])
+        for i in range(1, n):
+            p = self.parent[i]
+            ids[fill[p]] = i
+            fill[p] += 1
+        size = self.size
+        for p in range(n):
+            lo, hi = start[p], start[p + 1]
+            if hi - lo > 1:
+                ids[lo:hi] = array("q", sorted(ids[lo:hi], key=size.__getitem__, reverse=True))
+        self.child_start = start
+        self.child_ids = ids
+
+    @property
+    def root(self) -> str:
+        return self.names[0]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def path(self, node: int) -> str:
+        parts = []
+        while node > 0:
+            parts.append(self.names[node])
+            node = self.parent[node]
+        parts.append(self.names[0])
+        return os.path.join(*reversed(parts))
+
+    def info(self, node: int) -> DirInfo:
+        return DirInfo(self.path(node), self.size[node], self.file_count[node])
+
+    def children(self, node: int) -> array:
+        """子目录编号，按大小降序"""
+        return self.child_ids[self.child_start[node]:self.child_start[node + 1]]
+
+    def child_infos(self, node: int = 0, top_n: int | None = None) -> list[DirInfo]:
+        ids = self.children(node)
+        if top_n is not None:
+            ids = ids[:top_n]
+        return [self.info(i) for i in ids]
+
+    def find(self, path: str | Path) -> int | None:
+        """路径对应的节点编号，不在树中时返回 None"""
+        rel = os.path.relpath(os.fspath(path), self.root)
+        if rel == os.curdir:
+            return 0
+        if rel.startswith(os.pardir):
+            return None
+        node = 0
+        for part in rel.split(os.sep):
+            for child in self.children(node):
+                if self.names[child] == part:
+                    node = child
+                    break
+            else:
+                return None
+        return node
+
+    def largest(self, n: int = 50, depth: int | None = None) -> list[DirInfo]:
+        """全树（或指定深度）中最大的 n 个目录"""
+        nodes = range(1, len(self.names))
+        if depth is not None:
+            nodes = (i for i in nodes if self.depth[i] == depth)
+        top = heapq.nlargest(n, nodes, key=self.size.__getitem__)
+        return [self.info(i) for i in top]
+
+
+class DirTreeVisitor(ScanVisitor):
+    """遍历访问者：建立 DirTree，硬链接文件只计一次"""
+
+    def __init__(self, root: str | Path):
+        root = os.fspath(root)
+        self.names = [root]
+        self.parent = array("q", [-1])
+        self.own_size = array("q", [0])
+        self.own_files = array("q", [0])
+        self._ids: dict[str, int] = {root: 0}
+        self._seen_inodes: set[tuple[int, int]] = set()
+
+    def on_dir(self, entry: ScanEntry) -> None:
+        pid = self._ids.get(entry.parent)
+        if pid is None:
+            return
+        self._ids[entry.path] = len(self.names)
+        self.names.append(entry.name)
+        self.parent.append(pid)
+        self.own_size.append(0)
+        self.own_files.append(0)
+
+    def on_file(self, entry: ScanEntry) -> None:
+        node = self._ids.get(entry.parent)
+        if node is None:
+            return
+        st = entry.stat
+        if st.st_nlink > 1:
+            key = (st.st_dev, st.st_ino)
+            if key in self._seen_inodes:
+                return
+            self._seen_inodes.add(key)
+        self.own_size[node] += st.st_size
+        self.own_files[node] += 1
+
+    def build(self) -> DirTree:
+        self._ids.clear()
+        self._seen_inodes.clear()
+        return DirTree(self.names, self.parent, self.own_size, self.own_files)
@@ -0,0 +1,184 @@
+"""
+磁盘占用快照与增长对比
+
+把 DirTree 的数组直接序列化并用 zlib 压缩保存在 data/disk_usage/ 下，
+只保存目录级数据，千万级文件的卷也只有目录数量级的体积。
+两个快照按树结构逐节点对齐，无需重新扫描即可列出增长最多的子树。
+
+定时任务示例: python -m multi_system.system.monitor.disk_snapshot /data
+"""
+
+import hashlib
+import json
+import os
+import sys
+import zlib
+from array import array
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from multi_system.core.data_manager import DataManager
+
+from .dir_tree import DirTree
+
+_MAGIC = b"MSDT1\n"
+
+
+@dataclass
+class SnapshotInfo:
+    path: Path
+    root: str
+    created: datetime
+    total_size: int
+    dir_count: int
+
+
+@dataclass
+class DirGrowth:
+    path: str
+    old_size: int
+    new_size: int
+    delta: int
+    own_delta: int  # 仅该目录下直接文件的变化，用于定位增长的实际位置
+
+
+def _to_bytes(arr: array) -> bytes:
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    arr = array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+class DiskSnapshotStore:
+    def __init__(self, data_manager: DataManager | None = None):
+        self._dir = (data_manager or DataManager()).get_data_dir("disk_usage")
+
+    def save(self, tree: DirTree, created: datetime | None = None) -> Path:
+        created = created or datetime.now()
+        names = "\0".join(tree.names).encode("utf-8", "surrogateescape")
+        header = {
+            "root": tree.root,
+            "created": created.isoformat(),
+            "dirs": len(tree),
+            "total_size": tree.size[0] if len(tree) else 0,
+            "names_len": len(names),
+        }
+        payload = b"".join([
+            _to_bytes(tree.parent),
+            _to_bytes(tree.own_size),
+            _to_bytes(tree.own_files),
+            names,
+        ])
+        root_tag = hashlib.blake2b(tree.root.encode(), digest_size=4).hexdigest()
+        path = self._dir / f"{created:%Y%m%d-%H%M%S}-{root_tag}.dtree"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_MAGIC)
+            f.write(json.dumps(header).encode() + b"\n")
+            f.write(zlib.compress(payload, 6))
+        os.replace(tmp, path)
+        return path
+
+    @staticmethod
+    def _read_header(f) -> dict:
+        if f.readline() != _MAGIC:
+            raise ValueError("不是有效的磁盘快照文件")
+        return json.loads(f.readline())
+
+    def list_snapshots(self, root: str | Path | None = None) -> list[SnapshotInfo]:
+        """按时间升序列出快照，可按扫描根目录过滤"""
+        root = os.fspath(root) if root is not None else None
+        infos = []
+        for p in self._dir.glob("*.dtree"):
+            try:
+                with open(p, "rb") as f:
+                    h = self._read_header(f)
+            except (OSError, ValueError):
+                continue
+            if root is not None and h["root"] != root:
+                continue
+            infos.append(SnapshotInfo(
+                p, h["root"], datetime.fromisoformat(h["created"]),
+                h["total_size"], h["dirs"],
+            ))
+        infos.sort(key=lambda i: i.created)
+        return infos
+
+    def load(self, path: Path) -> DirTree:
+        with open(path, "rb") as f:
+            h = self._read_header(f)
+            payload = zlib.decompress(f.read())
+        n = h["dirs"]
+        width = array("q").itemsize * n
+        parent = _from_bytes("q", payload[:width])
+        own_size = _from_bytes("q", payload[width:2 * width])
+        own_files = _from_bytes("q", payload[2 * width:3 * width])
+        names = payload[3 * width:].decode("utf-8", "surrogateescape").split("\0")
+        return DirTree(names, parent, own_size, own_files)
+
+    def prune(self, keep: int = 168, root: str | Path | None = None) -> int:
+        """只保留最新的 keep 个快照（默认按每小时一次约一周），返回删除数量"""
+        infos = self.list_snapshots(root)
+        removed = 0
+        for info in infos[:max(0, len(infos) - keep)]:
+            try:
+                info.path.unlink()
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+    @staticmethod
+    def diff(
+        old: DirTree, new: DirTree, top_n: int = 50, depth: int | None = None
+    ) -> list[DirGrowth]:
+        """按增长量降序列出新快照中的目录，旧快照中不存在的目录视为从 0 增长"""
+        old_index = {
+            (old.parent[i], old.names[i]): i for i in range(1, len(old))
+        }
+        # 新树节点在旧树中的对应编号，-1 表示不存在；父节点编号总是更小
+        match = array("q", [-1]) * len(new)
+        if len(new) and len(old):
+            match[0] = 0
+        for i in range(1, len(new)):
+            op = match[new.parent[i]]
+            if op >= 0:
+                match[i] = old_index.get((op, new.names[i]), -1)
+
+        growth = []
+        for i in range(len(new)):
+            if depth is not None and new.depth[i] != depth:
+                continue
+            j = match[i]
+            old_size = old.size[j] if j >= 0 else 0
+            old_own = old.own_size[j] if j >= 0 else 0
+            delta = new.size[i] - old_size
+            if delta > 0:
+                growth.append((delta, i, old_size, new.own_size[i] - old_own))
+        growth.sort(reverse=True)
+        return [
+            DirGrowth(new.path(i), old_size, new.size[i], delta, own_delta)
+            for delta, i, old_size, own_delta in growth[:top_n]
+        ]
+
+
+if __name__ == "__main__":
+    from .disk_usage import DiskUsageAnalyzer
+
+    scan_root = Path(sys.argv[1] if len(sys.argv) > 1 else ".").resolve()
+    store = DiskSnapshotStore()
+    saved = DiskUsageAnalyzer.snapshot(scan_root, store)
+    print(f"已保存快照: {saved}")
+    history = store.list_snapshots(scan_root)
+    if len(history) >= 2:
+        for g in store.diff(store.load(history[-2].path), store.load(saved), top_n=20):
+            print(f"{g.delta:>15,} (本目录 {g.own_delta:+,})  {g.path}")
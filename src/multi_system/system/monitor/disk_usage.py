@@ -2,16 +2,19 @@
 磁盘空间分析
 """
 
-import os
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+from multi_system.files.big_files import BigFileVisitor
+from multi_system.files.exclusions import Exclusions
+from multi_system.files.walker import scan_tree
 
-@dataclass
-class DirInfo:
-    path: str
-    size: int
-    file_count: int
+from .dir_tree import DirInfo, DirTree, DirTreeVisitor
+from .usage_breakdown import UsageRecords, UsageRecordsVisitor
+
+if TYPE_CHECKING:
+    from .disk_snapshot import DiskSnapshotStore
 
 
 @dataclass
@@ -22,41 +25,73 @@ class BigFile:
 
 class DiskUsageAnalyzer:
     @staticmethod
-    def scan_directory(path: Path, top_n: int = 50) -> list[DirInfo]:
-        dirs = []
-        try:
-            for entry in os.scandir(path):
-                if entry.is_dir(follow_symlinks=False):
-                    try:
-                        total_size = 0
-                        file_count = 0
-                        for root, _, files in os.walk(entry.path, onerror=lambda e: None):
-                            for f in files:
-                                try:
-                                    total_size += os.path.getsize(os.path.join(root, f))
-                                    file_count += 1
-                                except (OSError, PermissionError):
-                                    continue
-                        dirs.append(DirInfo(entry.path, total_size, file_count))
-                    except PermissionError:
-                        continue
-        except PermissionError:
-            return []
-        dirs.sort(key=lambda d: d.size, reverse=True)
-        return dirs[:top_n]
+    def build_tree(
+        path: Path, workers: int | None = None, exclude: Exclusions | None = None
+    ) -> DirTree:
+        """一次遍历建立整棵目录大小树，后续下钻与排序无需再读磁盘
+
+        workers 大于 1 时并行读取目录，适合 NFS/SMB 等高延迟文件系统。
+        exclude 默认跳过伪文件系统，可指定 one_filesystem 等规则。
+        """
+        visitor = DirTreeVisitor(path)
+        scan_tree(path, [visitor], workers=workers, exclude=exclude)
+        return visitor.build()
+
+    @staticmethod
+    def snapshot(
+        path: Path,
+        store: "DiskSnapshotStore | None" = None,
+        workers: int | None = None,
+        exclude: Exclusions | None = None,
+    ) -> Path:
+        """扫描并保存压缩快照，之后可用 DiskSnapshotStore.diff 对比增长"""
+        from .disk_snapshot import DiskSnapshotStore
+
+        store = store or DiskSnapshotStore()
+        return store.save(DiskUsageAnalyzer.build_tree(path, workers, exclude))
+
+    @staticmethod
+    def breakdown(
+        path: Path, workers: int | None = None, exclude: Exclusions | None = None
+    ) -> UsageRecords:
+        """一次遍历记录每个文件，之后可按扩展名、属主、时间段、大小区间任意分组"""
+        visitor = UsageRecordsVisitor(path)
+        scan_tree(path, [visitor], workers=workers, exclude=exclude)
+        return visitor.records
+
+    @staticmethod
+    def scan_directory(
+        path: Path,
+        top_n: int = 50,
+        workers: int | None = None,
+        exclude: Exclusions | None = None,
+    ) -> list[DirInfo]:
+        """统计各子目录大小，硬链接文件在整个扫描中只计一次"""
+        return DiskUsageAnalyzer.build_tree(path, workers, exclude).child_infos(0, top_n)
+
+    @staticmethod
+    def scan(
+        path: Path,
+        min_size_mb: int = 100,
+        limit: int = 50,
+        workers: int | None = None,
+        exclude: Exclusions | None = None,
+    ) -> tuple[DirTree, list[BigFile]]:
+        """一次遍历同时建立目录树并查找大文件"""
+        tree_visitor = DirTreeVisitor(path)
+        big_visitor = BigFileVisitor(min_size_mb * 1024 * 1024, limit)
+        scan_tree(path, [tree_visitor, big_visitor], workers=workers, exclude=exclude)
+        files = [BigFile(f.path, f.size) for f in big_visitor.result()]
+        return tree_visitor.build(), files
 
     @staticmethod
-    def find_big_files(path: Path, min_size_mb: int = 100, limit: int = 50) -> list[BigFile]:
-        min_size = min_size_mb * 1024 * 1024
-        files = []
-        for root, _, filenames in os.walk(path, onerror=lambda e: None):
-            for f in filenames:
-                try:
-                    full = os.path.join(root, f)
-                    size = os.path.getsize(full)
-                    if size >= min_size:
-                        files.append(BigFile(full, size))
-                except (OSError, PermissionError):
-                    continue
-        files.sort(key=lambda f: f.size, reverse=True)
-        return files[:limit]
+    def find_big_files(
+        path: Path,
+        min_size_mb: int = 100,
+        limit: int = 50,
+        workers: int | None = None,
+        exclude: Exclusions | None = None,
+    ) -> list[BigFile]:
+        visitor = BigFileVisitor(min_size_mb * 1024 * 1024, limit)
+        scan_tree(path, [visitor], workers=workers, exclude=exclude)
+        return [BigFile(f.path, f.size) for f in visitor.result()]
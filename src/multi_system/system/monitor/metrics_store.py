@@ -0,0 +1,414 @@
+"""
+指标记录与回放
+
+把仪表盘指标追加写入 data/metrics/ 下的分段文件。每个分段由若干数据块组成，
+每块按列保存一段时间内的采样：时间戳以毫秒增量编码，数值列做字节重排
+（所有值的第 0 字节在前，其次第 1 字节……）后用 zlib 压缩，相近的浮点数
+因此能压缩到原始大小的一小部分。数据块只追加，进程崩溃最多丢失未写出的一块；
+再次打开分段时截掉写到一半的末尾块。
+
+分段以 UTC 开始时间命名（如 20240101-000000Z.mseg），不受时区与夏令时切换影响。
+
+分段按时间或大小轮换，超过保留期或总大小上限的旧分段被删除。查询时用 mmap
+映射分段，只解析块头，再解压与时间范围重叠的块中被请求的列。
+
+定时记录示例: python -m multi_system.system.monitor.metrics_store
+"""
+
+import contextlib
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import accumulate
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from multi_system.core.data_manager import DataManager
+
+from .timeseries import snapshot_values
+
+if TYPE_CHECKING:
+    from .sampler import MetricsSampler, MetricsSnapshot
+
+_MAGIC = b"MSMS1\n"
+# 块头: 标记, 行数, 首末时间戳(毫秒), 列信息 JSON 长度
+_BLOCK = struct.Struct("<4sIqqI")
+_BLOCK_TAG = b"BLK1"
+
+_NAME_FORMAT = "%Y%m%d-%H%M%SZ"
+_LEGACY_NAME_FORMAT = "%Y%m%d-%H%M%S"  # 早期版本按本地时间命名
+
+
+@dataclass
+class SegmentInfo:
+    path: Path
+    start: datetime
+    size: int
+
+
+def _to_bytes(arr: array) -> bytes:
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    arr = array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+def _shuffle(data: bytes, width: int = 8) -> bytes:
+    return b"".join(data[i::width] for i in range(width))
+
+
+def _unshuffle(data: bytes, width: int = 8) -> bytes:
+    n = len(data) // width
+    out = bytearray(len(data))
+    for i in range(width):
+        out[i::width] = data[i * n:(i + 1) * n]
+    return bytes(out)
+
+
+def encode_block(times: list[float], columns: dict[str, list[float]]) -> bytes:
+    """一个数据块：块头 + 列信息 + 各列压缩数据"""
+    ms = [round(t * 1000) for t in times]
+    deltas = array("q", [0] * len(ms))
+    for i in range(1, len(ms)):
+        deltas[i] = ms[i] - ms[i - 1]
+    parts = [zlib.compress(_to_bytes(deltas), 6)]
+    for values in columns.values():
+        parts.append(zlib.compress(_shuffle(_to_bytes(array("d", values))), 6))
+    meta = json.dumps({"columns": list(columns), "sizes": [len(p) for p in parts]}).encode()
+    header = _BLOCK.pack(_BLOCK_TAG, len(ms), ms[0], ms[-1], len(meta))
+    return b"".join([header, meta, *parts])
+
+
+@dataclass
+class _Block:
+    rows: int
+    t_first: float
+    t_last: float
+    columns: dict[str, tuple[int, int]]  # 列名 -> (偏移, 长度)
+    times: tuple[int, int]
+    end: int  # 块在文件中的结束位置
+
+
+def _iter_blocks(buf) -> Iterator[_Block]:
+    """解析块头，遇到不完整的末尾块时停止"""
+    pos = len(_MAGIC)
+    end = len(buf)
+    while pos + _BLOCK.size <= end:
+        tag, rows, first, last, meta_len = _BLOCK.unpack_from(buf, pos)
+        if tag != _BLOCK_TAG:
+            return
+        pos += _BLOCK.size
+        if pos + meta_len > end:
+            return
+        try:
+            meta = json.loads(bytes(buf[pos:pos + meta_len]))
+        except ValueError:
+            return
+        pos += meta_len
+        sizes = meta["sizes"]
+        if pos + sum(sizes) > end:
+            return
+        offsets = list(accumulate(sizes, initial=pos))
+        yield _Block(
+            rows,
+            first / 1000,
+            last / 1000,
+            {
+                name: (offsets[i + 1], sizes[i + 1])
+                for i, name in enumerate(meta["columns"])
+            },
+            (offsets[0], sizes[0]),
+            offsets[-1],
+        )
+        pos = offsets[-1]
+
+
+def _segment_name(t: float) -> str:
+    return f"{datetime.fromtimestamp(t, timezone.utc):{_NAME_FORMAT}}.mseg"
+
+
+def _parse_segment_name(stem: str) -> datetime:
+    if stem.endswith("Z"):
+        return datetime.strptime(stem, _NAME_FORMAT).replace(tzinfo=timezone.utc)
+    return datetime.strptime(stem, _LEGACY_NAME_FORMAT).astimezone(timezone.utc)
+
+
+def _valid_length(path: Path) -> int:
+    """分段中最后一个完整数据块的结束位置，文件头不完整时为 0"""
+    with _map(path) as buf:
+        if buf is None:
+            return 0
+        end = len(_MAGIC)
+        for block in _iter_blocks(buf):
+            end = block.end
+        return end
+
+
+class MetricsRecorder:
+    """
+    把指标追加写入分段文件
+
+    Args:
+        data_manager: 数据目录，分段保存在 data/metrics/
+        block_rows: 每块的行数；1 Hz 采样时默认每分钟写出一块
+        rotate_seconds: 分段最长覆盖的时间
+        max_segment_bytes: 分段大小上限
+        retention_days: 保留天数
+        max_total_bytes: 所有分段的总大小上限
+    """
+
+    def __init__(
+        self,
+        data_manager: DataManager | None = None,
+        block_rows: int = 60,
+        rotate_seconds: float = 3600,
+        max_segment_bytes: int = 16 * 1024 * 1024,
+        retention_days: float = 7,
+        max_total_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.archive = MetricsArchive(data_manager)
+        self.block_rows = block_rows
+        self.rotate_seconds = rotate_seconds
+        self.max_segment_bytes = max_segment_bytes
+        self.retention_days = retention_days
+        self.max_total_bytes = max_total_bytes
+        self._times: list[float] = []
+        self._columns: dict[str, list[float]] = {}
+        self._file = None
+        self._segment_start = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, t: float, values: dict[str, float]) -> None:
+        """追加一行；缺失的列记为 NaN"""
+        with self._lock:
+            rows = len(self._times)
+            for name in values.keys() - self._columns.keys():
+                self._columns[name] = [math.nan] * rows
+            for name, col in self._columns.items():
+                col.append(values.get(name, math.nan))
+            self._times.append(t)
+            if rows + 1 >= self.block_rows:
+                self._write_block()
+
+    def add_snapshot(self, snap: "MetricsSnapshot") -> None:
+        self.add(snap.timestamp, snapshot_values(snap))
+
+    def attach(self, sampler: "MetricsSampler") -> Callable[[], None]:
+        """订阅采样器的快照，返回取消订阅的函数"""
+        return sampler.subscribe(self.add_snapshot)
+
+    def _open_segment(self, t: float) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = self.archive.dir / _segment_name(t)
+        self._file = path.open("ab")
+        size = self._file.tell()
+        if size:
+            # 同一秒内重启时会打开崩溃前的分段，之后的块不能接在不完整的块后面
+            valid = _valid_length(path)
+            if valid < size:
+                self._file.truncate(valid)
+                self._file.seek(0, os.SEEK_END)
+                size = valid
+        if size == 0:
+            self._file.write(_MAGIC)
+        self._segment_start = t
+        self.archive.prune(self.retention_days, self.max_total_bytes, keep=path)
+
+    def _write_block(self) -> None:
+        if not self._times:
+            return
+        t = self._times[0]
+        if (
+            self._file is None
+            or t - self._segment_start >= self.rotate_seconds
+            or self._file.tell() >= self.max_segment_bytes
+        ):
+            self._open_segment(t)
+        self._file.write(encode_block(self._times, self._columns))
+        self._file.flush()
+        self._times = []
+        self._columns = {}
+
+    def flush(self) -> None:
+        """立即写出未满的块"""
+        with self._lock:
+            self._write_block()
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_block()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class MetricsArchive:
+    """读取已记录的分段"""
+
+    def __init__(self, data_manager: DataManager | None = None):
+        self.dir = (data_manager or DataManager()).get_data_dir("metrics")
+
+    def segments(self) -> list[SegmentInfo]:
+        """按开始时间升序列出分段"""
+        infos = []
+        for p in self.dir.glob("*.mseg"):
+            try:
+                start = _parse_segment_name(p.stem)
+                size = p.stat().st_size
+            except (ValueError, OSError):
+                continue
+            infos.append(SegmentInfo(p, start, size))
+        infos.sort(key=lambda s: s.start)
+        return infos
+
+    def prune(
+        self,
+        retention_days: float = 7,
+        max_total_bytes: int | None = None,
+        keep: Path | None = None,
+    ) -> int:
+        """删除超过保留期的分段，总大小超限时从最旧的开始删除，返回删除数量"""
+        segments = [s for s in self.segments() if s.path != keep]
+        cutoff = time.time() - retention_days * 86400
+        total = sum(s.size for s in segments)
+        if keep is not None and keep.exists():
+            total += keep.stat().st_size
+        removed = 0
+        for i, seg in enumerate(segments):
+            # 分段的结束时间不晚于下一分段的开始时间
+            end = segments[i + 1].start.timestamp() if i + 1 < len(segments) else time.time()
+            over = max_total_bytes is not None and total > max_total_bytes
+            if end >= cutoff and not over:
+                break
+            try:
+                seg.path.unlink()
+            except OSError:
+                continue
+            total -= seg.size
+            removed += 1
+        return removed
+
+    def _overlapping(self, start: float, end: float) -> list[Path]:
+        segments = self.segments()
+        paths = []
+        for i, seg in enumerate(segments):
+            seg_end = segments[i + 1].start.timestamp() if i + 1 < len(segments) else math.inf
+            if seg.start.timestamp() <= end and seg_end >= start:
+                paths.append(seg.path)
+        return paths
+
+    def series_names(self, start: float = 0, end: float = math.inf) -> list[str]:
+        names: set[str] = set()
+        for path in self._overlapping(start, end):
+            with _map(path) as buf:
+                if buf is None:
+                    continue
+                for block in _iter_blocks(buf):
+                    if block.t_last >= start and block.t_first <= end:
+                        names.update(block.columns)
+        return sorted(names)
+
+    def query(
+        self,
+        names: Iterable[str],
+        start: float = 0,
+        end: float | None = None,
+    ) -> dict[str, tuple[array, array]]:
+        """
+        读取时间范围内的序列
+
+        Args:
+            names: 序列名，如 "cpu"、"memory"、"net.recv"
+            start: 开始时间戳（秒）
+            end: 结束时间戳，默认为当前时间
+
+        Returns:
+            序列名 -> (时间数组, 值数组)；块中不存在该列或值为 NaN 的行被跳过
+        """
+        end = time.time() if end is None else end
+        names = list(names)
+        result = {name: (array("d"), array("d")) for name in names}
+        for path in self._overlapping(start, end):
+            with _map(path) as buf:
+                if buf is None:
+                    continue
+                for block in _iter_blocks(buf):
+                    if block.t_last < start or block.t_first > end:
+                        continue
+                    wanted = [n for n in names if n in block.columns]
+                    if not wanted:
+                        continue
+                    off, size = block.times
+                    deltas = _from_bytes("q", zlib.decompress(buf[off:off + size]))
+                    first = round(block.t_first * 1000)
+                    times = [ms / 1000 for ms in accumulate(deltas, initial=first)][1:]
+                    lo = 0 if block.t_first >= start else next(
+                        (i for i, t in enumerate(times) if t >= start), len(times)
+                    )
+                    hi = len(times) if block.t_last <= end else next(
+                        (i for i, t in enumerate(times) if t > end), len(times)
+                    )
+                    for name in wanted:
+                        off, size = block.columns[name]
+                        raw = _unshuffle(zlib.decompress(buf[off:off + size]))
+                        values = _from_bytes("d", raw)
+                        out_t, out_v = result[name]
+                        for i in range(lo, hi):
+                            v = values[i]
+                            if v == v:  # 跳过 NaN
+                                out_t.append(times[i])
+                                out_v.append(v)
+        return result
+
+
+@contextlib.contextmanager
+def _map(path: Path) -> Iterator[mmap.mmap | None]:
+    """只读映射分段文件；空文件、无法读取或格式不符时得到 None"""
+    try:
+        f = path.open("rb")
+    except OSError:
+        yield None
+        return
+    with f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            yield None
+            return
+        with mm:
+            yield mm if mm[:len(_MAGIC)] == _MAGIC else None
+
+
+if __name__ == "__main__":
+    from .sampler import MetricsSampler
+
+    recorder = MetricsRecorder()
+    sampler = MetricsSampler.shared()
+    recorder.attach(sampler)
+    print(f"正在记录指标到 {recorder.archive.dir}，Ctrl+C 结束")
+    with sampler:
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pass
+    recorder.close()
@@ -2,10 +2,18 @@
 进程管理器
 """
 
-from dataclasses import dataclass
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
 import psutil
 
+if TYPE_CHECKING:
+    from .procfs import ProcfsTracker
+
+_SORT_KEYS = {"cpu": "cpu_percent", "mem": "memory_percent", "pid": "pid", "name": "name"}
+
 
 @dataclass
 class ProcessInfo:
@@ -20,31 +28,164 @@ class ProcessInfo:
     create_time: float
 
 
+@dataclass
+class ProcessDiff:
+    added: list[ProcessInfo] = field(default_factory=list)
+    removed: list[ProcessInfo] = field(default_factory=list)
+    changed: list[ProcessInfo] = field(default_factory=list)  # CPU、内存或状态有变化
+
+
+def sort_processes(procs: list[ProcessInfo], sort_by: str = "cpu") -> list[ProcessInfo]:
+    procs.sort(
+        key=lambda p: getattr(p, _SORT_KEYS.get(sort_by, "cpu_percent")),
+        reverse=sort_by != "name",
+    )
+    return procs
+
+
+def match_processes(procs: list[ProcessInfo], keyword: str) -> list[ProcessInfo]:
+    keyword = keyword.lower()
+    return [
+        p for p in procs
+        if keyword in p.name.lower() or keyword in p.cmdline.lower() or keyword in str(p.pid)
+    ]
+
+
+def _reused(pid: int, create_time: float) -> bool:
+    """PID 是否已被新进程复用；psutil 会缓存每个句柄的 create_time()，需用新句柄读取"""
+    try:
+        return psutil.Process(pid).create_time() != create_time
+    except psutil.NoSuchProcess:
+        return True
+    except psutil.AccessDenied:
+        return False
+
+
+class ProcessTracker:
+    """
+    跨刷新保留 psutil.Process 对象的进程表
+
+    名称、用户、命令行与启动时间每个 PID 只读取一次，之后每次刷新只读取
+    CPU 时间、内存与状态。CPU 占用按两次刷新之间的增量计算，新出现的进程
+    在第一次刷新时为 0。PID 被复用时按启动时间识别为新进程。
+    无权读取或已成为僵尸的进程同样列出，读不到的字段留空。
+    """
+
+    def __init__(self):
+        self._procs: dict[int, psutil.Process] = {}
+        self._infos: dict[int, ProcessInfo] = {}
+        self._lock = threading.Lock()
+
+    def _track(self, pid: int) -> ProcessInfo | None:
+        try:
+            p = psutil.Process(pid)
+            # 无权读取或已成为僵尸的进程同样记录，读不到的字段留空，之后不再重复探测
+            attrs = p.as_dict(["name", "username", "cmdline", "create_time"], ad_value=None)
+        except psutil.NoSuchProcess:
+            return None
+        self._procs[pid] = p
+        return ProcessInfo(
+            pid=pid,
+            name=attrs["name"] or "",
+            username=attrs["username"] or "",
+            cpu_percent=0.0,
+            memory_percent=0.0,
+            memory_mb=0.0,
+            status="",
+            cmdline=" ".join(attrs["cmdline"] or [])[:200],
+            create_time=attrs["create_time"] or 0.0,
+        )
+
+    def refresh(self) -> ProcessDiff:
+        """重新采样所有进程，返回与上次刷新相比的变化"""
+        with self._lock:
+            diff = ProcessDiff()
+            total_mem = psutil.virtual_memory().total or 1
+            pids = set(psutil.pids())
+            for pid in list(self._infos):
+                if pid not in pids:
+                    self._procs.pop(pid, None)
+                    diff.removed.append(self._infos.pop(pid))
+
+            for pid in pids:
+                old = self._infos.get(pid)
+                p = self._procs.get(pid)
+                if old is not None and p is not None and _reused(pid, old.create_time):
+                    # PID 被复用：原进程已退出，当作移除后新增
+                    diff.removed.append(self._infos.pop(pid))
+                    del self._procs[pid]
+                    old = p = None
+                info = old
+                if p is None:
+                    info = self._track(pid)
+                    if info is None:
+                        continue
+                    p = self._procs[pid]
+                try:
+                    with p.oneshot():
+                        cpu = p.cpu_percent(None)  # 新进程首次调用返回 0 并记录基准
+                        rss = p.memory_info().rss
+                        status = p.status()
+                except psutil.ZombieProcess:
+                    cpu, rss, status = 0.0, 0, psutil.STATUS_ZOMBIE
+                except psutil.NoSuchProcess:
+                    del self._procs[pid]
+                    if old is not None:
+                        diff.removed.append(self._infos.pop(pid))
+                    continue
+                except psutil.AccessDenied:
+                    cpu, rss, status = 0.0, 0, info.status
+
+                new = ProcessInfo(
+                    pid=pid,
+                    name=info.name,
+                    username=info.username,
+                    cpu_percent=cpu,
+                    memory_percent=rss * 100 / total_mem,
+                    memory_mb=rss / 1024 / 1024,
+                    status=status,
+                    cmdline=info.cmdline,
+                    create_time=info.create_time,
+                )
+                self._infos[pid] = new
+                if old is None:
+                    diff.added.append(new)
+                elif (
+                    old.cpu_percent != new.cpu_percent
+                    or old.memory_mb != new.memory_mb
+                    or old.status != new.status
+                ):
+                    diff.changed.append(new)
+            return diff
+
+    def processes(self, sort_by: str = "cpu") -> list[ProcessInfo]:
+        """最近一次刷新的结果"""
+        with self._lock:
+            procs = list(self._infos.values())
+        return sort_processes(procs, sort_by)
+
+    def search(self, keyword: str) -> list[ProcessInfo]:
+        return match_processes(self.processes(), keyword)
+
+
+def create_tracker() -> "ProcessTracker | ProcfsTracker":
+    """Linux 上直接读取 /proc，其他平台或 /proc 不可用时使用 psutil"""
+    if sys.platform.startswith("linux"):
+        from .procfs import ProcfsTracker, procfs_available
+
+        if procfs_available():
+            return ProcfsTracker()
+    return ProcessTracker()
+
+
 class ProcessManager:
+    # list_processes / search 共用，使连续调用之间的 CPU 占用有意义
+    _tracker = create_tracker()
+
     @staticmethod
     def list_processes(sort_by: str = "cpu") -> list[ProcessInfo]:
-        procs = []
-        for p in psutil.process_iter(["pid", "name", "username", "cpu_percent", "memory_percent", "status", "cmdline", "create_time", "memory_info"]):
-            try:
-                info = p.info
-                mem = info.get("memory_info")
-                procs.append(ProcessInfo(
-                    pid=info["pid"],
-                    name=info["name"] or "",
-                    username=info["username"] or "",
-                    cpu_percent=info["cpu_percent"] or 0.0,
-                    memory_percent=info["memory_percent"] or 0.0,
-                    memory_mb=mem.rss / 1024 / 1024 if mem else 0.0,
-                    status=info["status"] or "",
-                    cmdline=" ".join(info["cmdline"] or [])[:200],
-                    create_time=info["create_time"] or 0.0,
-                ))
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-
-        key_map = {"cpu": "cpu_percent", "mem": "memory_percent", "pid": "pid", "name": "name"}
-        procs.sort(key=lambda p: getattr(p, key_map.get(sort_by, "cpu_percent")), reverse=sort_by != "name")
-        return procs
+        ProcessManager._tracker.refresh()
+        return ProcessManager._tracker.processes(sort_by)
 
     @staticmethod
     def kill(pid: int, force: bool = False) -> bool:
@@ -57,8 +198,4 @@ class ProcessManager:
 
     @staticmethod
     def search(keyword: str) -> list[ProcessInfo]:
-        keyword = keyword.lower()
-        return [
-            p for p in ProcessManager.list_processes()
-            if keyword in p.name.lower() or keyword in p.cmdline.lower() or keyword in str(p.pid)
-        ]
+        return match_processes(ProcessManager.list_processes(), keyword)
@@ -0,0 +1,206 @@
+"""
+Linux /proc 进程采集
+
+直接读取 /proc/[pid] 下的文件，绕过 psutil 为每个进程创建对象与逐项调用的开销。
+名称、用户、命令行只在 PID 首次出现时读取（stat、status、cmdline），之后每次刷新每个进程只读 stat 与 statm，
+且只转换用到的字段：状态、utime/stime、启动时间与常驻内存。
+stat 中的 RSS 是按线程延迟汇总的计数，与 psutil 一致改从 statm 读取。
+
+结果与 ProcessTracker 相同，均为 ProcessInfo 记录。
+"""
+
+import os
+import threading
+import time
+from typing import Any
+
+import psutil
+
+from .processes import ProcessDiff, ProcessInfo, match_processes, sort_processes
+
+try:
+    import pwd
+except ImportError:
+    pwd: Any = None
+
+_PROC = "/proc"
+
+# stat 中 ")" 之后的字段序号（proc(5) 中的字段号减 3）
+_STATE, _UTIME, _STIME, _STARTTIME = 0, 11, 12, 19
+
+# 与 psutil 的状态名保持一致
+_STATUS = {
+    b"R": "running",
+    b"S": "sleeping",
+    b"D": "disk-sleep",
+    b"T": "stopped",
+    b"t": "tracing-stop",
+    b"Z": "zombie",
+    b"X": "dead",
+    b"x": "dead",
+    b"K": "wake-kill",
+    b"W": "waking",
+    b"P": "parked",
+    b"I": "idle",
+}
+
+
+def procfs_available() -> bool:
+    return os.path.exists(f"{_PROC}/self/stat")
+
+
+def _read(path: str) -> bytes | None:
+    """一次 read 读完 /proc 下的小文件，进程已退出时返回 None"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        chunks = []
+        while chunk := os.read(fd, 65536):
+            chunks.append(chunk)
+        return b"".join(chunks)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def _split_stat(data: bytes) -> tuple[bytes, list[bytes]]:
+    """stat 拆为 (comm, ")" 之后的字段)；comm 可能包含空格和括号，按最后一个 ")" 切分"""
+    r = data.rfind(b")")
+    comm = data[data.find(b"(") + 1:r]
+    return comm, data[r + 2:].split(None, _STARTTIME + 1)
+
+
+class ProcfsTracker:
+    """
+    基于 /proc 的进程表，接口与 ProcessTracker 相同
+
+    CPU 占用按两次刷新之间 utime + stime 的增量与经过时间计算，
+    与 psutil.Process.cpu_percent 一样可超过 100%。
+    """
+
+    def __init__(self):
+        self._clk_tck = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+        self._boot_time = psutil.boot_time()
+        self._users: dict[int, str] = {}
+        # pid -> (启动时间 ticks, 上次 utime + stime ticks)
+        self._ticks: dict[int, tuple[int, int]] = {}
+        self._infos: dict[int, ProcessInfo] = {}
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def _username(self, uid: int) -> str:
+        name = self._users.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name if pwd is not None else str(uid)
+            except KeyError:
+                name = str(uid)
+            self._users[uid] = name
+        return name
+
+    def _track(self, pid: int, comm: bytes, starttime: int) -> ProcessInfo | None:
+        status = _read(f"{_PROC}/{pid}/status")
+        if status is None:
+            return None
+        username = ""
+        pos = status.find(b"\nUid:")
+        if pos >= 0:
+            username = self._username(int(status[pos + 5:status.index(b"\n", pos + 5)].split()[0]))
+        raw = _read(f"{_PROC}/{pid}/cmdline") or b""
+        args = raw.rstrip(b"\0").split(b"\0") if raw else []
+        name = comm.decode(errors="replace")
+        if len(comm) >= 15 and args:
+            # comm 被截断为 15 字节，尝试从命令行取完整名称
+            exe = os.path.basename(args[0].decode(errors="replace"))
+            if exe.startswith(name):
+                name = exe
+        return ProcessInfo(
+            pid=pid,
+            name=name,
+            username=username,
+            cpu_percent=0.0,
+            memory_percent=0.0,
+            memory_mb=0.0,
+            status="",
+            cmdline=b" ".join(args).decode(errors="replace")[:200],
+            create_time=round(self._boot_time + starttime / self._clk_tck, 2),
+        )
+
+    def refresh(self) -> ProcessDiff:
+        """重新读取所有进程，返回与上次刷新相比的变化"""
+        with self._lock:
+            diff = ProcessDiff()
+            now = time.monotonic()
+            elapsed = now - self._last if self._last else 0.0
+            self._last = now
+            total_mem = psutil.virtual_memory().total or 1
+            pids = {int(name) for name in os.listdir(_PROC) if name.isdigit()}
+            for pid in list(self._infos):
+                if pid not in pids:
+                    self._ticks.pop(pid, None)
+                    diff.removed.append(self._infos.pop(pid))
+
+            for pid in pids:
+                data = _read(f"{_PROC}/{pid}/stat")
+                statm = _read(f"{_PROC}/{pid}/statm")
+                old = self._infos.get(pid)
+                if data is None or statm is None:
+                    if old is not None:
+                        self._ticks.pop(pid, None)
+                        diff.removed.append(self._infos.pop(pid))
+                    continue
+                comm, fields = _split_stat(data)
+                starttime = int(fields[_STARTTIME])
+                cpu_ticks = int(fields[_UTIME]) + int(fields[_STIME])
+                prev = self._ticks.get(pid)
+                if prev is not None and prev[0] != starttime:
+                    # PID 被复用：原进程已退出，当作移除后新增
+                    del self._ticks[pid]
+                    if old is not None:
+                        diff.removed.append(self._infos.pop(pid))
+                    old = prev = None
+                info = old
+                if info is None:
+                    info = self._track(pid, comm, starttime)
+                    if info is None:
+                        continue
+                cpu = 0.0
+                if prev is not None and elapsed > 0:
+                    cpu = round((cpu_ticks - prev[1]) / self._clk_tck / elapsed * 100, 1)
+                self._ticks[pid] = (starttime, cpu_ticks)
+                rss = int(statm.split(None, 2)[1]) * self._page_size
+
+                new = ProcessInfo(
+                    pid=pid,
+                    name=info.name,
+                    username=info.username,
+                    cpu_percent=cpu,
+                    memory_percent=rss * 100 / total_mem,
+                    memory_mb=rss / 1024 / 1024,
+                    status=_STATUS.get(fields[_STATE], "?"),
+                    cmdline=info.cmdline,
+                    create_time=info.create_time,
+                )
+                self._infos[pid] = new
+                if old is None:
+                    diff.added.append(new)
+                elif (
+                    old.cpu_percent != new.cpu_percent
+                    or old.memory_mb != new.memory_mb
+                    or old.status != new.status
+                ):
+                    diff.changed.append(new)
+            return diff
+
+    def processes(self, sort_by: str = "cpu") -> list[ProcessInfo]:
+        """最近一次刷新的结果"""
+        with self._lock:
+            procs = list(self._infos.values())
+        return sort_processes(procs, sort_by)
+
+    def search(self, keyword: str) -> list[ProcessInfo]:
+        return match_processes(self.processes(), keyword)
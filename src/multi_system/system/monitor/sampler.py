@@ -0,0 +1,211 @@
+"""
+后台指标采样
+
+一个后台线程按固定间隔采集 CPU、内存、磁盘与网络计数器，自行计算
+两次采样之间的 CPU 占用与 I/O 速率，发布为不可变的 MetricsSnapshot。
+读取方直接取最新快照，不会阻塞；界面、命令行与导出器共用同一个采样循环。
+"""
+
+import contextlib
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import psutil
+
+from .dashboard import (
+    CpuStats,
+    DiskStats,
+    MemoryStats,
+    NetworkStats,
+    SystemDashboard,
+    cpu_percent_between,
+)
+
+
+@dataclass(frozen=True)
+class RateStats:
+    """两次采样之间的平均速率（字节/秒）"""
+
+    net_sent: float
+    net_recv: float
+    disk_read: float
+    disk_write: float
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    seq: int  # 从 1 开始递增，读取方可据此判断是否有新数据
+    timestamp: float  # time.time()
+    cpu: CpuStats
+    memory: MemoryStats
+    disks: tuple[DiskStats, ...]
+    network: NetworkStats
+    rates: RateStats
+
+
+class MetricsSampler:
+    """
+    后台采样服务
+
+    Args:
+        interval: 采样间隔(秒)
+        disk_interval: 磁盘容量的刷新间隔(秒)；逐个挂载点 statvfs 较慢，默认低频刷新
+    """
+
+    _shared: "MetricsSampler | None" = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, interval: float = 1.0, disk_interval: float = 10.0):
+        self.interval = interval
+        self.disk_interval = disk_interval
+        self._latest: MetricsSnapshot | None = None
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._users = 0
+        self._subscribers: list[Callable[[MetricsSnapshot], None]] = []
+
+    @classmethod
+    def shared(cls) -> "MetricsSampler":
+        """进程内共享的采样器，各使用方通过 acquire/release 共用一个采样线程"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @property
+    def latest(self) -> MetricsSnapshot | None:
+        """最新快照，尚未完成首次采样时为 None"""
+        return self._latest
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def acquire(self) -> "MetricsSampler":
+        """登记一个使用方，第一个使用方启动采样线程"""
+        with self._cond:
+            self._users += 1
+            if not self.running:
+                # 每个线程使用自己的停止事件，刚被停止的旧线程不会因此复活
+                self._stop = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._stop,), name="metrics-sampler", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def release(self, timeout: float | None = 0.0) -> None:
+        """
+        注销一个使用方，最后一个使用方离开时停止采样线程
+
+        Args:
+            timeout: 等待采样线程退出的秒数。默认只发出停止信号不等待，
+                界面线程调用时不会被卡在慢速的磁盘统计上；None 表示一直等待
+        """
+        with self._cond:
+            self._users = max(self._users - 1, 0)
+            if self._users:
+                return
+            self._stop.set()
+            thread, self._thread = self._thread, None
+        if timeout != 0 and thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def __enter__(self) -> "MetricsSampler":
+        return self.acquire()
+
+    def __exit__(self, *exc) -> None:
+        # 脚本中离开 with 后通常紧接着关闭订阅方，等线程退出以免再收到回调
+        self.release(timeout=5.0)
+
+    def wait(self, after: int = 0, timeout: float | None = None) -> MetricsSnapshot | None:
+        """等待 seq 大于 after 的快照，超时返回当前最新快照（可能为 None）"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._latest is not None and self._latest.seq > after, timeout
+            )
+            return self._latest
+
+    def subscribe(self, callback: Callable[[MetricsSnapshot], None]) -> Callable[[], None]:
+        """每次发布快照时在采样线程中调用 callback，返回取消订阅的函数"""
+        with self._cond:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._cond:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _run(self, stop: threading.Event) -> None:
+        seq = self._latest.seq if self._latest else 0
+        cpu_prev = psutil.cpu_times(percpu=True)
+        net_prev = psutil.net_io_counters()
+        disk_prev = psutil.disk_io_counters()
+        t_prev = time.monotonic()
+        disks: tuple[DiskStats, ...] = ()
+        disk_due = t_prev
+        next_tick = t_prev + self.interval
+
+        while not stop.wait(max(next_tick - time.monotonic(), 0.0)):
+            now = time.monotonic()
+            # 错过的节拍直接跳过，避免在卡顿后连续补采
+            next_tick += self.interval * max(1, int((now - next_tick) / self.interval) + 1)
+            try:
+                cpu_now = psutil.cpu_times(percpu=True)
+                net_now = psutil.net_io_counters()
+                disk_now = psutil.disk_io_counters()
+                if now >= disk_due:
+                    disks = tuple(SystemDashboard.get_disk_stats())
+                    disk_due = now + self.disk_interval
+                percent, per_cpu = cpu_percent_between(cpu_prev, cpu_now)
+                freq = psutil.cpu_freq()
+                elapsed = max(now - t_prev, 1e-6)
+                snapshot = MetricsSnapshot(
+                    seq=seq + 1,
+                    timestamp=time.time(),
+                    cpu=CpuStats(
+                        percent=percent,
+                        per_cpu=tuple(per_cpu),
+                        freq_current=freq.current if freq else 0.0,
+                        freq_max=freq.max if freq else 0.0,
+                    ),
+                    memory=SystemDashboard.get_memory_stats(),
+                    disks=disks,
+                    network=NetworkStats(
+                        bytes_sent=net_now.bytes_sent, bytes_recv=net_now.bytes_recv,
+                        packets_sent=net_now.packets_sent, packets_recv=net_now.packets_recv,
+                    ),
+                    rates=RateStats(
+                        net_sent=_rate(net_prev, net_now, "bytes_sent", elapsed),
+                        net_recv=_rate(net_prev, net_now, "bytes_recv", elapsed),
+                        disk_read=_rate(disk_prev, disk_now, "read_bytes", elapsed),
+                        disk_write=_rate(disk_prev, disk_now, "write_bytes", elapsed),
+                    ),
+                )
+            except (OSError, RuntimeError):
+                continue  # 单次采样失败不影响后续采样
+            cpu_prev, net_prev, disk_prev, t_prev = cpu_now, net_now, disk_now, now
+            with self._cond:
+                if stop.is_set():
+                    # release 不等待线程退出：停止后采完的这一次不再发布
+                    return
+                seq += 1
+                self._latest = snapshot
+                subscribers = list(self._subscribers)
+                self._cond.notify_all()
+            for callback in subscribers:
+                # 使用方的异常不能中断采样线程
+                with contextlib.suppress(Exception):
+                    callback(snapshot)
+
+
+def _rate(before, after, field: str, elapsed: float) -> float:
+    # 计数器不可用（如容器中无磁盘统计）或回绕时速率记为 0
+    if before is None or after is None:
+        return 0.0
+    return max(getattr(after, field) - getattr(before, field), 0) / elapsed
@@ -0,0 +1,329 @@
+"""
+指标历史
+
+每个序列由固定容量的环形缓冲区组成，内存占用在创建时即确定：
+原始采样（约 1 秒一点）保留 1 小时，自动降采样为 10 秒一点保留 6 小时、
+1 分钟一点保留 24 小时。降采样的每个点保存 min/max/sum/count，
+窗口内的最小、最大与平均值在任何分辨率下都是精确的；百分位数在原始分辨率下
+精确，在降采样分辨率下按各点平均值近似。
+
+可直接订阅 MetricsSampler，把每个快照写入对应的序列。
+挂载点、CPU 编号等序列名会随时间变化，新建序列时淘汰超过最长保留时间未更新的序列，
+序列数仍达到上限时淘汰最久未更新的一个。
+"""
+
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .sampler import MetricsSampler, MetricsSnapshot
+
+# (分辨率秒数, 点数)：0 表示原始采样
+LEVELS = ((0, 3600), (10, 2160), (60, 1440))
+
+# 每个序列约 200 KB
+MAX_SERIES = 1024
+
+
+@dataclass(frozen=True)
+class WindowStats:
+    count: int  # 窗口内的原始采样数
+    min: float
+    max: float
+    avg: float
+    p50: float
+    p95: float
+    p99: float
+    resolution: int  # 计算所用的分辨率（秒），0 为原始采样
+
+
+def snapshot_values(snap: "MetricsSnapshot") -> dict[str, float]:
+    """快照展开为 序列名 -> 值：cpu、cpu.N、memory、swap、net.*、disk.*、disk:挂载点"""
+    values = {
+        "cpu": snap.cpu.percent,
+        "memory": snap.memory.percent,
+        "swap": snap.memory.swap_percent,
+        "net.sent": snap.rates.net_sent,
+        "net.recv": snap.rates.net_recv,
+        "disk.read": snap.rates.disk_read,
+        "disk.write": snap.rates.disk_write,
+    }
+    for i, p in enumerate(snap.cpu.per_cpu):
+        values[f"cpu.{i}"] = p
+    for d in snap.disks:
+        values[f"disk:{d.mountpoint}"] = d.percent
+    return values
+
+
+class _Ring:
+    """按时间顺序追加的定长环形缓冲区，每列一个 array('d')"""
+
+    def __init__(self, capacity: int, columns: int):
+        self.capacity = capacity
+        self.cols = [array("d", bytes(8 * capacity)) for _ in range(columns)]
+        self.start = 0
+        self.size = 0
+
+    def append(self, *values: float) -> None:
+        if self.size < self.capacity:
+            i = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            i = self.start
+            self.start = (self.start + 1) % self.capacity
+        for col, v in zip(self.cols, values, strict=True):
+            col[i] = v
+
+    def find(self, since: float, until: float) -> tuple[int, int]:
+        """时间戳落在 [since, until] 内的逻辑位置范围（第 0 列为时间戳）"""
+        ts, start, cap = self.cols[0], self.start, self.capacity
+
+        def key(i: int) -> float:
+            return ts[(start + i) % cap]
+
+        n = range(self.size)
+        return bisect_left(n, since, key=key), bisect_right(n, until, key=key)
+
+    def slice(self, column: int, lo: int, hi: int) -> array:
+        """逻辑位置 [lo, hi) 的一列数据，按时间顺序"""
+        if lo >= hi:
+            return array("d")
+        col = self.cols[column]
+        a = (self.start + lo) % self.capacity
+        b = (self.start + hi) % self.capacity
+        if a < b:
+            return col[a:b]
+        return col[a:] + col[:b]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.itemsize * len(c) for c in self.cols)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """已排序数据的线性插值百分位数"""
+    if not values:
+        return math.nan
+    pos = (len(values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+class Series:
+    """单个指标的多分辨率历史"""
+
+    def __init__(self, levels: tuple[tuple[int, int], ...] = LEVELS):
+        self.levels = levels
+        self.raw = _Ring(levels[0][1], 2)  # 时间, 值
+        # 降采样层: 桶起始时间, min, max, sum, count
+        self.rings = [_Ring(capacity, 5) for _, capacity in levels[1:]]
+        # 各降采样层尚未写入的当前桶 [起始时间, min, max, sum, count]
+        self._pending: list[list[float] | None] = [None] * len(self.rings)
+        self.last = -math.inf  # 最近一次采样的时间
+
+    def add(self, t: float, value: float) -> None:
+        self.last = t
+        self.raw.append(t, value)
+        self._feed(0, t, value, value, value, 1)
+
+    def _feed(
+        self, level: int, t: float, vmin: float, vmax: float, vsum: float, count: float
+    ) -> None:
+        if level >= len(self.rings):
+            return
+        res = self.levels[level + 1][0]
+        bucket = t - t % res
+        cur = self._pending[level]
+        if cur is not None and cur[0] == bucket:
+            cur[1] = min(cur[1], vmin)
+            cur[2] = max(cur[2], vmax)
+            cur[3] += vsum
+            cur[4] += count
+            return
+        if cur is not None:
+            # 桶已结束：写入本层并汇入更粗的一层
+            self.rings[level].append(*cur)
+            self._feed(level + 1, *cur)
+        self._pending[level] = [bucket, vmin, vmax, vsum, count]
+
+    @property
+    def nbytes(self) -> int:
+        return self.raw.nbytes + sum(r.nbytes for r in self.rings)
+
+    def _oldest(self, level: int) -> float | None:
+        ring = self.raw if level == 0 else self.rings[level - 1]
+        return ring.cols[0][ring.start] if ring.size else None
+
+    def pick_level(self, since: float) -> int:
+        """能覆盖 since 之后全部时间的最细分辨率"""
+        for level in range(len(self.levels)):
+            oldest = self._oldest(level)
+            if oldest is not None and oldest <= since:
+                return level
+        # 都不够长时用保留时间最长且有数据的一层
+        for level in range(len(self.levels) - 1, -1, -1):
+            if self._oldest(level) is not None:
+                return level
+        return 0
+
+    def _tail(self, level: int, since: float, until: float) -> list[list[float]]:
+        """尚未写入该层的数据：本层与更细各层的当前桶，按本层分辨率合并"""
+        res = self.levels[level][0]
+        merged: dict[float, list[float]] = {}
+        for cur in self._pending[:level]:
+            if cur is None:
+                continue
+            bucket = cur[0] - cur[0] % res
+            if not since <= bucket <= until:
+                continue
+            slot = merged.get(bucket)
+            if slot is None:
+                merged[bucket] = [bucket, *cur[1:]]
+            else:
+                slot[1] = min(slot[1], cur[1])
+                slot[2] = max(slot[2], cur[2])
+                slot[3] += cur[3]
+                slot[4] += cur[4]
+        return [merged[b] for b in sorted(merged)]
+
+    def _columns(self, level: int, since: float, until: float) -> list[array]:
+        """降采样层在窗口内的 [桶起始时间, min, max, sum, count] 各列"""
+        ring = self.rings[level - 1]
+        lo, hi = ring.find(since, until)
+        cols = [ring.slice(c, lo, hi) for c in range(5)]
+        for row in self._tail(level, since, until):
+            for col, v in zip(cols, row, strict=True):
+                col.append(v)
+        return cols
+
+    def points(
+        self, since: float, until: float = math.inf, level: int | None = None
+    ) -> tuple[array, array]:
+        """窗口内的 (时间, 值)；降采样层的值为桶内平均值，包括仍在累积的当前桶"""
+        if level is None:
+            level = self.pick_level(since)
+        if level == 0:
+            lo, hi = self.raw.find(since, until)
+            return self.raw.slice(0, lo, hi), self.raw.slice(1, lo, hi)
+        times, _, _, sums, counts = self._columns(level, since, until)
+        values = array("d", (s / c for s, c in zip(sums, counts, strict=True)))
+        return times, values
+
+    def stats(
+        self, since: float, until: float = math.inf, level: int | None = None
+    ) -> WindowStats | None:
+        """窗口内的统计，没有数据时返回 None"""
+        if level is None:
+            level = self.pick_level(since)
+        if level == 0:
+            lo, hi = self.raw.find(since, until)
+            values = self.raw.slice(1, lo, hi)
+            if not values:
+                return None
+            ordered = sorted(values)
+            count = len(values)
+            vmin, vmax, avg = ordered[0], ordered[-1], math.fsum(values) / count
+        else:
+            _, mins, maxs, sums, counts = self._columns(level, since, until)
+            if not counts:
+                return None
+            count = int(math.fsum(counts))
+            vmin, vmax = min(mins), max(maxs)
+            avg = math.fsum(sums) / count
+            ordered = sorted(s / c for s, c in zip(sums, counts, strict=True))
+        return WindowStats(
+            count=count,
+            min=vmin,
+            max=vmax,
+            avg=avg,
+            p50=_percentile(ordered, 0.50),
+            p95=_percentile(ordered, 0.95),
+            p99=_percentile(ordered, 0.99),
+            resolution=self.levels[level][0],
+        )
+
+
+class MetricsHistory:
+    """
+    按名称管理多个序列，线程安全
+
+    Args:
+        levels: (分辨率秒数, 点数) 列表，第一项为原始采样
+        max_series: 序列数上限
+    """
+
+    def __init__(
+        self, levels: tuple[tuple[int, int], ...] = LEVELS, max_series: int = MAX_SERIES
+    ):
+        self.levels = levels
+        self.max_series = max_series
+        # 最长保留时间（秒），原始采样按 1 秒一点计
+        self.retention = max(max(res, 1) * count for res, count in levels)
+        self._series: dict[str, Series] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, t: float) -> Series:
+        series = self._series.get(name)
+        if series is None:
+            stale = [n for n, s in self._series.items() if s.last < t - self.retention]
+            for n in stale:
+                del self._series[n]
+            if len(self._series) >= self.max_series:
+                del self._series[min(self._series, key=lambda n: self._series[n].last)]
+            series = self._series[name] = Series(self.levels)
+        return series
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return sorted(self._series)
+
+    @property
+    def nbytes(self) -> int:
+        """所有环形缓冲区的固定内存占用"""
+        with self._lock:
+            return sum(s.nbytes for s in self._series.values())
+
+    def add(self, name: str, t: float, value: float) -> None:
+        with self._lock:
+            self._get_or_create(name, t).add(t, value)
+
+    def add_snapshot(self, snap: "MetricsSnapshot") -> None:
+        """把一次采样写入 snapshot_values 列出的各序列"""
+        t = snap.timestamp
+        values = snapshot_values(snap)
+        with self._lock:
+            for name, value in values.items():
+                self._get_or_create(name, t).add(t, value)
+
+    def attach(self, sampler: "MetricsSampler") -> Callable[[], None]:
+        """订阅采样器的快照，返回取消订阅的函数"""
+        return sampler.subscribe(self.add_snapshot)
+
+    def points(
+        self, name: str, window: float, now: float | None = None, level: int | None = None
+    ) -> tuple[array, array]:
+        """最近 window 秒的 (时间, 值)，默认自动选择能覆盖窗口的最细分辨率"""
+        until = time.time() if now is None else now
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return array("d"), array("d")
+            return series.points(until - window, until, level)
+
+    def stats(
+        self, name: str, window: float, now: float | None = None, level: int | None = None
+    ) -> WindowStats | None:
+        """最近 window 秒的 min/max/avg/百分位数，没有数据时返回 None"""
+        until = time.time() if now is None else now
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return None
+            return series.stats(until - window, until, level)
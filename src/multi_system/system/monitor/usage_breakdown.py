@@ -0,0 +1,288 @@
+"""
+磁盘使用分类统计
+
+一次遍历把每个文件的大小、属主、修改/访问时间与扩展名记录在并行的 array 中，
+之后按扩展名、属主、时间段与大小区间任意组合分组、过滤都只读内存，
+例如"30 天前修改过的 *.log 各属主占用多少"无需重新扫描。
+
+安装了 numpy 时直接在 array 的缓冲区上向量化计算，否则逐条累加。
+"""
+
+import os
+import time
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from multi_system.files.walker import ScanEntry, ScanVisitor
+
+try:
+    import numpy as np
+except ImportError:
+    np: Any = None
+
+try:
+    import pwd
+except ImportError:
+    pwd: Any = None
+
+_DAY = 86400
+
+# 时间段边界（天），对应标签 "<1d" "1-7d" ... ">3y"
+AGE_EDGES = (1, 7, 30, 90, 365, 3 * 365)
+AGE_LABELS = ("<1d", "1-7d", "7-30d", "30-90d", "90d-1y", "1-3y", ">3y")
+
+# 大小区间边界（字节）
+SIZE_EDGES = (1, 4 << 10, 64 << 10, 1 << 20, 16 << 20, 256 << 20, 1 << 30)
+SIZE_LABELS = ("0", "<4K", "4K-64K", "64K-1M", "1M-16M", "16M-256M", "256M-1G", ">=1G")
+
+KEYS = ("ext", "uid", "mtime", "atime", "size")
+
+
+@dataclass
+class UsageGroup:
+    key: tuple  # 每个分组维度的取值：扩展名、uid 或区间序号
+    label: str
+    size: int
+    count: int
+
+
+def owner_name(uid: int) -> str:
+    """uid 对应的用户名，无法解析时返回数字"""
+    if pwd is not None:
+        try:
+            return pwd.getpwuid(uid).pw_name
+        except KeyError:
+            pass
+    return str(uid)
+
+
+def _normalize_ext(ext: str) -> str:
+    ext = ext.lower()
+    return ext if not ext or ext.startswith(".") else "." + ext
+
+
+class UsageRecords:
+    """
+    一次扫描得到的逐文件记录
+
+    字段保存在等长的 array 中：size('q')、uid('I')、mtime/atime('q'，秒)、
+    ext_id('I'，exts 中的序号)。时间段以扫描时刻 now 为基准计算。
+    """
+
+    def __init__(self, root: str, now: float | None = None):
+        self.root = root
+        self.now = int(now if now is not None else time.time())
+        self.size = array("q")
+        self.uid = array("I")
+        self.mtime = array("q")
+        self.atime = array("q")
+        self.ext_id = array("I")
+        self.exts: list[str] = []
+        self._ext_index: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.size)
+
+    @property
+    def total_size(self) -> int:
+        return sum(self.size)
+
+    def append(self, size: int, uid: int, mtime: float, atime: float, ext: str) -> None:
+        ext_id = self._ext_index.get(ext)
+        if ext_id is None:
+            ext_id = self._ext_index[ext] = len(self.exts)
+            self.exts.append(ext)
+        self.size.append(size)
+        self.uid.append(uid & 0xFFFFFFFF)
+        self.mtime.append(int(mtime))
+        self.atime.append(int(atime))
+        self.ext_id.append(ext_id)
+
+    def _column(self, name: str):
+        col = getattr(self, name)
+        return np.frombuffer(col, dtype=col.typecode) if np is not None else col
+
+    def select(
+        self,
+        ext: str | Iterable[str] | None = None,
+        uid: int | Iterable[int] | None = None,
+        min_age_days: float | None = None,
+        max_age_days: float | None = None,
+        min_size: int | None = None,
+        max_size: int | None = None,
+        time_field: str = "mtime",
+    ):
+        """
+        按条件过滤，返回可传给 group_by(where=...) 的掩码
+
+        Args:
+            ext: 扩展名（".log" 或 "log"，不区分大小写），可传多个
+            uid: 属主 uid，可传多个
+            min_age_days / max_age_days: 距 time_field 的天数范围
+            min_size / max_size: 文件大小范围（字节）
+            time_field: "mtime" 或 "atime"
+        """
+        if time_field not in ("mtime", "atime"):
+            raise ValueError(f"未知的时间字段: {time_field}")
+        ext_ids = None
+        if ext is not None:
+            names = [ext] if isinstance(ext, str) else list(ext)
+            ext_ids = {self._ext_index[e] for e in map(_normalize_ext, names) if e in self._ext_index}
+        uids = None
+        if uid is not None:
+            uids = {uid} if isinstance(uid, int) else set(uid)
+        # 年龄范围换算为时间戳范围：age >= min_age 即 t <= now - min_age
+        t_max = None if min_age_days is None else self.now - min_age_days * _DAY
+        t_min = None if max_age_days is None else self.now - max_age_days * _DAY
+
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            if ext_ids is not None:
+                mask &= np.isin(self._column("ext_id"), list(ext_ids))
+            if uids is not None:
+                mask &= np.isin(self._column("uid"), list(uids))
+            t = self._column(time_field)
+            if t_max is not None:
+                mask &= t <= t_max
+            if t_min is not None:
+                mask &= t >= t_min
+            size = self._column("size")
+            if min_size is not None:
+                mask &= size >= min_size
+            if max_size is not None:
+                mask &= size <= max_size
+            return mask
+
+        times = getattr(self, time_field)
+        mask = bytearray(len(self))
+        for i, size in enumerate(self.size):
+            if ext_ids is not None and self.ext_id[i] not in ext_ids:
+                continue
+            if uids is not None and self.uid[i] not in uids:
+                continue
+            t = times[i]
+            if (t_max is not None and t > t_max) or (t_min is not None and t < t_min):
+                continue
+            if (min_size is not None and size < min_size) or (max_size is not None and size > max_size):
+                continue
+            mask[i] = 1
+        return mask
+
+    def _codes(self, key: str) -> tuple[Any, list]:
+        """分组维度的 (每条记录的编号, 编号对应的取值)"""
+        if key == "ext":
+            return self._column("ext_id"), list(self.exts)
+        if key == "uid":
+            if np is not None:
+                values, codes = np.unique(self._column("uid"), return_inverse=True)
+                return codes, [int(v) for v in values]
+            index: dict[int, int] = {}
+            codes = array("I", (index.setdefault(u, len(index)) for u in self.uid))
+            return codes, list(index)
+        if key in ("mtime", "atime"):
+            # 时间戳越大越新，对应的年龄越小：按时间戳边界从新到旧编号
+            edges = [self.now - d * _DAY for d in reversed(AGE_EDGES)]
+            last = len(AGE_EDGES)
+            if np is not None:
+                codes = last - np.searchsorted(edges, self._column(key), side="right")
+                return codes, list(range(len(AGE_LABELS)))
+            return (
+                array("I", (last - bisect_right(edges, t) for t in getattr(self, key))),
+                list(range(len(AGE_LABELS))),
+            )
+        if key == "size":
+            if np is not None:
+                codes = np.searchsorted(SIZE_EDGES, self._column("size"), side="right")
+                return codes, list(range(len(SIZE_LABELS)))
+            return (
+                array("I", (bisect_right(SIZE_EDGES, s) for s in self.size)),
+                list(range(len(SIZE_LABELS))),
+            )
+        raise ValueError(f"未知的分组维度: {key}，可选 {', '.join(KEYS)}")
+
+    @staticmethod
+    def _label(key: str, value) -> str:
+        if key == "ext":
+            return value or "(无扩展名)"
+        if key == "uid":
+            return owner_name(value)
+        if key in ("mtime", "atime"):
+            return AGE_LABELS[value]
+        return SIZE_LABELS[value]
+
+    def group_by(self, *keys: str, where=None) -> list[UsageGroup]:
+        """
+        按一个或多个维度分组汇总，结果按占用大小降序，大小相同时按标签排序
+
+        Args:
+            keys: "ext" / "uid" / "mtime" / "atime" / "size" 的任意组合
+            where: select() 返回的掩码，只统计被选中的记录
+        """
+        if not keys:
+            raise ValueError("至少需要一个分组维度")
+        columns = [self._codes(k) for k in keys]
+
+        if np is not None:
+            code = np.zeros(len(self), dtype=np.int64)
+            for codes, values in columns:
+                code = code * len(values) + codes
+            size = self._column("size")
+            if where is not None:
+                code, size = code[where], size[where]
+            combos, inverse = np.unique(code, return_inverse=True)
+            sizes = np.bincount(inverse, weights=size, minlength=len(combos))
+            counts = np.bincount(inverse, minlength=len(combos))
+            totals = {
+                int(c): (int(s), int(n)) for c, s, n in zip(combos, sizes, counts, strict=True)
+            }
+        else:
+            acc: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+            for i, size in enumerate(self.size):
+                if where is not None and not where[i]:
+                    continue
+                c = 0
+                for codes, values in columns:
+                    c = c * len(values) + codes[i]
+                slot = acc[c]
+                slot[0] += size
+                slot[1] += 1
+            totals = {c: (s, n) for c, (s, n) in acc.items()}
+
+        groups = []
+        for combo, (size, count) in totals.items():
+            parts = []
+            for _, values in reversed(columns):
+                combo, j = divmod(combo, len(values))
+                parts.append(values[j])
+            parts.reverse()
+            label = " / ".join(self._label(k, v) for k, v in zip(keys, parts, strict=True))
+            groups.append(UsageGroup(tuple(parts), label, size, count))
+        # 大小相同时按标签与取值排序，保证有无 numpy 时结果顺序一致
+        groups.sort(key=lambda g: (-g.size, g.label, g.key))
+        return groups
+
+
+class UsageRecordsVisitor(ScanVisitor):
+    """遍历访问者：记录每个普通文件，硬链接到同一 inode 的文件只记一次"""
+
+    def __init__(self, root: str | Path, now: float | None = None):
+        self.records = UsageRecords(os.fspath(root), now)
+        self._seen_inodes: set[tuple[int, int]] = set()
+
+    def on_file(self, entry: ScanEntry) -> None:
+        if entry.is_symlink or not entry.is_file:
+            return
+        st = entry.stat
+        if st.st_nlink > 1:
+            key = (st.st_dev, st.st_ino)
+            if key in self._seen_inodes:
+                return
+            self._seen_inodes.add(key)
+        ext = os.path.splitext(entry.name)[1].lower()
+        self.records.append(st.st_size, st.st_uid, st.st_mtime, st.st_atime, ext)
+
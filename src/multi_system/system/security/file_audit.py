@@ -4,6 +4,9 @@ import stat
 from dataclasses import dataclass
 from pathlib import Path
 
+from multi_system.files.exclusions import Exclusions
+from multi_system.files.walker import ScanEntry, ScanVisitor, scan_tree
+
 
 @dataclass
 class AuditIssue:
@@ -13,6 +16,44 @@ class AuditIssue:
     size: int
 
 
+class AuditVisitor(ScanVisitor):
+    """遍历访问者：检查全局可写与 SUID 权限，达到 limit 后停止"""
+
+    def __init__(
+        self,
+        check_world_writable: bool = True,
+        check_suid: bool = True,
+        limit: int = 200,
+    ):
+        self.check_world_writable = check_world_writable
+        self.check_suid = check_suid
+        self.limit = limit
+        self.issues: list[AuditIssue] = []
+
+    def _check(self, entry: ScanEntry) -> None:
+        # 符号链接自身的权限恒为 0777，没有审计意义
+        if entry.is_symlink:
+            return
+        mode = entry.stat.st_mode
+        mode_str = stat.filemode(mode)
+        if self.check_world_writable and mode & stat.S_IWOTH:
+            self.issues.append(
+                AuditIssue(entry.path, "World-writable", mode_str, entry.size)
+            )
+        if self.check_suid and mode & stat.S_ISUID:
+            self.issues.append(
+                AuditIssue(entry.path, "SUID bit set", mode_str, entry.size)
+            )
+        if len(self.issues) >= self.limit:
+            self.done = True
+
+    def on_dir(self, entry: ScanEntry) -> None:
+        self._check(entry)
+
+    def on_file(self, entry: ScanEntry) -> None:
+        self._check(entry)
+
+
 class FileAuditor:
     @staticmethod
     def scan(
@@ -20,28 +61,11 @@ class FileAuditor:
         check_world_writable: bool = True,
         check_suid: bool = True,
         limit: int = 200,
+        exclude: Exclusions | None = None,
     ) -> list[AuditIssue]:
-        issues = []
-        for root, dirs, files in os.walk(path, onerror=lambda e: None):
-            for name in files + dirs:
-                full = os.path.join(root, name)
-                try:
-                    st = os.stat(full)
-                    mode = st.st_mode
-                    mode_str = stat.filemode(mode)
-                    if check_world_writable and mode & stat.S_IWOTH:
-                        issues.append(
-                            AuditIssue(full, "World-writable", mode_str, st.st_size)
-                        )
-                    if check_suid and mode & stat.S_ISUID:
-                        issues.append(
-                            AuditIssue(full, "SUID bit set", mode_str, st.st_size)
-                        )
-                    if len(issues) >= limit:
-                        return issues
-                except (OSError, PermissionError):
-                    continue
-        return issues
+        visitor = AuditVisitor(check_world_writable, check_suid, limit)
+        scan_tree(path, [visitor], exclude=exclude)
+        return visitor.issues
 
     @staticmethod
     def fix_permission(path: str, issue: str) -> bool:
@@ -0,0 +1,168 @@
+"""
+批量重命名日志的单元测试
+"""
+
+import os
+
+import pytest
+
+from multi_system.core.data_manager import DataManager
+from multi_system.files import batch_rename
+from multi_system.files.batch_rename import (
+    RenameJournal,
+    RenameOp,
+    execute_plan,
+    execute_rename,
+    plan_rename,
+    resume_rename,
+    rollback_rename,
+)
+
+
+def _contents(directory):
+    return {p.name: p.read_text() for p in directory.iterdir()}
+
+
+SWAPPED = {"a": "orig-b", "b": "orig-a", "c": "orig-d", "d": "orig-c"}
+
+
+def _swap_plan(files):
+    """两组互换：a↔b、c↔d"""
+    ops = []
+    for x, y in ("ab", "cd"):
+        (files / x).write_text(f"orig-{x}")
+        (files / y).write_text(f"orig-{y}")
+        ops += [RenameOp(files / x, files / y), RenameOp(files / y, files / x)]
+    return plan_rename(ops)
+
+
+def _unswap(files):
+    for x, y in ("ab", "cd"):
+        (files / x).rename(files / "tmp")
+        (files / y).rename(files / x)
+        (files / "tmp").rename(files / y)
+
+
+def _chain_plan(files):
+    (files / "a").write_text("orig-a")
+    (files / "b").write_text("orig-b")
+    return plan_rename([
+        RenameOp(files / "a", files / "b"),
+        RenameOp(files / "b", files / "c"),
+    ])
+
+
+def _killed_after(plan, data_manager, executed, monkeypatch):
+    """模拟进程在执行完前 executed 步后被杀死，返回留下的日志"""
+    real_rename = os.rename
+    calls = 0
+
+    def rename(src, dst):
+        nonlocal calls
+        if calls == executed:
+            raise KeyboardInterrupt
+        calls += 1
+        real_rename(src, dst)
+
+    with monkeypatch.context() as m:
+        m.setattr(batch_rename.os, "rename", rename)
+        with pytest.raises(KeyboardInterrupt):
+            execute_plan(plan, data_manager)
+    (journal,) = RenameJournal.list_pending(data_manager)
+    return journal
+
+
+class TestRenameJournal:
+    """重命名日志崩溃恢复测试类"""
+
+    def test_resume_chain_without_checkpoint(self, tmp_path):
+        """两步都已执行但没有检查点，继续执行不应覆盖文件"""
+        files = tmp_path / "files"
+        files.mkdir()
+        dm = DataManager(tmp_path / "data")
+        plan = _chain_plan(files)
+
+        journal = RenameJournal.create(plan.steps, dm)
+        for s, d in journal.steps:
+            os.rename(s, d)
+        result = resume_rename(journal.path)
+
+        assert result.ok
+        assert _contents(files) == {"b": "orig-a", "c": "orig-b"}
+        assert not journal.path.exists()
+
+    def test_resume_cycle_after_crash(self, tmp_path, monkeypatch):
+        """循环重命名在任一步之前中断（包括闭合一个循环之后），继续执行后完成交换且不留临时文件"""
+        files = tmp_path / "files"
+        files.mkdir()
+        dm = DataManager(tmp_path / "data")
+        plan = _swap_plan(files)
+        assert plan.temp_steps
+
+        for executed in range(len(plan.steps)):
+            journal = _killed_after(plan, dm, executed, monkeypatch)
+            assert resume_rename(journal).ok
+            assert _contents(files) == SWAPPED
+            _unswap(files)  # 恢复初始状态，测试下一个中断点
+
+    def test_rollback_cycle_after_crash(self, tmp_path, monkeypatch):
+        """循环重命名在任一步之前中断，回滚后回到初始状态"""
+        files = tmp_path / "files"
+        files.mkdir()
+        dm = DataManager(tmp_path / "data")
+        plan = _swap_plan(files)
+
+        for executed in range(len(plan.steps)):
+            journal = _killed_after(plan, dm, executed, monkeypatch)
+            assert rollback_rename(journal) == executed
+            assert _contents(files) == {x: f"orig-{x}" for x in "abcd"}
+            assert not journal.exists()
+
+    def test_rollback_chain_without_checkpoint(self, tmp_path):
+        """回滚按目标是否存在推断出未记录的已执行步骤"""
+        files = tmp_path / "files"
+        files.mkdir()
+        dm = DataManager(tmp_path / "data")
+        plan = _chain_plan(files)
+
+        journal = RenameJournal.create(plan.steps, dm)
+        for s, d in journal.steps:
+            os.rename(s, d)
+
+        assert rollback_rename(journal.path) == 2
+        assert _contents(files) == {"a": "orig-a", "b": "orig-b"}
+
+    def test_few_fsyncs(self, tmp_path, monkeypatch):
+        """不相关的重命名只在创建日志与检查点时 fsync"""
+        files = tmp_path / "files"
+        files.mkdir()
+        for i in range(50):
+            (files / f"{i}.txt").write_text(str(i))
+        plan = plan_rename([RenameOp(files / f"{i}.txt", files / f"{i}.log") for i in range(50)])
+        monkeypatch.setattr(batch_rename, "_CHECKPOINT_EVERY", 20)
+        real_fsync = os.fsync
+        calls = []
+
+        def fsync(fd):
+            calls.append(fd)
+            real_fsync(fd)
+
+        monkeypatch.setattr(batch_rename.os, "fsync", fsync)
+        assert execute_plan(plan, DataManager(tmp_path / "data")).ok
+        assert len(calls) == 3
+
+    def test_execute_rename_rolls_back_on_failure(self, tmp_path):
+        """execute_rename 失败时撤销已完成的步骤且不留下日志"""
+        files = tmp_path / "files"
+        files.mkdir()
+        (files / "a").write_text("orig-a")
+        dm = DataManager(tmp_path / "data")
+
+        done = execute_rename([
+            RenameOp(files / "a", files / "x"),
+            RenameOp(files / "missing", files / "y"),
+        ], dm)
+
+        assert done == 0
+        assert _contents(files) == {"a": "orig-a"}
+        assert not RenameJournal.list_pending(dm)
@@ -0,0 +1,41 @@
+"""
+大文件扫描的单元测试
+"""
+
+import os
+
+from multi_system.files.big_files import find_big_files, iter_big_files
+
+
+class TestBigFiles:
+    """大文件扫描测试类"""
+
+    def test_hardlinks_listed_once(self, tmp_path):
+        """硬链接到同一 inode 的文件只报告一次"""
+        (tmp_path / "a").write_bytes(bytes(300))
+        os.link(tmp_path / "a", tmp_path / "b")
+        (tmp_path / "c").write_bytes(bytes(200))
+
+        files = find_big_files(tmp_path, min_size_mb=0)
+        assert [f.size for f in files] == [300, 200]
+        assert files[0].path in (os.fspath(tmp_path / "a"), os.fspath(tmp_path / "b"))
+
+    def test_limit_keeps_largest(self, tmp_path):
+        """堆满后只保留最大的 limit 个文件，按大小降序"""
+        for size in (5, 50, 20, 70, 10, 60, 30):
+            (tmp_path / f"f{size}").write_bytes(bytes(size))
+        files = find_big_files(tmp_path, min_size_mb=0, limit=3)
+        assert [f.size for f in files] == [70, 60, 50]
+
+    def test_limit_zero(self, tmp_path):
+        (tmp_path / "a").write_bytes(bytes(10))
+        assert find_big_files(tmp_path, min_size_mb=0, limit=0) == []
+
+    def test_iter_big_files_streams_snapshots(self, tmp_path):
+        """扫描过程中产出快照，最后一次与一次性扫描的结果相同"""
+        for i in range(600):
+            (tmp_path / f"f{i}").write_bytes(bytes(i % 97))
+        snapshots = list(iter_big_files(tmp_path, min_size_mb=0, limit=5, interval=0))
+        assert len(snapshots) > 1
+        assert snapshots[-1] == find_big_files(tmp_path, min_size_mb=0, limit=5)
+        assert [f.size for f in snapshots[-1]] == [96] * 5
@@ -0,0 +1,98 @@
+"""
+重复文件合并的单元测试
+"""
+
+import os
+
+from multi_system.files import dedup
+from multi_system.files.dedup import dedup_group
+from multi_system.files.duplicate_files import DuplicateGroup
+
+
+def _write(path, data, mtime=None):
+    path.write_bytes(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def _group(*paths):
+    return DuplicateGroup("h", os.path.getsize(paths[0]), list(paths))
+
+
+def _modify(path):
+    """内容与修改时间都变化，但大小不变"""
+    st = os.stat(path)
+    with open(path, "r+b") as f:
+        f.write(b"X")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def _modify_during_replace(monkeypatch, target):
+    """在比对之后、建立临时链接与替换之前修改 target"""
+    temp_path = dedup._temp_path
+
+    def hook(path):
+        _modify(target)
+        return temp_path(path)
+
+    monkeypatch.setattr(dedup, "_temp_path", hook)
+
+
+class TestDedupGroup:
+    """重复文件合并测试类"""
+
+    def test_identical_files_are_hardlinked(self, tmp_path):
+        keep = _write(tmp_path / "a", b"same" * 1000, 1_000_000)
+        dup = _write(tmp_path / "b", b"same" * 1000, 2_000_000)
+        (action,) = dedup_group(_group(keep, dup))
+        assert action.status == "hardlinked"
+        assert action.reclaimed == 4000
+        assert os.stat(keep).st_ino == os.stat(dup).st_ino
+        assert not [p for p in os.listdir(tmp_path) if p.endswith(".dedup")]
+
+    def test_content_mismatch_is_skipped(self, tmp_path):
+        keep = _write(tmp_path / "a", b"aaaa")
+        dup = _write(tmp_path / "b", b"aaab")
+        (action,) = dedup_group(_group(keep, dup))
+        assert (action.status, action.reason) == ("skipped", "内容不一致")
+        assert (tmp_path / "b").read_bytes() == b"aaab"
+
+    def test_copy_changed_before_replace(self, tmp_path, monkeypatch):
+        """副本在比对后被修改：保留修改后的副本"""
+        keep = _write(tmp_path / "a", b"same")
+        dup = _write(tmp_path / "b", b"same")
+        _modify_during_replace(monkeypatch, dup)
+        (action,) = dedup_group(_group(keep, dup))
+        assert action.status == "failed"
+        assert (tmp_path / "b").read_bytes() == b"Xame"
+        assert os.stat(keep).st_ino != os.stat(dup).st_ino
+        assert not [p for p in os.listdir(tmp_path) if p.endswith(".dedup")]
+
+    def test_kept_file_changed_before_replace(self, tmp_path, monkeypatch):
+        """保留的文件在比对后被修改：副本不能被替换为修改后的内容"""
+        keep = _write(tmp_path / "a", b"same")
+        dup = _write(tmp_path / "b", b"same")
+        _modify_during_replace(monkeypatch, keep)
+        (action,) = dedup_group(_group(keep, dup))
+        assert action.status == "failed"
+        assert (tmp_path / "b").read_bytes() == b"same"
+        assert os.stat(keep).st_ino != os.stat(dup).st_ino
+
+    def test_auto_mode_falls_back_to_hardlink_or_reflinks(self, tmp_path):
+        keep = _write(tmp_path / "a", b"same" * 1000)
+        dup = _write(tmp_path / "b", b"same" * 1000)
+        (action,) = dedup_group(_group(keep, dup), mode="auto")
+        assert action.status in ("hardlinked", "reflinked")
+        assert (tmp_path / "b").read_bytes() == b"same" * 1000
+
+    def test_dry_run_leaves_files_untouched(self, tmp_path):
+        keep = _write(tmp_path / "a", b"same")
+        dup = _write(tmp_path / "b", b"same")
+        before = {p: os.stat(p) for p in (keep, dup)}
+        (action,) = dedup_group(_group(keep, dup), dry_run=True)
+        assert (action.status, action.reclaimed) == ("planned", 4)
+        assert sorted(os.listdir(tmp_path)) == ["a", "b"]
+        for p, st in before.items():
+            now = os.stat(p)
+            assert (now.st_ino, now.st_mtime_ns, now.st_nlink) == (st.st_ino, st.st_mtime_ns, st.st_nlink)
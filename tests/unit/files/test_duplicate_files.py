@@ -0,0 +1,81 @@
+"""
+重复文件查找的单元测试
+"""
+
+import os
+
+from multi_system.files import duplicate_files
+from multi_system.files.duplicate_files import find_duplicates, scan_duplicates
+from multi_system.files.hasher import PARTIAL_BLOCK_SIZE
+
+
+def _write(path, data: bytes):
+    path.write_bytes(data)
+    return os.fspath(path)
+
+
+class TestFindDuplicates:
+    """分阶段重复文件查找测试类"""
+
+    def test_middle_difference_found_by_full_hash(self, tmp_path):
+        """头尾相同、中间不同的大文件不算重复"""
+        size = 4 * PARTIAL_BLOCK_SIZE
+        base = os.urandom(size)
+        changed = base[:size // 2] + bytes([base[size // 2] ^ 1]) + base[size // 2 + 1:]
+        a = _write(tmp_path / "a.bin", base)
+        b = _write(tmp_path / "b.bin", base)
+        _write(tmp_path / "c.bin", changed)
+        _write(tmp_path / "d.bin", os.urandom(size))
+
+        (group,) = find_duplicates(tmp_path, workers=2)
+        assert group.paths == [a, b]
+        assert group.size == size
+
+    def test_small_files_skip_full_hash(self, tmp_path, monkeypatch):
+        """部分指纹已覆盖整个文件时不再计算完整哈希"""
+        calls = []
+        monkeypatch.setattr(duplicate_files, "full_hash", lambda p: calls.append(p) or "")
+        data = os.urandom(2 * PARTIAL_BLOCK_SIZE)
+        a = _write(tmp_path / "a.bin", data)
+        b = _write(tmp_path / "b.bin", data)
+        _write(tmp_path / "c.bin", os.urandom(len(data)))
+
+        (group,) = find_duplicates(tmp_path, workers=1)
+        assert group.paths == [a, b]
+        assert not calls
+
+    def test_min_size_and_unique_sizes(self, tmp_path):
+        """小于 min_size 的文件与大小唯一的文件不参与比较"""
+        _write(tmp_path / "small1", b"x" * 100)
+        _write(tmp_path / "small2", b"x" * 100)
+        _write(tmp_path / "big", b"y" * 2048)
+        assert find_duplicates(tmp_path, min_size=1024, workers=1) == []
+
+    def test_groups_sorted_by_size(self, tmp_path):
+        for name, size in (("s", 2048), ("l", 8192)):
+            data = os.urandom(size)
+            _write(tmp_path / f"{name}1", data)
+            _write(tmp_path / f"{name}2", data)
+        assert [g.size for g in find_duplicates(tmp_path, workers=1)] == [8192, 2048]
+
+    def test_hardlinks_hashed_once(self, tmp_path, monkeypatch):
+        """同一 inode 只哈希一次，硬链接单独报告"""
+        hashed = []
+        real_partial_hash = duplicate_files.partial_hash
+
+        def partial_hash(path, size):
+            hashed.append(path)
+            return real_partial_hash(path, size)
+
+        monkeypatch.setattr(duplicate_files, "partial_hash", partial_hash)
+        data = os.urandom(4096)
+        a = _write(tmp_path / "a", data)
+        os.link(a, tmp_path / "a2")
+        b = _write(tmp_path / "b", data)
+
+        report = scan_duplicates(tmp_path, workers=1)
+        (group,) = report.groups
+        assert len(group.paths) == 2 and b in group.paths
+        (links,) = report.hardlinks
+        assert sorted(links.paths) == [a, os.fspath(tmp_path / "a2")]
+        assert len(hashed) == 2
@@ -0,0 +1,80 @@
+"""
+遍历排除规则的单元测试
+"""
+
+from collections import namedtuple
+
+import pytest
+
+from multi_system.files import exclusions
+from multi_system.files.exclusions import Exclusions
+from multi_system.files.walker import iter_tree
+
+Partition = namedtuple("Partition", "device mountpoint fstype opts")
+
+
+def _names(root, exclude):
+    return sorted(
+        e.path[len(str(root)) + 1:] for e in iter_tree(root, exclude=exclude)
+    )
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for rel in ("src/a.py", "src/b.log", "build/out.o", "keep/x.log", "mnt/data/f.txt"):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x" * len(rel))
+    return tmp_path
+
+
+def _fake_partitions(monkeypatch, partitions):
+    monkeypatch.setattr(exclusions.psutil, "disk_partitions", lambda **kwargs: partitions)
+
+
+class TestPatterns:
+    """gitignore 风格模式测试类"""
+
+    def test_patterns_and_negation(self, tree):
+        exclude = Exclusions(patterns=["*.log", "!keep/*.log", "build/"], skip_pseudo=False)
+        assert _names(tree, exclude) == [
+            "keep", "keep/x.log", "mnt", "mnt/data", "mnt/data/f.txt", "src", "src/a.py",
+        ]
+
+    def test_size_limits_apply_to_files_only(self, tree):
+        """文件内容长度等于其相对路径长度：只保留 9 到 10 字节的文件，目录不受影响"""
+        exclude = Exclusions(min_size=9, max_size=10, skip_pseudo=False)
+        assert _names(tree, exclude) == [
+            "build", "keep", "keep/x.log", "mnt", "mnt/data", "src", "src/b.log",
+        ]
+
+
+class TestFilesystemTypes:
+    """按文件系统类型跳过挂载点的测试类"""
+
+    def test_pseudo_mountpoint_is_skipped(self, tree, monkeypatch):
+        _fake_partitions(monkeypatch, [Partition("proc", str(tree / "mnt"), "proc", "rw")])
+        assert "mnt" not in _names(tree, Exclusions())
+
+    def test_autofs_with_real_mount_on_top_is_scanned(self, tree, monkeypatch):
+        """autofs 触发点与其上实际挂载的文件系统共用挂载点时照常扫描"""
+        mnt = str(tree / "mnt")
+        _fake_partitions(monkeypatch, [
+            Partition("auto.home", mnt, "autofs", "rw"),
+            Partition("server:/export", mnt, "nfs4", "rw"),
+        ])
+        assert "mnt/data/f.txt" in _names(tree, Exclusions())
+        assert "mnt" not in _names(tree, Exclusions(skip_network=True))
+
+    def test_topmost_entry_decides(self, tree, monkeypatch):
+        mnt = str(tree / "mnt")
+        _fake_partitions(monkeypatch, [
+            Partition("/dev/sda1", mnt, "ext4", "rw"),
+            Partition("proc", mnt, "proc", "rw"),
+        ])
+        assert "mnt" not in _names(tree, Exclusions())
+
+    def test_root_on_skipped_filesystem_is_scanned(self, tree, monkeypatch):
+        """扫描根目录本身位于被跳过的文件系统上时不排除"""
+        _fake_partitions(monkeypatch, [Partition("proc", str(tree), "proc", "rw")])
+        assert "src/a.py" in _names(tree, Exclusions())
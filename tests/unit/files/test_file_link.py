@@ -0,0 +1,141 @@
+"""
+批量创建软连接的单元测试
+"""
+
+import os
+
+import pytest
+
+from multi_system.core.data_manager import DataManager
+from multi_system.files import file_link
+from multi_system.files.file_link import (
+    LinkSpec,
+    create_links,
+    link_manifest,
+    load_link_manifest,
+    validate_links,
+)
+
+
+def _sources(root):
+    (root / "src" / "dir").mkdir(parents=True)
+    (root / "src" / "file").write_text("x")
+    return root / "src"
+
+
+class TestLinkManifest:
+    """链接清单读取测试类"""
+
+    def test_bases_relative_to_manifest(self, tmp_path):
+        manifest = tmp_path / "links.toml"
+        manifest.write_text(
+            'source_base = "src"\n'
+            'target_base = "home"\n'
+            '[[links]]\nsource = "file"\ntarget = ".file"\n'
+            '[[links]]\nsource = "dir"\ntarget = "cfg/dir"\nis_dir = true\n'
+        )
+        specs = load_link_manifest(manifest)
+        assert [(s.source, s.target, s.is_dir) for s in specs] == [
+            (tmp_path / "src" / "file", tmp_path / "home" / ".file", None),
+            (tmp_path / "src" / "dir", tmp_path / "home" / "cfg" / "dir", True),
+        ]
+
+    def test_found_in_data_dir(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        dm = DataManager(tmp_path / "data")
+        (dm.get_data_dir("links") / "dots.toml").write_text("links = []\n")
+        assert load_link_manifest("dots.toml", dm) == []
+
+    def test_invalid_manifest(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_link_manifest(tmp_path / "missing.toml")
+        bad = tmp_path / "bad.toml"
+        bad.write_text('[[links]]\nsource = "a"\n')
+        with pytest.raises(ValueError, match="第 1 个链接"):
+            load_link_manifest(bad)
+        (tmp_path / "links.json").write_text("{}")
+        with pytest.raises(ValueError, match="不支持"):
+            load_link_manifest(tmp_path / "links.json")
+
+
+class TestCreateLinks:
+    """批量创建测试类"""
+
+    def test_validate_whole_manifest(self, tmp_path):
+        src = _sources(tmp_path)
+        os.symlink(src / "file", tmp_path / "ok")
+        (tmp_path / "occupied").write_text("")
+        results = validate_links([
+            LinkSpec(src / "file", tmp_path / "new"),
+            LinkSpec(src / "dir", tmp_path / "new"),
+            LinkSpec(src / "missing", tmp_path / "other"),
+            LinkSpec(src / "file", tmp_path / "ok"),
+            LinkSpec(src / "file", tmp_path / "occupied"),
+            LinkSpec(src / "file", tmp_path / "occupied" / "below"),
+        ])
+        assert [r.status for r in results] == [
+            "planned", "invalid", "invalid", "exists", "invalid", "invalid",
+        ]
+        assert "第 1 个" in results[1].message
+        assert results[0].spec.is_dir is False
+
+    def test_create_and_strict(self, tmp_path):
+        src = _sources(tmp_path)
+        specs = [
+            LinkSpec(src / "dir", tmp_path / "out" / "dir"),
+            LinkSpec(src / "missing", tmp_path / "out" / "missing"),
+        ]
+        results = create_links(specs, strict=True)
+        assert [r.status for r in results] == ["skipped", "invalid"]
+        assert not (tmp_path / "out").exists()
+
+        results = create_links(specs)
+        assert [r.status for r in results] == ["created", "invalid"]
+        assert (tmp_path / "out" / "dir").resolve() == src / "dir"
+        assert create_links(specs[:1])[0].status == "exists"
+
+    def test_denied_links_elevated_once(self, tmp_path, monkeypatch):
+        """权限不足的链接汇总后只提升一次权限，由一个子进程全部创建"""
+        src = _sources(tmp_path)
+        real_make_link = file_link._make_link
+        calls = []
+
+        def make_link(source, target, is_dir):
+            if not calls:
+                return "denied", "没有创建软连接的权限"
+            return real_make_link(source, target, is_dir)
+
+        def run_elevated(cmd, cwd=None):
+            calls.append(cmd)
+            file_link._apply_links(cmd[-2], cmd[-1])  # 在本进程中模拟特权子进程
+            return None
+
+        monkeypatch.setattr(file_link, "is_admin", lambda: False)
+        monkeypatch.setattr(file_link, "_make_link", make_link)
+        monkeypatch.setattr(file_link, "_run_elevated", run_elevated)
+
+        results = create_links([
+            LinkSpec(src / "file", tmp_path / "a"),
+            LinkSpec(src / "dir", tmp_path / "b"),
+        ])
+        assert len(calls) == 1
+        assert [(r.status, r.elevated) for r in results] == [("created", True), ("created", True)]
+        assert (tmp_path / "b").resolve() == src / "dir"
+
+    def test_elevation_cancelled(self, tmp_path, monkeypatch):
+        src = _sources(tmp_path)
+        monkeypatch.setattr(file_link, "is_admin", lambda: False)
+        monkeypatch.setattr(file_link, "_make_link", lambda s, t, d: ("denied", "拒绝"))
+        monkeypatch.setattr(file_link, "_run_elevated", lambda cmd, cwd=None: "用户取消")
+        (result,) = create_links([LinkSpec(src / "file", tmp_path / "a")])
+        assert (result.status, result.message) == ("failed", "用户取消")
+
+    def test_dry_run_from_manifest(self, tmp_path):
+        src = _sources(tmp_path)
+        manifest = tmp_path / "links.toml"
+        manifest.write_text('[[links]]\nsource = "src/file"\ntarget = "link"\n')
+        (result,) = link_manifest(manifest, dry_run=True)
+        assert result.status == "planned"
+        assert result.spec.source == src / "file"
+        assert not os.path.lexists(tmp_path / "link")
+
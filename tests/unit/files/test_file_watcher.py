@@ -0,0 +1,241 @@
+"""
+文件监控事件合并的单元测试
+"""
+
+import errno
+import os
+from array import array
+
+import pytest
+
+from multi_system.files import file_watcher, inotify
+from multi_system.files.file_watcher import (
+    SimpleFileWatcher,
+    _EventBatch,
+    _EventCoalescer,
+)
+
+
+def _batch(path, event_type="modified"):
+    batch = _EventBatch()
+    batch.add(path, event_type)
+    return batch
+
+
+class TestEventCoalescer:
+    """事件合并测试类"""
+
+    def test_quiet_path_is_delivered_after_window(self):
+        """路径静默超过窗口后交付"""
+        coalescer = _EventCoalescer(window=1.0)
+        coalescer.push(_batch("a"), now=0.0)
+        assert coalescer.pop_ready(now=0.5) == []
+        events = coalescer.pop_ready(now=1.0)
+        assert [(e.path, e.event_type) for e in events] == [("a", "modified")]
+
+    def test_busy_path_is_delivered_after_max_wait(self):
+        """持续变化的路径不会被无限推迟"""
+        coalescer = _EventCoalescer(window=1.0, max_wait=5.0)
+        delivered = []
+        for t in range(12):
+            coalescer.push(_batch("a"), now=float(t))
+            delivered.extend((t, e.path) for e in coalescer.pop_ready(now=float(t)))
+        assert delivered == [(5, "a"), (11, "a")]
+
+    def test_default_max_wait_is_five_windows(self):
+        assert _EventCoalescer(window=2.0).max_wait == 10.0
+
+
+class TestSimpleFileWatcher:
+    """文件监控测试类"""
+
+    def test_file_written_every_check_is_reported(self, tmp_path, monkeypatch):
+        """每次检查都在变化的文件也能在 max_wait 内交付（轮询后端）"""
+        clock = [0.0]
+        monkeypatch.setattr(file_watcher.time, "monotonic", lambda: clock[0])
+        target = tmp_path / "busy.log"
+        target.write_text("")
+        watcher = SimpleFileWatcher(tmp_path, backend="polling", debounce=1.0)
+        events = []
+        for i in range(1, 8):
+            clock[0] = i * 2.0
+            target.write_text("x" * i)
+            os.utime(target, (i * 10, i * 10))
+            events.extend(watcher.check_once())
+        watcher.close()
+        assert any(e.path == str(target) for e in events)
+
+
+def _events(watcher):
+    return sorted((os.path.basename(e.path), e.event_type) for e in watcher.check_once())
+
+
+@pytest.mark.skipif(not inotify.is_available(), reason="需要 inotify")
+class TestInotifyBackend:
+    """inotify 事件后端测试类"""
+
+    def test_create_modify_delete(self, tmp_path):
+        (tmp_path / "old").write_text("x")
+        watcher = SimpleFileWatcher(tmp_path, backend="inotify")
+        assert watcher.backend_name == "inotify"
+        assert watcher.check_once() == []
+
+        (tmp_path / "new").write_text("a")
+        (tmp_path / "old").write_text("changed")
+        assert _events(watcher) == [("new", "created"), ("old", "modified")]
+        (tmp_path / "new").unlink()
+        assert _events(watcher) == [("new", "deleted")]
+        assert watcher.check_once() == []
+        watcher.close()
+
+    def test_new_directory_is_watched(self, tmp_path):
+        """新目录中已有的文件补报为新增，之后的变化也能收到"""
+        watcher = SimpleFileWatcher(tmp_path, backend="inotify")
+        watcher.check_once()
+        staging = tmp_path.parent / f"{tmp_path.name}-staging"
+        (staging / "sub").mkdir(parents=True)
+        (staging / "sub" / "f").write_text("a")
+        os.rename(staging, tmp_path / "moved-in")
+        assert _events(watcher) == [("f", "created")]
+
+        (tmp_path / "moved-in" / "sub" / "g").write_text("b")
+        assert _events(watcher) == [("g", "created")]
+        watcher.close()
+
+    def test_falls_back_to_polling(self, tmp_path, monkeypatch):
+        """监视数量耗尽时切换到轮询，已知的文件不被重复报告"""
+        (tmp_path / "a").write_text("x")
+        watcher = SimpleFileWatcher(tmp_path, backend="inotify")
+        watcher.check_once()
+
+        def exhausted(self, path, mask):
+            raise OSError(errno.ENOSPC, "no watches left")
+
+        monkeypatch.setattr(inotify.Inotify, "add_watch", exhausted)
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b").write_text("y")
+        events = _events(watcher)
+        assert watcher.backend_name == "polling"
+        assert events == [("b", "created")]
+        watcher.close()
+
+
+_OLD = 1_000_000_000  # 远早于当前时间，目录不处于不稳定窗口
+
+
+def _stable_tree(root):
+    for rel in ("a/f", "b/g", "b/c/h"):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel)
+    for path in [root, *root.rglob("*")]:
+        os.utime(path, (_OLD, _OLD))
+
+
+def _count_listings(monkeypatch):
+    listed = []
+    list_dir = file_watcher._PollingBackend._list_dir
+
+    def counting(self, path, now_ns):
+        listed.append(os.path.basename(path))
+        return list_dir(self, path, now_ns)
+
+    monkeypatch.setattr(file_watcher._PollingBackend, "_list_dir", counting)
+    return listed
+
+
+class TestPollingBackend:
+    """按目录修改时间剪枝的轮询测试类"""
+
+    def test_unchanged_directories_not_listed(self, tmp_path, monkeypatch):
+        _stable_tree(tmp_path)
+        backend = file_watcher._PollingBackend(tmp_path, verify_every=0)
+        backend.poll()
+        listed = _count_listings(monkeypatch)
+
+        assert len(backend.poll()) == 0
+        assert listed == []
+        (tmp_path / "b" / "new").write_text("x")
+        batch = backend.poll()
+        assert listed == ["b"]
+        assert batch.get(os.fspath(tmp_path / "b" / "new"))[0] == "created"
+
+    def test_in_place_change_found_by_verify(self, tmp_path):
+        """原地修改不改变目录 mtime，由定期全量校验发现"""
+        _stable_tree(tmp_path)
+        backend = file_watcher._PollingBackend(tmp_path, verify_every=2)
+        backend.poll()
+        target = tmp_path / "b" / "c" / "h"
+        target.write_text("changed")
+        os.utime(target.parent, (_OLD, _OLD))
+
+        assert len(backend.poll()) == 0
+        assert backend.poll().get(os.fspath(target))[0] == "modified"
+
+    def test_racy_directory_listed_again(self, tmp_path, monkeypatch):
+        """刚修改过的目录下次检查仍重新列出"""
+        _stable_tree(tmp_path)
+        backend = file_watcher._PollingBackend(tmp_path, verify_every=0)
+        backend.poll()
+        (tmp_path / "a" / "new").write_text("x")
+        backend.poll()
+        listed = _count_listings(monkeypatch)
+        backend.poll()
+        assert listed == ["a"]
+
+    def test_removed_subtree_reported(self, tmp_path):
+        _stable_tree(tmp_path)
+        backend = file_watcher._PollingBackend(tmp_path, verify_every=0)
+        backend.poll()
+        (tmp_path / "b" / "c" / "h").unlink()
+        (tmp_path / "b" / "c").rmdir()
+        batch = backend.poll()
+        assert batch.get(os.fspath(tmp_path / "b" / "c" / "h"))[0] == "deleted"
+        assert os.fspath(tmp_path / "b" / "c") not in backend._dirs
+
+
+def _state(names, stats=(), subdirs=""):
+    return file_watcher._DirState(0, "\0".join(names), array("q", stats), subdirs)
+
+
+class TestDirState:
+    """紧凑目录快照测试类"""
+
+    def test_list_dir_packs_sorted_entries(self, tmp_path):
+        for name in ("b", "a", "c"):
+            (tmp_path / name).write_text(name * 3)
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "empty").mkdir()
+        backend = file_watcher._PollingBackend(tmp_path)
+
+        state = backend._list_dir(os.fspath(tmp_path), 0)
+        assert state.names == ["a", "b", "c"]
+        assert sorted(state.subdir_names) == ["empty", "sub"]
+        assert len(state.stats) == 3 * file_watcher._STRIDE
+        st = os.stat(tmp_path / "b")
+        assert state.file_id(1) == (st.st_ino, st.st_mtime_ns)
+        assert backend._list_dir(os.fspath(tmp_path / "empty"), 0).stats is file_watcher._NO_STATS
+
+    def test_diff_dir_merges_sorted_names(self):
+        old = _state(["a", "b", "d"], [1, 1, 10, 2, 2, 20, 4, 4, 40])
+        new = _state(["b", "c", "d"], [2, 2, 20, 3, 3, 30, 5, 4, 40])
+        batch = file_watcher._EventBatch()
+        file_watcher._diff_dir("/w", old, new, batch)
+        assert sorted((p, t) for p, t, _ in batch.items()) == [
+            ("/w/a", "deleted"),
+            ("/w/c", "created"),
+            ("/w/d", "modified"),
+        ]
+
+    def test_rename_reported_as_move(self, tmp_path):
+        """重命名前后 inode 与修改时间相同，配对为 moved"""
+        (tmp_path / "old.txt").write_text("x")
+        watcher = SimpleFileWatcher(tmp_path, backend="polling")
+        watcher.check_once()
+        (tmp_path / "old.txt").rename(tmp_path / "new.txt")
+        (event,) = watcher.check_once()
+        assert (event.event_type, event.path, event.dest_path) == (
+            "moved",
+            os.fspath(tmp_path / "old.txt"),
+            os.fspath(tmp_path / "new.txt"),
+        )
@@ -0,0 +1,59 @@
+"""
+哈希缓存的单元测试
+"""
+
+import os
+
+from multi_system.files.hash_cache import HashCache
+
+
+class TestHashCache:
+    """哈希缓存测试类"""
+
+    def test_hit_and_partial_update(self, tmp_path):
+        """未变化的文件命中缓存，补写的摘要不覆盖已有值"""
+        f = tmp_path / "a.bin"
+        f.write_bytes(b"hello")
+        st = f.stat()
+        with HashCache(tmp_path / "cache.sqlite3") as cache:
+            cache.put(str(f), st, partial="p1")
+            cache.put(str(f), st, full="f1")
+            entry = cache.get(st)
+            assert (entry.partial, entry.full) == ("p1", "f1")
+
+    def test_modified_file_is_invalidated(self, tmp_path):
+        """大小或修改时间变化后条目失效并被删除"""
+        f = tmp_path / "a.bin"
+        f.write_bytes(b"hello")
+        with HashCache(tmp_path / "cache.sqlite3") as cache:
+            cache.put(str(f), f.stat(), partial="p1", full="f1")
+            cache.put_chunks(str(f), f.stat(), b"chunks")
+            st = f.stat()
+            os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            changed = f.stat()
+            assert cache.get_chunks(changed) is None
+            assert cache.get(changed) is None
+            assert len(cache) == 0
+
+    def test_put_after_change_drops_stale_digests(self, tmp_path):
+        """文件变化后写入新摘要时，旧的其他摘要与分块指纹一并清除"""
+        f = tmp_path / "a.bin"
+        f.write_bytes(b"hello")
+        with HashCache(tmp_path / "cache.sqlite3") as cache:
+            cache.put(str(f), f.stat(), partial="p1", full="f1")
+            cache.put_chunks(str(f), f.stat(), b"chunks")
+            f.write_bytes(b"hello, world")
+            st = f.stat()
+            cache.put(str(f), st, partial="p2")
+            entry = cache.get(st)
+            assert (entry.partial, entry.full) == ("p2", None)
+            assert cache.get_chunks(st) is None
+
+    def test_prune_removes_deleted_files(self, tmp_path):
+        f = tmp_path / "a.bin"
+        f.write_bytes(b"hello")
+        with HashCache(tmp_path / "cache.sqlite3") as cache:
+            cache.put(str(f), f.stat(), full="f1")
+            f.unlink()
+            assert cache.prune() == 1
+            assert len(cache) == 0
@@ -0,0 +1,84 @@
+"""
+并行哈希引擎的单元测试
+"""
+
+import hashlib
+import threading
+
+from multi_system.files.hasher import (
+    CHUNK_SIZE,
+    PARTIAL_BLOCK_SIZE,
+    HashEngine,
+    covered_by_partial,
+    full_hash,
+    partial_hash,
+)
+
+
+class TestHashFunctions:
+    """哈希函数测试类"""
+
+    def test_full_hash_streams_whole_file(self, tmp_path):
+        data = bytes(range(256)) * (CHUNK_SIZE // 256 * 2 + 3)
+        path = tmp_path / "f"
+        path.write_bytes(data)
+        assert full_hash(str(path)) == hashlib.blake2b(data).hexdigest()
+
+    def test_partial_hash_reads_head_and_tail(self, tmp_path):
+        size = 4 * PARTIAL_BLOCK_SIZE
+        a, b = tmp_path / "a", tmp_path / "b"
+        a.write_bytes(bytes(size))
+        b.write_bytes(bytes(size // 2) + b"\1" + bytes(size // 2 - 1))
+        assert partial_hash(str(a), size) == partial_hash(str(b), size)
+        assert not covered_by_partial(size)
+        assert covered_by_partial(2 * PARTIAL_BLOCK_SIZE)
+
+
+class TestHashEngine:
+    """有界工作池测试类"""
+
+    def test_results_progress_and_errors(self, tmp_path):
+        """每个任务产出一次结果，读取失败的结果为 None"""
+        paths = []
+        for i in range(10):
+            p = tmp_path / str(i)
+            p.write_bytes(str(i).encode())
+            paths.append((str(p),))
+        paths.append((str(tmp_path / "missing"),))
+        progress = []
+        engine = HashEngine(workers=3, progress=lambda done, total: progress.append((done, total)))
+
+        results = dict(engine.map(full_hash, paths))
+        assert len(results) == 11
+        assert results[(str(tmp_path / "missing"),)] is None
+        assert results[paths[0]] == hashlib.blake2b(b"0").hexdigest()
+        assert progress[-1] == (11, 11)
+
+    def test_pending_tasks_bounded(self):
+        """在途任务数不超过 max_pending"""
+        lock = threading.Lock()
+        running = peak = 0
+        gate = threading.Semaphore(0)
+
+        def task(i):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            gate.acquire(timeout=0.01)
+            with lock:
+                running -= 1
+            return str(i)
+
+        engine = HashEngine(workers=8, max_pending=3)
+        assert len(list(engine.map(task, [(i,) for i in range(30)]))) == 30
+        assert peak <= 3
+
+    def test_cancel_stops_submitting(self):
+        engine = HashEngine(workers=2, max_pending=2)
+        seen = []
+        for args, _ in engine.map(lambda i: str(i), [(i,) for i in range(1000)]):
+            seen.append(args)
+            engine.cancel()
+        assert engine.cancelled
+        assert len(seen) < 1000
@@ -0,0 +1,67 @@
+"""
+相似文件分析的单元测试
+"""
+
+import random
+
+from multi_system.files.similar_files import _MAX_FANOUT, MAX_CHUNK, find_similar_files
+
+
+def _variants(directory, count, size=96 * 1024, seed=1):
+    """count 个只在中间改了几个字节的文件"""
+    rng = random.Random(seed)
+    base = bytearray(rng.randbytes(size))
+    paths = []
+    for i in range(count):
+        data = bytearray(base)
+        data[size // 2:size // 2 + 4] = i.to_bytes(4, "little")
+        path = directory / f"f{i:03}.bin"
+        path.write_bytes(data)
+        paths.append(str(path))
+    return paths
+
+
+def _find(path, threshold=0.5):
+    return find_similar_files(
+        path, min_size=1024, threshold=threshold, workers=2, use_processes=False
+    )
+
+
+class TestFindSimilarFiles:
+    """相似文件分析测试类"""
+
+    def test_few_similar_files_are_paired(self, tmp_path):
+        paths = _variants(tmp_path, 5)
+        report = _find(tmp_path)
+        assert len(report.pairs) == 10
+        assert all(p.ratio >= 0.5 for p in report.pairs)
+        (cluster,) = report.clusters
+        assert sorted(cluster.paths) == paths
+        assert report.dedup_savings > 0
+
+    def test_many_similar_files_form_one_cluster(self, tmp_path):
+        """相似文件数超过逐对累计的上限时仍然归入同一簇"""
+        paths = _variants(tmp_path, _MAX_FANOUT + 6)
+        report = _find(tmp_path)
+        (cluster,) = report.clusters
+        assert sorted(cluster.paths) == paths
+        assert cluster.unique_size < cluster.total_size / 2
+
+    def test_unrelated_files_are_not_similar(self, tmp_path):
+        rng = random.Random(2)
+        for i in range(3):
+            (tmp_path / f"r{i}.bin").write_bytes(rng.randbytes(64 * 1024))
+        report = _find(tmp_path)
+        assert report.pairs == []
+        assert report.clusters == []
+
+    def test_shared_zero_runs_do_not_make_files_similar(self, tmp_path):
+        """只共享全零区域的文件不算相似"""
+        rng = random.Random(3)
+        for i in range(2):
+            zeros = bytes(4 * MAX_CHUNK)
+            (tmp_path / f"z{i}.bin").write_bytes(rng.randbytes(16 * 1024) + zeros)
+        # 共享的全零分块约占文件的四分之一
+        report = _find(tmp_path, threshold=0.1)
+        assert report.pairs == []
+        assert report.clusters == []
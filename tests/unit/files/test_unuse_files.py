@@ -0,0 +1,61 @@
+"""
+空文件与空目录清理的单元测试
+"""
+
+import os
+
+import pytest
+
+from multi_system.files.unuse_files import (
+    cleanup_directory,
+    iter_cleanup,
+    remove_empty_dirs,
+    remove_empty_files,
+)
+
+
+def _tree(root):
+    """a/b/empty.txt、a/c/（空）、d/data.txt（非空）、d/e/（空）、link -> a"""
+    (root / "a" / "b").mkdir(parents=True)
+    (root / "a" / "c").mkdir()
+    (root / "a" / "b" / "empty.txt").write_bytes(b"")
+    (root / "d" / "e").mkdir(parents=True)
+    (root / "d" / "data.txt").write_text("keep")
+    os.symlink(root / "a", root / "link")
+
+
+def _rel(root, paths):
+    return sorted(os.path.relpath(p, root) for p in paths)
+
+
+class TestCleanup:
+    """自底向上清理测试类"""
+
+    def test_cleanup_in_one_pass(self, tmp_path):
+        """删除空文件后产生的空目录也在同一次遍历中删除，父目录随之删除"""
+        _tree(tmp_path)
+        files, dirs = cleanup_directory(os.fspath(tmp_path))
+        assert _rel(tmp_path, files) == ["a/b/empty.txt"]
+        assert _rel(tmp_path, dirs) == ["a", "a/b", "a/c", "d/e"]
+        assert sorted(os.listdir(tmp_path)) == ["d", "link"]
+        assert (tmp_path / "link").is_symlink()
+
+    def test_dry_run_changes_nothing(self, tmp_path):
+        _tree(tmp_path)
+        items = list(iter_cleanup(os.fspath(tmp_path), dry_run=True))
+        assert _rel(tmp_path, [i.path for i in items if i.is_dir]) == ["a", "a/b", "a/c", "d/e"]
+        assert (tmp_path / "a" / "b" / "empty.txt").exists()
+
+    def test_files_only_and_dirs_only(self, tmp_path):
+        _tree(tmp_path)
+        assert _rel(tmp_path, remove_empty_dirs(os.fspath(tmp_path))) == ["a/c", "d/e"]
+        assert _rel(tmp_path, remove_empty_files(os.fspath(tmp_path))) == ["a/b/empty.txt"]
+        assert (tmp_path / "a" / "b").is_dir()
+
+    def test_missing_directory(self, tmp_path):
+        """单独删除空文件或空目录时目录不存在返回空列表，cleanup_directory 报错"""
+        missing = os.fspath(tmp_path / "missing")
+        assert remove_empty_files(missing) == []
+        assert remove_empty_dirs(missing) == []
+        with pytest.raises(FileNotFoundError):
+            cleanup_directory(missing)
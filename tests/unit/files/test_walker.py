@@ -0,0 +1,74 @@
+"""
+并行遍历的单元测试
+"""
+
+import os
+
+import pytest
+
+from multi_system.files import walker
+from multi_system.files.big_files import find_big_files
+
+
+def _symlink_tree(root):
+    """root/real/f、root/link -> real、root/flink -> real/f、root/real/loop -> root"""
+    (root / "real").mkdir()
+    (root / "real" / "f").write_bytes(bytes(100))
+    os.symlink(root / "real", root / "link")
+    os.symlink(root / "real" / "f", root / "flink")
+    os.symlink(root, root / "real" / "loop")
+
+
+class TestIterTree:
+    """顺序遍历测试类"""
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_symlinks_not_followed_by_default(self, tmp_path, workers):
+        """默认不进入链接目录，链接以自身的 lstat 结果产出"""
+        _symlink_tree(tmp_path)
+        entries = {
+            os.path.relpath(e.path, tmp_path): e
+            for e in walker.walk_tree(tmp_path, [walker.ScanVisitor()], workers=workers)
+        }
+        assert sorted(entries) == ["flink", "link", "real", "real/f", "real/loop"]
+        assert entries["link"].is_symlink and not entries["link"].is_dir
+        assert entries["flink"].is_symlink and not entries["flink"].is_file
+
+    def test_follow_symlinks_stops_at_loops(self, tmp_path):
+        """跟随链接时每个目录只进入一次"""
+        _symlink_tree(tmp_path)
+        paths = sorted(
+            os.path.relpath(e.path, tmp_path)
+            for e in walker.iter_tree(tmp_path, follow_symlinks=True)
+        )
+        assert paths == ["flink", "link", "real", "real/f", "real/loop"]
+
+    def test_scanners_skip_symlinked_files(self, tmp_path):
+        _symlink_tree(tmp_path)
+        files = find_big_files(tmp_path, min_size_mb=0)
+        assert [f.path for f in files] == [os.fspath(tmp_path / "real" / "f")]
+
+
+class TestIterTreeParallel:
+    """并行遍历测试类"""
+
+    def test_worker_exception_is_raised(self, tmp_path, monkeypatch):
+        """工作线程中的非 OSError 异常应在调用方重新抛出，而不是一直等待"""
+        (tmp_path / "a" / "b").mkdir(parents=True)
+        make_entry = walker._make_entry
+
+        def broken(de, top, follow_symlinks):
+            if de.name == "b":
+                raise ValueError("boom")
+            return make_entry(de, top, follow_symlinks)
+
+        monkeypatch.setattr(walker, "_make_entry", broken)
+        with pytest.raises(ValueError, match="boom"):
+            list(walker.iter_tree_parallel(tmp_path, workers=4))
+
+    def test_oserror_goes_to_onerror(self, tmp_path):
+        """无法读取的目录交给 onerror，遍历继续"""
+        errors = []
+        entries = list(walker.iter_tree_parallel(tmp_path / "missing", onerror=errors.append))
+        assert entries == []
+        assert len(errors) == 1
@@ -0,0 +1,51 @@
+"""
+目录大小树的单元测试
+"""
+
+import os
+
+from multi_system.system.monitor.disk_usage import DiskUsageAnalyzer
+
+
+def _make_tree(root):
+    """root/a(100) + a/b(1000) + a/b/c(10)、root/d(500)、root/top(1)"""
+    for rel, size in (("a/x", 100), ("a/b/y", 1000), ("a/b/c/z", 10), ("d/w", 500), ("top", 1)):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(bytes(size))
+
+
+class TestDirTree:
+    """目录大小树测试类"""
+
+    def test_sizes_rolled_up(self, tmp_path):
+        _make_tree(tmp_path)
+        tree = DiskUsageAnalyzer.build_tree(tmp_path)
+        assert (tree.size[0], tree.file_count[0]) == (1611, 5)
+        a = tree.find(tmp_path / "a")
+        assert (tree.size[a], tree.file_count[a]) == (1110, 3)
+        assert tree.path(tree.find(tmp_path / "a" / "b" / "c")) == os.fspath(tmp_path / "a" / "b" / "c")
+        assert tree.find(tmp_path / "missing") is None
+        assert tree.find(tmp_path.parent) is None
+
+    def test_children_sorted_by_size(self, tmp_path):
+        _make_tree(tmp_path)
+        tree = DiskUsageAnalyzer.build_tree(tmp_path)
+        assert [(os.path.basename(i.path), i.size) for i in tree.child_infos()] == [
+            ("a", 1110),
+            ("d", 500),
+        ]
+        assert [os.path.basename(i.path) for i in tree.child_infos(top_n=1)] == ["a"]
+
+    def test_largest_at_any_depth(self, tmp_path):
+        _make_tree(tmp_path)
+        tree = DiskUsageAnalyzer.build_tree(tmp_path)
+        assert [os.path.basename(i.path) for i in tree.largest(3)] == ["a", "b", "d"]
+        assert [os.path.basename(i.path) for i in tree.largest(depth=2)] == ["b"]
+
+    def test_parallel_scan_matches(self, tmp_path):
+        _make_tree(tmp_path)
+        serial = DiskUsageAnalyzer.build_tree(tmp_path)
+        parallel = DiskUsageAnalyzer.build_tree(tmp_path, workers=4)
+        assert sorted(i.path for i in parallel.largest(10)) == sorted(i.path for i in serial.largest(10))
+        assert parallel.size[0] == serial.size[0]
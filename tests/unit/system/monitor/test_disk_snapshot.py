@@ -0,0 +1,68 @@
+"""
+磁盘占用快照的单元测试
+"""
+
+import os
+from datetime import datetime
+
+from multi_system.core.data_manager import DataManager
+from multi_system.system.monitor.disk_snapshot import DiskSnapshotStore
+from multi_system.system.monitor.disk_usage import DiskUsageAnalyzer
+
+
+def _write(root, rel, size):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(size))
+
+
+class TestDiskSnapshotStore:
+    """快照保存与对比测试类"""
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        scan = tmp_path / "scan"
+        _write(scan, "a/b/f", 100)
+        _write(scan, "c/名字/g", 50)
+        store = DiskSnapshotStore(DataManager(tmp_path / "data"))
+        tree = DiskUsageAnalyzer.build_tree(scan)
+
+        path = store.save(tree)
+        loaded = store.load(path)
+        assert loaded.names == tree.names
+        assert list(loaded.size) == list(tree.size)
+        assert list(loaded.file_count) == list(tree.file_count)
+        (info,) = store.list_snapshots(scan)
+        assert (info.root, info.total_size, info.dir_count) == (os.fspath(scan), 150, len(tree))
+        assert store.list_snapshots(tmp_path / "other") == []
+
+    def test_diff_lists_growth(self, tmp_path):
+        """增长按子树汇总，新目录视为从 0 增长，own_delta 指出直接文件的变化"""
+        scan = tmp_path / "scan"
+        _write(scan, "a/b/f", 100)
+        _write(scan, "c/g", 50)
+        old = DiskUsageAnalyzer.build_tree(scan)
+        _write(scan, "a/b/f2", 300)
+        _write(scan, "new/h", 20)
+        (scan / "c" / "g").unlink()
+        new = DiskUsageAnalyzer.build_tree(scan)
+
+        growth = {os.path.relpath(g.path, scan): g for g in DiskSnapshotStore.diff(old, new)}
+        assert sorted(growth) == [".", "a", "a/b", "new"]
+        assert (growth["a"].delta, growth["a"].own_delta) == (300, 0)
+        assert (growth["a/b"].delta, growth["a/b"].own_delta) == (300, 300)
+        assert (growth["new"].old_size, growth["new"].delta) == (0, 20)
+        assert growth["."].delta == 270
+        assert [g.path for g in DiskSnapshotStore.diff(old, new, depth=1)] == [
+            os.fspath(scan / "a"),
+            os.fspath(scan / "new"),
+        ]
+
+    def test_prune_keeps_latest(self, tmp_path):
+        scan = tmp_path / "scan"
+        _write(scan, "f", 1)
+        store = DiskSnapshotStore(DataManager(tmp_path / "data"))
+        tree = DiskUsageAnalyzer.build_tree(scan)
+        for hour in range(4):
+            store.save(tree, created=datetime(2024, 1, 1, hour))
+        assert store.prune(keep=2) == 2
+        assert [i.created.hour for i in store.list_snapshots()] == [2, 3]
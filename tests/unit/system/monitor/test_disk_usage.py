@@ -0,0 +1,23 @@
+"""
+磁盘空间分析的单元测试
+"""
+
+import os
+
+from multi_system.system.monitor.disk_usage import DiskUsageAnalyzer
+
+
+class TestDiskUsageAnalyzer:
+    """磁盘空间分析测试类"""
+
+    def test_hardlinks_counted_once(self, tmp_path):
+        """硬链接文件在整个扫描中只计一次，即使分布在不同子目录"""
+        (tmp_path / "x").mkdir()
+        (tmp_path / "y").mkdir()
+        (tmp_path / "x" / "data").write_bytes(bytes(1000))
+        os.link(tmp_path / "x" / "data", tmp_path / "y" / "data")
+        (tmp_path / "y" / "own").write_bytes(bytes(10))
+
+        infos = DiskUsageAnalyzer.scan_directory(tmp_path)
+        assert sum(i.size for i in infos) == 1010
+        assert sum(i.file_count for i in infos) == 2
@@ -0,0 +1,93 @@
+"""
+指标分段文件的单元测试
+"""
+
+import math
+
+from multi_system.core.data_manager import DataManager
+from multi_system.system.monitor.metrics_store import (
+    _MAGIC,
+    MetricsArchive,
+    MetricsRecorder,
+    _iter_blocks,
+    encode_block,
+)
+
+_T0 = 1_700_000_000.0
+
+
+def _record(tmp_path, rows, block_rows=10):
+    recorder = MetricsRecorder(DataManager(tmp_path), block_rows=block_rows, retention_days=10**6)
+    for i in range(rows):
+        values = {"cpu": i * 0.5, "memory": 40 + i % 3}
+        if i >= 5:
+            values["net.recv"] = float(i * 1000)
+        recorder.add(_T0 + i, values)
+    recorder.close()
+    return recorder.archive
+
+
+class TestMetricsStore:
+    """分段写入与查询测试类"""
+
+    def test_round_trip(self, tmp_path):
+        """写入后查询得到完全相同的时间与数值，中途新增的列只在出现后有值"""
+        archive = _record(tmp_path, 25)
+        result = archive.query(["cpu", "net.recv"], start=_T0, end=_T0 + 100)
+        times, values = result["cpu"]
+        assert list(times) == [_T0 + i for i in range(25)]
+        assert list(values) == [i * 0.5 for i in range(25)]
+        times, values = result["net.recv"]
+        assert list(times) == [_T0 + i for i in range(5, 25)]
+        assert archive.series_names(_T0, _T0 + 100) == ["cpu", "memory", "net.recv"]
+
+    def test_query_range_inside_block(self, tmp_path):
+        archive = _record(tmp_path, 25)
+        times, _ = archive.query(["cpu"], start=_T0 + 3, end=_T0 + 12)["cpu"]
+        assert list(times) == [_T0 + i for i in range(3, 13)]
+
+    def test_truncated_tail_is_ignored(self, tmp_path):
+        """末尾块写到一半时崩溃，之前的完整块仍可读取"""
+        archive = _record(tmp_path, 20)
+        (segment,) = archive.segments()
+        data = segment.path.read_bytes()
+        segment.path.write_bytes(data[:-7])
+        times, _ = archive.query(["cpu"], start=_T0, end=_T0 + 100)["cpu"]
+        assert list(times) == [_T0 + i for i in range(10)]
+
+    def test_encode_block_keeps_nan_columns_sparse(self):
+        block = _MAGIC + encode_block([_T0, _T0 + 1], {"a": [1.0, math.nan]})
+        (parsed,) = list(_iter_blocks(block))
+        assert parsed.rows == 2
+        assert (parsed.t_first, parsed.t_last) == (_T0, _T0 + 1)
+        assert list(parsed.columns) == ["a"]
+
+    def test_prune_by_total_size(self, tmp_path):
+        archive = MetricsArchive(DataManager(tmp_path))
+        for name in ("20200101-000000", "20200101-010000", "20200101-020000"):
+            (archive.dir / f"{name}.mseg").write_bytes(_MAGIC + bytes(100))
+        removed = archive.prune(retention_days=10**6, max_total_bytes=250)
+        assert removed == 1
+        assert [s.path.stem for s in archive.segments()] == ["20200101-010000", "20200101-020000"]
+
+    def test_segment_named_in_utc(self, tmp_path):
+        archive = _record(tmp_path, 10)
+        (segment,) = archive.segments()
+        assert segment.path.name == "20231114-221320Z.mseg"
+        assert segment.start.timestamp() == _T0
+
+    def test_reopen_after_torn_block(self, tmp_path):
+        """崩溃后在同一秒内重启：截掉不完整的末尾块，新写入的块仍可读取"""
+        archive = _record(tmp_path, 20)
+        (segment,) = archive.segments()
+        segment.path.write_bytes(segment.path.read_bytes()[:-7])
+
+        restart = [_T0 + i / 10 for i in range(5)]
+        recorder = MetricsRecorder(DataManager(tmp_path), block_rows=5, retention_days=10**6)
+        for t in restart:
+            recorder.add(t, {"cpu": 1.0})
+        recorder.close()
+
+        assert [s.path for s in archive.segments()] == [segment.path]
+        times, _ = archive.query(["cpu"], start=_T0, end=_T0 + 100)["cpu"]
+        assert list(times) == [_T0 + i for i in range(10)] + restart
@@ -0,0 +1,63 @@
+"""
+psutil 进程表的单元测试
+"""
+
+import os
+
+import psutil
+
+from multi_system.system.monitor import processes
+from multi_system.system.monitor.processes import ProcessTracker
+
+
+class _Restricted(psutil.Process):
+    """当前进程，但名称与命令行无权读取，启动时间可由测试修改"""
+
+    start = 100.0
+    name_calls = 0
+
+    def name(self):
+        type(self).name_calls += 1
+        raise psutil.AccessDenied(self.pid)
+
+    def cmdline(self):
+        raise psutil.AccessDenied(self.pid)
+
+    def create_time(self):
+        return type(self).start
+
+
+def _patch(monkeypatch):
+    _Restricted.start = 100.0
+    _Restricted.name_calls = 0
+    monkeypatch.setattr(processes.psutil, "pids", lambda: [os.getpid()])
+    monkeypatch.setattr(processes.psutil, "Process", _Restricted)
+
+
+class TestProcessTracker:
+    """psutil 进程表测试类"""
+
+    def test_access_denied_tracked_once(self, monkeypatch):
+        """无权读取名称的进程以空字段列出，之后的刷新不再重新读取"""
+        _patch(monkeypatch)
+        tracker = ProcessTracker()
+
+        (info,) = tracker.refresh().added
+        assert (info.pid, info.name, info.cmdline) == (os.getpid(), "", "")
+        assert info.create_time == 100.0
+        assert info.memory_mb > 0
+
+        diff = tracker.refresh()
+        assert not diff.added and not diff.removed
+        assert _Restricted.name_calls == 1
+
+    def test_reused_pid_detected_by_create_time(self, monkeypatch):
+        _patch(monkeypatch)
+        tracker = ProcessTracker()
+        tracker.refresh()
+
+        _Restricted.start = 200.0
+        diff = tracker.refresh()
+        assert [p.create_time for p in diff.removed] == [100.0]
+        assert [p.create_time for p in diff.added] == [200.0]
+        assert [p.create_time for p in tracker.processes()] == [200.0]
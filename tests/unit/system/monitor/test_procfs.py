@@ -0,0 +1,113 @@
+"""
+/proc 进程采集的单元测试
+"""
+
+import os
+import sys
+
+import pytest
+
+from multi_system.system.monitor import procfs
+from multi_system.system.monitor.procfs import (
+    _STARTTIME,
+    _STATE,
+    _STIME,
+    _UTIME,
+    ProcfsTracker,
+    _split_stat,
+    procfs_available,
+)
+
+
+def _stat_line(comm: bytes, starttime: int = 22) -> bytes:
+    fields = [b"S", b"1"] + [str(i).encode() for i in range(5, 53)]
+    fields[_STARTTIME] = str(starttime).encode()
+    return b"1234 (" + comm + b") " + b" ".join(fields) + b"\n"
+
+
+def _fake_process(root, pid: int, starttime: int, readable: bool = True) -> None:
+    """在假的 /proc 下写入一个进程；readable 为 False 时缺少 status，模拟首次读取失败"""
+    d = root / str(pid)
+    d.mkdir(exist_ok=True)
+    (d / "stat").write_bytes(_stat_line(b"worker", starttime))
+    (d / "statm").write_bytes(b"100 10 5 1 0 20 0\n")
+    (d / "cmdline").write_bytes(b"worker\0--flag\0")
+    status = d / "status"
+    if readable:
+        status.write_bytes(b"Name:\tworker\nUid:\t0\t0\t0\t0\n")
+    else:
+        status.unlink(missing_ok=True)
+
+
+class TestSplitStat:
+    """stat 解析测试类"""
+
+    def test_plain_comm(self):
+        comm, fields = _split_stat(_stat_line(b"bash"))
+        assert comm == b"bash"
+        assert fields[_STATE] == b"S"
+        # proc(5) 的字段号：utime 14、stime 15、starttime 22
+        assert (fields[_UTIME], fields[_STIME], fields[_STARTTIME]) == (b"14", b"15", b"22")
+
+    def test_comm_with_parenthesis_and_space(self):
+        """进程名中包含 ") " 时按最后一个 ")" 切分"""
+        comm, fields = _split_stat(_stat_line(b"evil) S 1 (x"))
+        assert comm == b"evil) S 1 (x"
+        assert fields[_STATE] == b"S"
+        assert fields[_STARTTIME] == b"22"
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux") or not procfs_available(), reason="需要 /proc")
+class TestProcfsTracker:
+    """基于 /proc 的进程表测试类"""
+
+    def test_refresh_lists_current_process(self):
+        tracker = ProcfsTracker()
+        diff = tracker.refresh()
+        me = next(p for p in diff.added if p.pid == os.getpid())
+        assert me.memory_mb > 0
+        assert me.status in ("running", "sleeping")
+        assert os.getpid() in [p.pid for p in tracker.search(str(os.getpid()))]
+        # 第二次刷新不再把已知进程报告为新增
+        assert all(p.pid != os.getpid() for p in tracker.refresh().added)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="需要 Linux")
+class TestProcfsPidReuse:
+    """PID 复用测试类"""
+
+    def test_reuse_then_exit(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(procfs, "_PROC", str(tmp_path))
+        tracker = ProcfsTracker()
+        _fake_process(tmp_path, 42, starttime=100)
+        assert [p.pid for p in tracker.refresh().added] == [42]
+
+        _fake_process(tmp_path, 42, starttime=200)
+        diff = tracker.refresh()
+        assert [p.pid for p in diff.removed] == [42]
+        assert [p.pid for p in diff.added] == [42]
+
+        (tmp_path / "42" / "stat").unlink()
+        assert [p.pid for p in tracker.refresh().removed] == [42]
+        assert not tracker.processes()
+        assert not tracker._ticks
+
+    def test_reused_pid_unreadable(self, tmp_path, monkeypatch):
+        """复用 PID 的新进程首次读取失败时不留下旧的 CPU 计数"""
+        monkeypatch.setattr(procfs, "_PROC", str(tmp_path))
+        tracker = ProcfsTracker()
+        _fake_process(tmp_path, 42, starttime=100)
+        tracker.refresh()
+
+        _fake_process(tmp_path, 42, starttime=200, readable=False)
+        diff = tracker.refresh()
+        assert [p.pid for p in diff.removed] == [42]
+        assert not diff.added
+        assert 42 not in tracker._ticks
+
+        # 再次复用与进程退出都不应出错
+        _fake_process(tmp_path, 42, starttime=300)
+        assert [p.pid for p in tracker.refresh().added] == [42]
+        (tmp_path / "42" / "stat").unlink()
+        assert [p.pid for p in tracker.refresh().removed] == [42]
+        assert not tracker._ticks
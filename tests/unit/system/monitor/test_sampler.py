@@ -0,0 +1,116 @@
+"""
+后台指标采样的单元测试
+"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from multi_system.system.monitor import sampler
+from multi_system.system.monitor.dashboard import SystemDashboard
+from multi_system.system.monitor.sampler import MetricsSampler
+
+
+@pytest.fixture
+def fast_sampler(monkeypatch):
+    # 跳过逐个挂载点的 statvfs，缩短采样间隔
+    monkeypatch.setattr(SystemDashboard, "get_disk_stats", staticmethod(lambda: []))
+    s = MetricsSampler(interval=0.02, disk_interval=3600)
+    yield s
+    while s.running:
+        s.release(timeout=None)
+
+
+class TestRate:
+    """速率计算测试类"""
+
+    def test_missing_counters(self):
+        """计数器不可用时速率为 0"""
+        after = SimpleNamespace(read_bytes=100)
+        assert sampler._rate(None, after, "read_bytes", 1.0) == 0.0
+        assert sampler._rate(after, None, "read_bytes", 1.0) == 0.0
+
+    def test_counter_wrap(self):
+        """计数器回绕时速率记为 0 而不是负数"""
+        before = SimpleNamespace(bytes_sent=1000)
+        after = SimpleNamespace(bytes_sent=10)
+        assert sampler._rate(before, after, "bytes_sent", 1.0) == 0.0
+
+    def test_average(self):
+        before = SimpleNamespace(bytes_recv=1000)
+        after = SimpleNamespace(bytes_recv=3000)
+        assert sampler._rate(before, after, "bytes_recv", 2.0) == 1000.0
+
+
+class TestMetricsSampler:
+    """后台采样服务测试类"""
+
+    def test_shared_instance(self):
+        assert MetricsSampler.shared() is MetricsSampler.shared()
+
+    def test_single_thread_for_all_users(self, fast_sampler):
+        """多个使用方共用一个线程，最后一个使用方离开才停止"""
+        fast_sampler.acquire()
+        thread = fast_sampler._thread
+        fast_sampler.acquire()
+        assert fast_sampler._thread is thread
+
+        fast_sampler.release(timeout=None)
+        assert fast_sampler.running
+        fast_sampler.release(timeout=None)
+        assert not fast_sampler.running
+        assert not thread.is_alive()
+
+    def test_extra_release_is_ignored(self, fast_sampler):
+        fast_sampler.release()
+        with fast_sampler:
+            assert fast_sampler.running
+        assert not fast_sampler.running
+
+    def test_wait_for_new_snapshots(self, fast_sampler):
+        """wait 返回比 after 更新的快照，seq 连续递增"""
+        assert fast_sampler.latest is None
+        with fast_sampler:
+            first = fast_sampler.wait(timeout=5)
+            assert first is not None and first.seq >= 1
+            second = fast_sampler.wait(after=first.seq, timeout=5)
+        assert second.seq > first.seq
+        assert second.rates.net_sent >= 0 and second.rates.disk_read >= 0
+        assert 0.0 <= second.cpu.percent <= 100.0
+
+    def test_wait_timeout(self):
+        """未启动时 wait 超时返回 None"""
+        assert MetricsSampler().wait(timeout=0.01) is None
+
+    def test_seq_continues_after_restart(self, fast_sampler):
+        with fast_sampler:
+            before = fast_sampler.wait(timeout=5)
+        with fast_sampler:
+            after = fast_sampler.wait(after=before.seq, timeout=5)
+        assert after.seq > before.seq
+
+    def test_subscribers(self, fast_sampler):
+        """订阅方的异常不中断采样，取消订阅后不再收到回调"""
+        received = []
+        got_two = threading.Event()
+
+        def broken(snapshot):
+            raise ValueError("订阅方出错")
+
+        def record(snapshot):
+            received.append(snapshot.seq)
+            if len(received) >= 2:
+                got_two.set()
+
+        fast_sampler.subscribe(broken)
+        unsubscribe = fast_sampler.subscribe(record)
+        with fast_sampler:
+            assert got_two.wait(5)
+            unsubscribe()
+            count = len(received)
+            latest = fast_sampler.wait(timeout=5).seq
+            fast_sampler.wait(after=latest + 1, timeout=5)
+        assert received == sorted(received)
+        assert len(received) <= count + 1  # 取消时可能正有一次回调在进行
+        unsubscribe()  # 重复取消不报错
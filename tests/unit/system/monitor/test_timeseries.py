@@ -0,0 +1,87 @@
+"""
+指标历史环形缓冲区的单元测试
+"""
+
+import math
+
+from multi_system.system.monitor.timeseries import MetricsHistory, Series, _Ring
+
+
+class TestRing:
+    """环形缓冲区测试类"""
+
+    def test_wraparound_keeps_latest_in_order(self):
+        ring = _Ring(4, 2)
+        for t in range(10):
+            ring.append(float(t), float(t * 10))
+        lo, hi = ring.find(0, math.inf)
+        assert list(ring.slice(0, lo, hi)) == [6.0, 7.0, 8.0, 9.0]
+        lo, hi = ring.find(7, 8)
+        assert list(ring.slice(1, lo, hi)) == [70.0, 80.0]
+
+
+class TestSeries:
+    """多分辨率序列测试类"""
+
+    def _series(self, n):
+        series = Series(levels=((0, 30), (10, 100), (60, 100)))
+        for t in range(n):
+            series.add(float(t), float(t % 7))
+        return series
+
+    def test_downsampled_stats_are_exact(self):
+        """降采样层的 count/min/max/avg 与原始数据一致，包括仍在累积的桶"""
+        series = self._series(125)
+        values = [float(t % 7) for t in range(125)]
+        for level in (1, 2):
+            stats = series.stats(0, level=level)
+            assert stats.count == 125
+            assert stats.min == min(values)
+            assert stats.max == max(values)
+            assert math.isclose(stats.avg, sum(values) / len(values))
+
+    def test_raw_level_drops_old_points(self):
+        """原始层只保留最近 capacity 个点，更早的窗口改用降采样层"""
+        series = self._series(125)
+        times, _ = series.points(0, level=0)
+        assert list(times) == [float(t) for t in range(95, 125)]
+        assert series.pick_level(0) == 1
+        assert series.pick_level(100) == 0
+
+    def test_points_average_each_bucket(self):
+        series = self._series(25)
+        times, values = series.points(0, level=1)
+        assert list(times) == [0.0, 10.0, 20.0]
+        assert math.isclose(values[0], sum(t % 7 for t in range(10)) / 10)
+        assert math.isclose(values[2], sum(t % 7 for t in range(20, 25)) / 5)
+
+
+class TestMetricsHistory:
+    """按名称管理序列的测试类"""
+
+    def test_window_and_unknown_name(self):
+        history = MetricsHistory()
+        for t in range(100):
+            history.add("cpu", float(t), float(t))
+        stats = history.stats("cpu", window=9, now=99)
+        assert (stats.count, stats.min, stats.max) == (10, 90.0, 99.0)
+        assert history.stats("missing", window=60) is None
+        assert history.names() == ["cpu"]
+
+    def test_idle_series_evicted(self):
+        """新建序列时淘汰超过最长保留时间未更新的序列"""
+        history = MetricsHistory()
+        assert history.retention == 86400
+        history.add("disk:/mnt/usb", 0.0, 50.0)
+        history.add("cpu", 100.0, 1.0)
+        history.add("disk:/mnt/new", 86401.0, 10.0)
+        assert history.names() == ["cpu", "disk:/mnt/new"]
+
+    def test_series_count_capped(self):
+        """达到上限时淘汰最久未更新的序列"""
+        history = MetricsHistory(max_series=3)
+        for t in range(10):
+            history.add(f"disk:/mnt/{t}", float(t), 1.0)
+        history.add("disk:/mnt/8", 10.0, 1.0)
+        history.add("cpu", 11.0, 1.0)
+        assert history.names() == ["cpu", "disk:/mnt/8", "disk:/mnt/9"]
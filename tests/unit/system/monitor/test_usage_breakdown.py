@@ -0,0 +1,52 @@
+"""
+磁盘使用分类统计的单元测试
+"""
+
+import pytest
+
+from multi_system.system.monitor import usage_breakdown
+from multi_system.system.monitor.usage_breakdown import UsageRecords
+
+_NOW = 1_700_000_000
+
+
+def _records():
+    records = UsageRecords("/data", now=_NOW)
+    # 各扩展名的总大小相同，只能靠次要排序键决定顺序
+    for ext in (".txt", ".log", ".bin", ""):
+        records.append(100, 0, _NOW - 86400 * 40, _NOW, ext)
+        records.append(50, 0, _NOW, _NOW, ext)
+    return records
+
+
+def _summary(groups):
+    return [(g.label, g.size, g.count) for g in groups]
+
+
+class TestUsageRecords:
+    """分类统计测试类"""
+
+    def test_ties_are_ordered_by_label(self, monkeypatch):
+        """大小相同的分组按标签排序"""
+        monkeypatch.setattr(usage_breakdown, "np", None)
+        groups = _records().group_by("ext")
+        assert [g.label for g in groups] == sorted(g.label for g in groups)
+        assert {g.size for g in groups} == {150}
+
+    def test_numpy_and_pure_python_agree(self, monkeypatch):
+        """有无 numpy 时分组与顺序完全一致"""
+        pytest.importorskip("numpy")
+        records = _records()
+        where = records.select(min_age_days=30)
+        with_numpy = [
+            _summary(records.group_by("ext", "mtime")),
+            _summary(records.group_by("size", where=where)),
+        ]
+        monkeypatch.setattr(usage_breakdown, "np", None)
+        records = _records()
+        where = records.select(min_age_days=30)
+        without_numpy = [
+            _summary(records.group_by("ext", "mtime")),
+            _summary(records.group_by("size", where=where)),
+        ]
+        assert with_numpy == without_numpy